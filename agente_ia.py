@@ -1,27 +1,308 @@
 # agente_ia.py - Versão Otimizada para qwen2.5:0.5b
 import requests
 import json
+import os
 import time
 import sqlite3
-from logs import log_operacao, log_erro, log_ia, log_ia_erro
-from db import consultar, consultar_um, executar_comando
+import threading
+import hashlib
+from requests.adapters import HTTPAdapter
+from logs import log_operacao, log_erro, log_ia, log_ia_erro, log_ia_resposta
+from db import (
+    consultar, consultar_um, executar_comando, registrar_ouvinte_escrita,
+    executar_com_retentativa, get_connection, mesmo_banco,
+)
+from executor_tarefas import executar_em_segundo_plano
+from indice_busca import indice_busca, normalizar_texto
+from instrumentacao import cronometrado, incrementar, registrar_tempo, span
+
+# Endereço do Ollama; OLLAMA_URL permite apontar para outro servidor
+# (ex.: ollama_simulado.py nos benchmarks)
+URL_OLLAMA_PADRAO = os.environ.get("OLLAMA_URL", "http://localhost:11434")
+
+# Estado de saúde do Ollama: reaproveitado por TTL_SAUDE segundos quando ok;
+# após falhas, novas checagens esperam um intervalo que dobra até BACKOFF_MAXIMO
+TTL_SAUDE = 30
+BACKOFF_INICIAL = 1
+BACKOFF_MAXIMO = 60
+
+# Snapshot do contexto do banco usado nos prompts: vale por TTL_CONTEXTO
+# segundos ou até uma escrita nas tabelas abaixo. Enquanto o chat estiver em
+# uso (consulta nos últimos JANELA_USO_CONTEXTO segundos), é recalculado em
+# segundo plano logo após a invalidação
+TTL_CONTEXTO = 60
+JANELA_USO_CONTEXTO = 300
+TABELAS_CONTEXTO = frozenset({'clientes', 'pedidos', 'produtos', 'vendas_diarias'})
+
+# Respostas guardadas na tabela cache_respostas_ia (LRU por usado_em)
+MAX_RESPOSTAS_CACHE = 500
+
+# Registros mais relevantes (índice BM25) que entram no prompt
+LIMITE_REGISTROS_CONTEXTO = 5
+
+
+class ErroIA(Exception):
+    """Falha ao gerar resposta no Ollama (mensagem pronta para exibir)"""
+
+
+class CacheContextoIA:
+    """Snapshot do contexto do sistema para a IA, com TTL e invalidação por escrita"""
+
+    def __init__(self, calcular, ttl=TTL_CONTEXTO):
+        self._calcular = calcular
+        self.ttl = ttl
+        self._snapshot = None
+        self._gerado_em = 0.0
+        self._usado_em = None
+        self._geracao = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self):
+        """Retorna o snapshot válido ou consulta o banco e guarda o resultado"""
+        agora = time.monotonic()
+        with self._lock:
+            self._usado_em = agora
+            if self._snapshot is not None and agora - self._gerado_em < self.ttl:
+                self.acertos += 1
+                return self._snapshot
+            self.falhas += 1
+        return self._recalcular()
+
+    def _recalcular(self):
+        with self._lock:
+            geracao = self._geracao
+        snapshot = self._calcular()
+        with self._lock:
+            # Não guarda snapshot calculado antes de uma invalidação
+            if geracao == self._geracao:
+                self._snapshot = snapshot
+                self._gerado_em = time.monotonic()
+        return snapshot
+
+    def pre_carregar(self):
+        """Calcula o snapshot no executor, sem bloquear quem chamou"""
+        with self._lock:
+            self._usado_em = time.monotonic()
+        executar_em_segundo_plano(self._recalcular, chave="agente_ia_contexto")
+
+    def invalidar(self):
+        """Descarta o snapshot; se o chat estiver em uso, recalcula em segundo plano"""
+        with self._lock:
+            self._snapshot = None
+            self._geracao += 1
+            em_uso = (
+                self._usado_em is not None
+                and time.monotonic() - self._usado_em < JANELA_USO_CONTEXTO
+            )
+        if em_uso:
+            # Escritas em sequência substituem o recálculo pendente (mesma chave)
+            executar_em_segundo_plano(self._recalcular, chave="agente_ia_contexto")
+
+    def ao_escrever(self, tabelas, caminho=None):
+        """Ouvinte de escrita do db: invalida se a tabela alterada entra no contexto"""
+        if not mesmo_banco(caminho):
+            return
+        if tabelas is None or tabelas & TABELAS_CONTEXTO:
+            self.invalidar()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'em_cache': self._snapshot is not None,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+            }
+
+
+def normalizar_pergunta(pergunta):
+    """Minúsculas, sem acentos, espaços simples e sem pontuação final"""
+    return normalizar_texto(pergunta).rstrip(" ?!.;:")
+
+
+class CacheRespostasIA:
+    """
+    Cache persistente (SQLite) de respostas da IA.
+    A chave combina pergunta normalizada, modelo e hash do contexto do banco:
+    enquanto os dados não mudam, a mesma pergunta não gera outra chamada ao Ollama.
+    """
+
+    def __init__(self, tamanho_maximo=MAX_RESPOSTAS_CACHE):
+        self.tamanho_maximo = tamanho_maximo
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def chave(pergunta, modelo, contexto):
+        """Retorna (chave, pergunta_normalizada, hash_contexto)"""
+        normalizada = normalizar_pergunta(pergunta)
+        hash_contexto = hashlib.sha1(contexto.encode("utf-8")).hexdigest()
+        chave = hashlib.sha1(f"{modelo}\n{normalizada}\n{hash_contexto}".encode("utf-8")).hexdigest()
+        return chave, normalizada, hash_contexto
+
+    def obter(self, chave):
+        """Resposta guardada para a chave, ou None"""
+        def buscar():
+            conn = get_connection()
+            try:
+                linha = conn.execute(
+                    "SELECT resposta FROM cache_respostas_ia WHERE chave = ?", (chave,)
+                ).fetchone()
+                if linha is not None:
+                    conn.execute(
+                        "UPDATE cache_respostas_ia SET usado_em = ?, acessos = acessos + 1 WHERE chave = ?",
+                        (time.time(), chave)
+                    )
+                    conn.confirmar({'cache_respostas_ia'})
+                return linha[0] if linha else None
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+        try:
+            resposta = executar_com_retentativa(buscar)
+        except Exception as e:
+            # Cache indisponível não pode impedir a pergunta
+            log_erro(f"AGENTE_IA: Erro ao ler cache de respostas: {e}")
+            resposta = None
+        with self._lock:
+            if resposta is None:
+                self.falhas += 1
+            else:
+                self.acertos += 1
+        return resposta
+
+    def guardar(self, chave, pergunta, modelo, hash_contexto, resposta):
+        """Guarda a resposta e descarta as menos usadas acima do limite"""
+        def gravar():
+            conn = get_connection()
+            try:
+                agora = time.time()
+                conn.execute("""
+                    INSERT OR REPLACE INTO cache_respostas_ia
+                        (chave, pergunta, modelo, hash_contexto, resposta, criado_em, usado_em, acessos)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                """, (chave, pergunta, modelo, hash_contexto, resposta, agora, agora))
+                excedente = conn.execute("SELECT COUNT(*) FROM cache_respostas_ia").fetchone()[0] - self.tamanho_maximo
+                if excedente > 0:
+                    conn.execute("""
+                        DELETE FROM cache_respostas_ia WHERE chave IN (
+                            SELECT chave FROM cache_respostas_ia ORDER BY usado_em LIMIT ?
+                        )
+                    """, (excedente,))
+                conn.confirmar({'cache_respostas_ia'})
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+        try:
+            executar_com_retentativa(gravar)
+        except Exception as e:
+            log_erro(f"AGENTE_IA: Erro ao gravar cache de respostas: {e}")
+
+    def limpar(self):
+        """Apaga todas as respostas guardadas"""
+        executar_comando("DELETE FROM cache_respostas_ia")
+
+    def estatisticas(self):
+        with self._lock:
+            return {'acertos': self.acertos, 'falhas': self.falhas}
+
 
 class AgenteIA:
-    def __init__(self):
-        self.url_ollama = "http://localhost:11434"
-        self.modelo = "qwen2.5:0.5b"  # 🚀 Modelo mais leve!
+    def __init__(self, url_ollama=None, modelo=None):
+        self.url_ollama = (url_ollama or URL_OLLAMA_PADRAO).rstrip("/")
+        self.modelo = modelo or "qwen2.5:0.5b"  # 🚀 Modelo mais leve!
         self.conectado = False
         self.erro_memoria = False
         self.timeout = 15  # ⏱️ Timeout reduzido - modelo é rápido!
         self.modelo_disponivel = False
-        
-    def testar_conexao(self):
-        """Testa conexão com Ollama - otimizado para modelo leve"""
+
+        # 🔌 Sessão HTTP persistente: reaproveita a conexão TCP (keep-alive)
+        self.sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.sessao.mount("http://", adaptador)
+        self.sessao.mount("https://", adaptador)
+
+        self._lock_saude = threading.Lock()
+        self._verificado_em = 0.0
+        self._proxima_tentativa = 0.0
+        self._falhas_seguidas = 0
+
+        # 🗂️ Contexto do banco reaproveitado entre perguntas da mesma sessão
+        self.cache_contexto = CacheContextoIA(self._consultar_dados_sistema)
+        # 💾 Respostas já geradas para a mesma pergunta e os mesmos dados
+        self.cache_respostas = CacheRespostasIA()
+
+    # ========== ESTADO DE SAÚDE (CACHE COM TTL E BACKOFF) ==========
+
+    def _saude_em_cache(self):
+        """Retorna True/False se o estado em cache ainda vale, ou None se expirou"""
+        agora = time.monotonic()
+        with self._lock_saude:
+            if self.conectado and agora - self._verificado_em < TTL_SAUDE:
+                return True
+            if not self.conectado and self._falhas_seguidas and agora < self._proxima_tentativa:
+                return False
+        return None
+
+    def _registrar_sucesso(self):
+        with self._lock_saude:
+            self.conectado = True
+            self._verificado_em = time.monotonic()
+            self._falhas_seguidas = 0
+            self._proxima_tentativa = 0.0
+
+    def _registrar_falha(self):
+        with self._lock_saude:
+            self.conectado = False
+            self.modelo_disponivel = False
+            self._verificado_em = 0.0
+            espera = min(BACKOFF_INICIAL * (2 ** self._falhas_seguidas), BACKOFF_MAXIMO)
+            self._falhas_seguidas += 1
+            self._proxima_tentativa = time.monotonic() + espera
+
+    def invalidar_saude(self):
+        """Descarta o estado em cache; a próxima checagem consulta o Ollama"""
+        with self._lock_saude:
+            self._verificado_em = 0.0
+            self._falhas_seguidas = 0
+            self._proxima_tentativa = 0.0
+
+    def configurar_url(self, url_ollama):
+        """Aponta o agente para outro servidor Ollama"""
+        self.url_ollama = url_ollama.rstrip("/")
+        with self._lock_saude:
+            self.conectado = False
+            self.modelo_disponivel = False
+        self.invalidar_saude()
+        log_operacao("AGENTE_IA", f"URL do Ollama alterada para: {self.url_ollama}")
+
+    def testar_conexao(self, forcar=False):
+        """
+        Verifica conexão com Ollama e disponibilidade do modelo.
+        Usa o estado em cache (TTL/backoff); forcar=True sempre consulta /api/tags.
+        """
+        if not forcar:
+            em_cache = self._saude_em_cache()
+            if em_cache is not None:
+                return em_cache
+        return self._consultar_saude()
+
+    @cronometrado("ia.saude")
+    def _consultar_saude(self):
+        """Consulta /api/tags e atualiza o estado de saúde"""
         try:
             # Testa conexão básica com timeout curto
-            response = requests.get(f"{self.url_ollama}/api/tags", timeout=5)
+            response = self.sessao.get(f"{self.url_ollama}/api/tags", timeout=5)
             if response.status_code == 200:
-                self.conectado = True
+                self._registrar_sucesso()
                 
                 # Verifica se o modelo está disponível
                 try:
@@ -45,24 +326,20 @@ class AgenteIA:
                 
                 return True
             else:
-                self.conectado = False
-                self.modelo_disponivel = False
+                self._registrar_falha()
                 log_erro(f"AGENTE_IA: Ollama respondeu com status: {response.status_code}")
                 return False
                 
         except requests.exceptions.ConnectionError:
-            self.conectado = False
-            self.modelo_disponivel = False
+            self._registrar_falha()
             log_erro("AGENTE_IA: ❌ Não foi possível conectar com Ollama")
             return False
         except requests.exceptions.Timeout:
-            self.conectado = False
-            self.modelo_disponivel = False
+            self._registrar_falha()
             log_erro("AGENTE_IA: ⏱️ Timeout na conexão com Ollama")
             return False
         except Exception as e:
-            self.conectado = False
-            self.modelo_disponivel = False
+            self._registrar_falha()
             log_erro(f"AGENTE_IA: 🔥 Erro inesperado na conexão: {e}")
             return False
 
@@ -73,29 +350,28 @@ class AgenteIA:
         try:
             estatisticas = {}
             
-            # Total de clientes
-            resultado = consultar_um("SELECT COUNT(*) FROM clientes")
+            # Total de clientes e de produtos
+            resultado = consultar_um("SELECT (SELECT COUNT(*) FROM clientes), (SELECT COUNT(*) FROM produtos)")
             estatisticas['total_clientes'] = resultado[0] if resultado else 0
+            estatisticas['total_produtos'] = resultado[1] if resultado else 0
             
-            # Total de produtos
-            resultado = consultar_um("SELECT COUNT(*) FROM produtos")
-            estatisticas['total_produtos'] = resultado[0] if resultado else 0
-            
-            # Total de pedidos
-            resultado = consultar_um("SELECT COUNT(*) FROM pedidos")
-            estatisticas['total_pedidos'] = resultado[0] if resultado else 0
-            
-            # Pedidos por status
+            # Pedidos por status e vendas a partir do resumo vendas_diarias
             pedidos_status = consultar("""
-                SELECT status, COUNT(*) as quantidade 
-                FROM pedidos 
+                SELECT status, SUM(quantidade) as quantidade, SUM(faturamento) as faturamento
+                FROM vendas_diarias
                 GROUP BY status
-            """)
-            estatisticas['pedidos_por_status'] = dict(pedidos_status) if pedidos_status else {}
+            """) or []
+            estatisticas['pedidos_por_status'] = {
+                (status or None): quantidade for status, quantidade, _ in pedidos_status
+            }
+            
+            # Total de pedidos
+            estatisticas['total_pedidos'] = sum(quantidade for _, quantidade, _ in pedidos_status)
             
             # Valor total de vendas
-            resultado = consultar_um("SELECT SUM(total) FROM pedidos WHERE status = 'Concluído'")
-            estatisticas['vendas_totais'] = float(resultado[0]) if resultado and resultado[0] else 0.0
+            estatisticas['vendas_totais'] = float(sum(
+                faturamento or 0 for status, _, faturamento in pedidos_status if status == 'Concluído'
+            ))
             
             # Ticket médio
             if estatisticas['total_pedidos'] > 0:
@@ -185,7 +461,24 @@ class AgenteIA:
             return []
 
     def _coletar_dados_sistema(self):
-        """Coleta dados do sistema - otimizado para modelo leve"""
+        """Dados do sistema para o prompt (snapshot em cache; não alterar)"""
+        return self.cache_contexto.obter()
+
+    def pre_carregar_contexto(self):
+        """Prepara o snapshot e o índice de busca em segundo plano (ex.: ao abrir o chat)"""
+        self.cache_contexto.pre_carregar()
+        executar_em_segundo_plano(indice_busca.sincronizar, chave="agente_ia_indice")
+
+    def _buscar_registros_relevantes(self, pergunta):
+        """Top-k registros do índice de busca para a pergunta"""
+        try:
+            return indice_busca.buscar(pergunta, LIMITE_REGISTROS_CONTEXTO)
+        except Exception as e:
+            log_erro(f"AGENTE_IA: Erro na busca de registros relevantes: {e}")
+            return []
+
+    def _consultar_dados_sistema(self):
+        """Consulta no banco os dados do sistema - otimizado para modelo leve"""
         dados = {
             'estatisticas': self.consultar_estatisticas_sistema(),
             'clientes_recentes': self.consultar_clientes_recentes(3),
@@ -196,10 +489,84 @@ class AgenteIA:
 
     # ========== MÉTODO PRINCIPAL OTIMIZADO ==========
 
+    @cronometrado("ia.contexto")
+    def _contexto_prompt(self, pergunta, contexto_adicional=None):
+        """
+        Texto com os dados do sistema (e os registros relevantes) que entra no prompt.
+        O contexto_adicional vai junto, e por isso também entra na chave do cache de respostas.
+        """
+        contexto = self._formatar_contexto_banco_dados(
+            self._coletar_dados_sistema(), self._buscar_registros_relevantes(pergunta)
+        )
+        if contexto_adicional:
+            contexto = f"{contexto}\n\n{contexto_adicional}"
+        return contexto
+
+    def _buscar_resposta_em_cache(self, pergunta, contexto_bd):
+        """Retorna (resposta ou None, chave do cache)"""
+        chave = self.cache_respostas.chave(pergunta, self.modelo, contexto_bd)
+        resposta = self.cache_respostas.obter(chave[0])
+        if resposta is not None:
+            incrementar("ia.cache.acertos")
+            log_ia(f"⚡ Resposta do cache para: {pergunta[:80]}")
+        else:
+            incrementar("ia.cache.falhas")
+        return resposta, chave
+
+    def _guardar_resposta_em_cache(self, chave, resposta):
+        chave_cache, pergunta_normalizada, hash_contexto = chave
+        self.cache_respostas.guardar(chave_cache, pergunta_normalizada, self.modelo, hash_contexto, resposta)
+
+    def _montar_payload(self, pergunta, contexto_bd, stream=False):
+        """Monta o payload de /api/generate com o contexto do banco de dados"""
+        # 🎯 PROMPT OTIMIZADO para modelo leve - MAIS CURTO E DIRETO
+        prompt = f"""Dados do sistema:
+{contexto_bd}
+
+Pergunta: {pergunta}
+
+Instruções: Responda de forma CURTA, DIRETA e PRÁTICA. Use apenas os dados fornecidos."""
+        
+        # ⚡ CONFIGURAÇÕES OTIMIZADAS para modelo leve
+        return {
+            "model": self.modelo,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "num_predict": 250,  # 🔽 REDUZIDO - modelo é pequeno
+                "temperature": 0.4,  # 📊 Um pouco mais criativo
+                "top_k": 30,         # 🎯 Mais focado
+                "top_p": 0.8         # 📈 Balance criatividade/qualidade
+            }
+        }
+
+    def _mensagem_erro_http(self, response):
+        """Monta a mensagem de erro de uma resposta não-200 do Ollama"""
+        erro_msg = f"Erro Ollama {response.status_code}"
+        try:
+            erro_json = response.json()
+            erro_detalhe = erro_json.get('error', '')
+            erro_msg += f": {erro_detalhe}"
+        except:
+            erro_msg += f": {response.text}"
+        
+        if response.status_code == 404:
+            # Modelo removido do Ollama: força nova checagem de /api/tags
+            self.invalidar_saude()
+        return erro_msg
+
+    @cronometrado("ia.pergunta")
     def enviar_pergunta_com_contexto(self, pergunta, contexto_adicional=None):
         """
         Envia pergunta para o Ollama - OTIMIZADO para qwen2.5:0.5b
+        A mesma pergunta com os mesmos dados (e o mesmo contexto_adicional) é
+        respondida pelo cache de respostas.
         """
+        contexto_bd = self._contexto_prompt(pergunta, contexto_adicional)
+        resposta, chave_cache = self._buscar_resposta_em_cache(pergunta, contexto_bd)
+        if resposta is not None:
+            return resposta, None
+        
         if not self.testar_conexao():
             return None, "Ollama não está conectado"
         
@@ -207,41 +574,21 @@ class AgenteIA:
             return None, f"Modelo {self.modelo} não está disponível"
         
         try:
-            # Coleta dados do sistema
-            dados_sistema = self._coletar_dados_sistema()
-            contexto_bd = self._formatar_contexto_banco_dados(dados_sistema)
-            
-            # 🎯 PROMPT OTIMIZADO para modelo leve - MAIS CURTO E DIRETO
-            prompt = f"""Dados do sistema:
-{contexto_bd}
-
-Pergunta: {pergunta}
-
-Instruções: Responda de forma CURTA, DIRETA e PRÁTICA. Use apenas os dados fornecidos."""
-            
+            payload = self._montar_payload(pergunta, contexto_bd)
             log_operacao("AGENTE_IA", f"Enviando pergunta para {self.modelo}: {pergunta[:80]}...")
-            
-            # ⚡ CONFIGURAÇÕES OTIMIZADAS para modelo leve
-            payload = {
-                "model": self.modelo,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "num_predict": 250,  # 🔽 REDUZIDO - modelo é pequeno
-                    "temperature": 0.4,  # 📊 Um pouco mais criativo
-                    "top_k": 30,         # 🎯 Mais focado
-                    "top_p": 0.8         # 📈 Balance criatividade/qualidade
-                }
-            }
+            inicio = time.perf_counter()
             
             # ⏱️ TIMEOUT CURTO - modelo é rápido!
-            response = requests.post(
-                f"{self.url_ollama}/api/generate",
-                json=payload,
-                timeout=self.timeout  # 15 segundos
-            )
+            with span("ia.ollama.generate", modelo=self.modelo):
+                response = self.sessao.post(
+                    f"{self.url_ollama}/api/generate",
+                    json=payload,
+                    timeout=self.timeout  # 15 segundos
+                )
             
             if response.status_code == 200:
+                # Resposta ok também confirma a saúde do Ollama (renova o TTL)
+                self._registrar_sucesso()
                 resultado = response.json()
                 resposta = resultado.get('response', '').strip()
                 
@@ -250,18 +597,15 @@ Instruções: Responda de forma CURTA, DIRETA e PRÁTICA. Use apenas os dados fo
                     log_erro(f"AGENTE_IA_ERRO: {erro_msg}")
                     return None, erro_msg
                 
-                log_ia(f"✅ Resposta recebida ({len(resposta)} caracteres) em {resultado.get('total_duration', 0)/1e9:.1f}s")
+                log_ia_resposta(
+                    pergunta, resposta, tokens_utilizados=resultado.get('eval_count', 0),
+                    tempo_resposta=time.perf_counter() - inicio, modelo=self.modelo
+                )
+                self._guardar_resposta_em_cache(chave_cache, resposta)
                 return resposta, None
                 
             else:
-                erro_msg = f"Erro Ollama {response.status_code}"
-                try:
-                    erro_json = response.json()
-                    erro_detalhe = erro_json.get('error', '')
-                    erro_msg += f": {erro_detalhe}"
-                except:
-                    erro_msg += f": {response.text}"
-                
+                erro_msg = self._mensagem_erro_http(response)
                 log_erro(f"AGENTE_IA_ERRO: {erro_msg}")
                 return None, erro_msg
                 
@@ -272,15 +616,111 @@ Instruções: Responda de forma CURTA, DIRETA e PRÁTICA. Use apenas os dados fo
         except requests.exceptions.ConnectionError:
             erro_msg = "Erro de conexão - Ollama pode ter parado"
             log_erro(f"AGENTE_IA_ERRO: {erro_msg}")
-            self.conectado = False
+            self._registrar_falha()
             return None, erro_msg
         except Exception as e:
             erro_msg = f"Erro inesperado: {str(e)}"
             log_erro(f"AGENTE_IA_ERRO: {erro_msg}")
             return None, erro_msg
 
-    def _formatar_contexto_banco_dados(self, dados_sistema):
-        """Formata dados do BD de forma CONCISA para modelo leve"""
+    def gerar_resposta_stream(self, pergunta, contexto_adicional=None, cancelado=None):
+        """
+        Gera a resposta em fragmentos conforme o Ollama os envia (NDJSON).
+        cancelado() é consultado a cada fragmento; se retornar True a geração
+        para e a conexão é fechada. Falhas levantam ErroIA com a mensagem.
+        Respostas em cache são entregues de uma vez, num único fragmento.
+        """
+        contexto_bd = self._contexto_prompt(pergunta, contexto_adicional)
+        resposta, chave_cache = self._buscar_resposta_em_cache(pergunta, contexto_bd)
+        if resposta is not None:
+            yield resposta
+            return
+        
+        if not self.testar_conexao():
+            raise ErroIA("Ollama não está conectado")
+        
+        if not self.modelo_disponivel:
+            raise ErroIA(f"Modelo {self.modelo} não está disponível")
+        
+        payload = self._montar_payload(pergunta, contexto_bd, stream=True)
+        log_operacao("AGENTE_IA", f"Enviando pergunta (stream) para {self.modelo}: {pergunta[:80]}...")
+        inicio = time.perf_counter()
+        
+        try:
+            response = self.sessao.post(
+                f"{self.url_ollama}/api/generate",
+                json=payload,
+                stream=True,
+                timeout=self.timeout  # vale para cada fragmento, não para a resposta toda
+            )
+        except requests.exceptions.Timeout:
+            erro_msg = f"Timeout - Ollama não respondeu em {self.timeout} segundos"
+            log_erro(f"AGENTE_IA_ERRO: {erro_msg}")
+            raise ErroIA(erro_msg)
+        except requests.exceptions.ConnectionError:
+            erro_msg = "Erro de conexão - Ollama pode ter parado"
+            log_erro(f"AGENTE_IA_ERRO: {erro_msg}")
+            self._registrar_falha()
+            raise ErroIA(erro_msg)
+        
+        try:
+            if response.status_code != 200:
+                erro_msg = self._mensagem_erro_http(response)
+                log_erro(f"AGENTE_IA_ERRO: {erro_msg}")
+                raise ErroIA(erro_msg)
+            
+            self._registrar_sucesso()
+            caracteres = 0
+            fragmentos = []
+            for linha in response.iter_lines():
+                if cancelado is not None and cancelado():
+                    log_ia(f"⏹️ Geração cancelada após {caracteres} caracteres")
+                    return
+                if not linha:
+                    continue
+                
+                dados = json.loads(linha)
+                if dados.get('error'):
+                    erro_msg = f"Erro Ollama: {dados['error']}"
+                    log_erro(f"AGENTE_IA_ERRO: {erro_msg}")
+                    raise ErroIA(erro_msg)
+                
+                fragmento = dados.get('response', '')
+                if fragmento:
+                    if not fragmentos:
+                        registrar_tempo("ia.stream.primeiro_fragmento", (time.perf_counter() - inicio) * 1000)
+                    caracteres += len(fragmento)
+                    fragmentos.append(fragmento)
+                    yield fragmento
+                
+                if dados.get('done'):
+                    # Só respostas completas vão para o cache
+                    resposta = "".join(fragmentos).strip()
+                    # Gerador: o tempo é anotado direto, sem span (a execução é intercalada com quem consome)
+                    registrar_tempo("ia.stream.total", (time.perf_counter() - inicio) * 1000)
+                    log_ia_resposta(
+                        pergunta, resposta, tokens_utilizados=dados.get('eval_count', 0),
+                        tempo_resposta=time.perf_counter() - inicio, modelo=self.modelo
+                    )
+                    if resposta:
+                        self._guardar_resposta_em_cache(chave_cache, resposta)
+                    return
+        except requests.exceptions.RequestException as e:
+            erro_msg = f"Conexão interrompida durante a resposta: {e}"
+            log_erro(f"AGENTE_IA_ERRO: {erro_msg}")
+            raise ErroIA(erro_msg)
+        except ValueError as e:
+            erro_msg = f"Resposta inválida do Ollama: {e}"
+            log_erro(f"AGENTE_IA_ERRO: {erro_msg}")
+            raise ErroIA(erro_msg)
+        finally:
+            response.close()
+
+    def _formatar_contexto_banco_dados(self, dados_sistema, relevantes=None):
+        """
+        Formata dados do BD de forma CONCISA para modelo leve.
+        Com registros relevantes para a pergunta, eles substituem as listas de recentes.
+        """
         contexto = "=== DADOS DO SISTEMA ===\n"
         
         # Estatísticas (formato compacto)
@@ -291,6 +731,11 @@ Instruções: Responda de forma CURTA, DIRETA e PRÁTICA. Use apenas os dados fo
         contexto += f"Vendas: R$ {stats.get('vendas_totais', 0):.2f} | "
         contexto += f"Ticket: R$ {stats.get('ticket_medio', 0):.2f}\n"
         
+        if relevantes:
+            contexto += "Registros relacionados à pergunta:\n"
+            contexto += "\n".join(f"- {registro.resumo}" for registro in relevantes)
+            return contexto
+        
         # Dados recentes (apenas se existirem)
         if dados_sistema['clientes_recentes']:
             contexto += "Clientes recentes: "
@@ -315,6 +760,18 @@ Instruções: Responda de forma CURTA, DIRETA e PRÁTICA. Use apenas os dados fo
         """Método original mantido para compatibilidade"""
         return self.enviar_pergunta_com_contexto(pergunta)
 
+    def verificar_disponibilidade(self):
+        """
+        (ok, mensagem) pelo estado de saúde em cache (TTL/backoff), sem gerar
+        nada no modelo. É a checagem das análises; o teste com /api/generate
+        fica para o botão "testar modelo".
+        """
+        if not self.testar_conexao():
+            return False, "Sem conexão"
+        if not self.modelo_disponivel:
+            return False, f"Modelo {self.modelo} não disponível"
+        return True, "IA disponível"
+
     def testar_modelo(self):
         """Testa se o modelo responde - OTIMIZADO para modelo leve"""
         if not self.testar_conexao():
@@ -335,13 +792,14 @@ Instruções: Responda de forma CURTA, DIRETA e PRÁTICA. Use apenas os dados fo
                 }
             }
             
-            response = requests.post(
+            response = self.sessao.post(
                 f"{self.url_ollama}/api/generate",
                 json=payload,
                 timeout=8  # ⏱️ Timeout bem curto para teste
             )
             
             if response.status_code == 200:
+                self._registrar_sucesso()
                 resultado = response.json()
                 resposta = resultado.get('response', '').strip()
                 tempo_resposta = resultado.get('total_duration', 0) / 1e9
@@ -356,6 +814,9 @@ Instruções: Responda de forma CURTA, DIRETA e PRÁTICA. Use apenas os dados fo
                 
         except requests.exceptions.Timeout:
             return False, "Timeout no teste"
+        except requests.exceptions.ConnectionError:
+            self._registrar_falha()
+            return False, "Erro de conexão no teste"
         except Exception as e:
             return False, f"Erro no teste: {str(e)}"
 
@@ -364,7 +825,7 @@ Instruções: Responda de forma CURTA, DIRETA e PRÁTICA. Use apenas os dados fo
 
     def analisar_cliente(self, dados_cliente):
         """Análise do cliente usando IA real"""
-        teste_ok, mensagem = self.testar_modelo()
+        teste_ok, mensagem = self.verificar_disponibilidade()
         if not teste_ok:
             log_erro(f"AGENTE_IA: Não é possível usar IA - {mensagem}")
             return self._analisar_cliente_basico(dados_cliente)
@@ -385,7 +846,7 @@ Instruções: Responda de forma CURTA, DIRETA e PRÁTICA. Use apenas os dados fo
 
     def analisar_pedidos(self, dados_pedidos):
         """Análise dos pedidos usando IA real"""
-        teste_ok, mensagem = self.testar_modelo()
+        teste_ok, mensagem = self.verificar_disponibilidade()
         if not teste_ok:
             log_erro(f"AGENTE_IA: Não é possível usar IA - {mensagem}")
             return self._analisar_pedidos_basico(dados_pedidos)
@@ -404,7 +865,7 @@ Instruções: Responda de forma CURTA, DIRETA e PRÁTICA. Use apenas os dados fo
 
     def sugerir_produtos(self, dados_cliente, produtos=None):
         """Sugestão de produtos usando IA real"""
-        teste_ok, mensagem = self.testar_modelo()
+        teste_ok, mensagem = self.verificar_disponibilidade()
         if not teste_ok:
             log_erro(f"AGENTE_IA: Não é possível usar IA - {mensagem}")
             return self._sugerir_produtos_basico(dados_cliente)
@@ -467,7 +928,7 @@ Instruções: Responda de forma CURTA, DIRETA e PRÁTICA. Use apenas os dados fo
         self.erro_memoria = False
         self.modelo_disponivel = False
         log_operacao("AGENTE_IA", f"Modelo alterado para: {novo_modelo}")
-        return self.testar_conexao()
+        return self.testar_conexao(forcar=True)
 
     def get_estatisticas(self):
         return {
@@ -476,8 +937,18 @@ Instruções: Responda de forma CURTA, DIRETA e PRÁTICA. Use apenas os dados fo
             "modelo_disponivel": self.modelo_disponivel,
             "erro_memoria": self.erro_memoria,
             "url": self.url_ollama,
-            "timeout": self.timeout
+            "timeout": self.timeout,
+            "falhas_seguidas": self._falhas_seguidas,
+            "proxima_tentativa_em": max(self._proxima_tentativa - time.monotonic(), 0.0),
+            "contexto_cache": self.cache_contexto.estatisticas(),
+            "respostas_cache": self.cache_respostas.estatisticas(),
+            "indice_busca": indice_busca.estatisticas()
         }
 
+    def fechar(self):
+        """Fecha as conexões mantidas pela sessão HTTP"""
+        self.sessao.close()
+
 # Instância global
-agente_ia = AgenteIA()
\ No newline at end of file
+agente_ia = AgenteIA()
+registrar_ouvinte_escrita(agente_ia.cache_contexto.ao_escrever)
\ No newline at end of file
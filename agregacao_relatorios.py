@@ -0,0 +1,266 @@
+# agregacao_relatorios.py
+"""
+Agregação de métricas de período para os relatórios.
+
+Todas as métricas de pedidos de um período (quantidade, faturamento, ticket
+médio, menor/maior pedido, distribuição por status e série diária) saem da
+tabela de resumo vendas_diarias (uma linha por dia e status, mantida por
+triggers em db.py), sem varrer pedidos. O resultado é um objeto imutável
+consumido pelas telas, CSV, PDF e contexto da IA.
+
+Os resultados ficam em um cache LRU por (tipo, data_inicio, data_fim, status),
+invalidado sempre que pedidos, itens_pedido, clientes, produtos ou vendas_diarias
+são alterados.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from db import get_connection, mesmo_banco, registrar_ouvinte_escrita
+from instrumentacao import span
+
+
+TABELAS_RELATORIOS = frozenset({'pedidos', 'itens_pedido', 'clientes', 'produtos', 'vendas_diarias'})
+
+
+class CacheRelatorios:
+    """Cache LRU de resultados de relatório, seguro para uso entre threads."""
+
+    def __init__(self, tamanho_maximo=32):
+        self.tamanho_maximo = tamanho_maximo
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self._geracao = 0
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, tipo, data_inicio, data_fim, status, calcular):
+        """Retorna o resultado em cache ou calcula com calcular() e guarda."""
+        chave = (tipo, data_inicio, data_fim, status or "Todos")
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave]
+            self.falhas += 1
+            geracao = self._geracao
+
+        with span("relatorio.calcular", tipo=tipo):
+            resultado = calcular()
+
+        with self._lock:
+            # Não guarda resultado calculado antes de uma invalidação
+            if geracao == self._geracao:
+                self._itens[chave] = resultado
+                self._itens.move_to_end(chave)
+                while len(self._itens) > self.tamanho_maximo:
+                    self._itens.popitem(last=False)
+        return resultado
+
+    def invalidar(self):
+        """Descarta todos os resultados guardados."""
+        with self._lock:
+            self._itens.clear()
+            self._geracao += 1
+
+    def ao_escrever(self, tabelas, caminho=None):
+        """Ouvinte de escrita do db: invalida se a tabela alterada afeta relatórios."""
+        if not mesmo_banco(caminho):
+            return
+        if tabelas is None or tabelas & TABELAS_RELATORIOS:
+            self.invalidar()
+
+    def estatisticas(self):
+        with self._lock:
+            return {'itens': len(self._itens), 'acertos': self.acertos, 'falhas': self.falhas}
+
+
+cache_relatorios = CacheRelatorios()
+registrar_ouvinte_escrita(cache_relatorios.ao_escrever)
+
+
+@dataclass(frozen=True)
+class AgregadoPeriodo:
+    """Métricas consolidadas de um período (somente leitura)."""
+    data_inicio: str
+    data_fim: str
+    status: str = "Todos"
+    novos_clientes: int = 0
+    total_clientes: int = 0
+    total_pedidos_geral: int = 0
+    quantidade_pedidos: int = 0
+    faturamento: float = 0.0
+    ticket_medio: float = 0.0
+    menor_pedido: float = 0.0
+    maior_pedido: float = 0.0
+    # ((status, quantidade, faturamento), ...) em ordem alfabética de status
+    por_status: tuple = field(default_factory=tuple)
+    # ((data, quantidade, faturamento, ticket_medio), ...) em ordem de data
+    serie_diaria: tuple = field(default_factory=tuple)
+    # ((id, nome, email, pedidos, valor_total, ticket_medio), ...) por valor gasto
+    top_clientes: tuple = field(default_factory=tuple)
+    # ((id, nome, quantidade_vendida, receita, pedidos_com_produto), ...) por quantidade
+    top_produtos: tuple = field(default_factory=tuple)
+
+    @property
+    def status_contagem(self):
+        """Dicionário {status: quantidade de pedidos}."""
+        return {status: quantidade for status, quantidade, _ in self.por_status}
+
+    def como_dict(self):
+        """Representação serializável (JSON) do agregado."""
+        return {
+            'periodo': f"{self.data_inicio} a {self.data_fim}",
+            'status': self.status,
+            'clientes': {
+                'novos': self.novos_clientes,
+                'total': self.total_clientes,
+            },
+            'pedidos': {
+                'quantidade': self.quantidade_pedidos,
+                'faturamento': self.faturamento,
+                'ticket_medio': self.ticket_medio,
+                'menor_pedido': self.menor_pedido,
+                'maior_pedido': self.maior_pedido,
+                'status': self.status_contagem,
+                'total_geral': self.total_pedidos_geral,
+            },
+            'financeiro': {
+                'evolucao_diaria': [list(dia[:3]) for dia in self.serie_diaria],
+            },
+            'clientes_top': [
+                {'nome': c[1], 'pedidos': c[3], 'valor_total': c[4]} for c in self.top_clientes
+            ],
+            'produtos': {
+                'top_vendidos': [list(p[1:4]) for p in self.top_produtos],
+            },
+        }
+
+
+def agregar_periodo(data_inicio, data_fim, status="Todos", limite_top=10, db_path=None):
+    """
+    Calcula todas as métricas do período e retorna um AgregadoPeriodo.
+    status diferente de "Todos" restringe as métricas de pedidos a esse status.
+    """
+    filtro_status = ""
+    params = [data_inicio, data_fim]
+    if status and status != "Todos":
+        filtro_status = " AND status = ?"
+        params.append(status)
+
+    conn = get_connection(db_path)
+    try:
+        c = conn.cursor()
+
+        # Resumo por (dia, status): no máximo uma linha por status em cada dia
+        c.execute(f"""
+            SELECT dia, status, quantidade, faturamento, menor_pedido, maior_pedido
+            FROM vendas_diarias
+            WHERE dia BETWEEN ? AND ?{filtro_status}
+            ORDER BY dia
+        """, params)
+        grupos = c.fetchall()
+
+        c.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM clientes WHERE created_date BETWEEN ? AND ?),
+                (SELECT COUNT(*) FROM clientes),
+                (SELECT COUNT(*) FROM pedidos)
+        """, (data_inicio, data_fim))
+        novos_clientes, total_clientes, total_pedidos_geral = c.fetchone()
+
+        c.execute(f"""
+            SELECT c.id, c.nome, c.email, COUNT(p.id), SUM(p.total), AVG(p.total)
+            FROM pedidos p
+            JOIN clientes c ON c.id = p.cliente_id
+            WHERE p.created_date BETWEEN ? AND ?{filtro_status.replace('status', 'p.status')}
+            GROUP BY c.id
+            ORDER BY SUM(p.total) DESC
+            LIMIT ?
+        """, params + [limite_top])
+        top_clientes = tuple(
+            (linha[0], linha[1], linha[2], linha[3], float(linha[4] or 0), float(linha[5] or 0))
+            for linha in c.fetchall()
+        )
+
+        c.execute(f"""
+            SELECT pr.id, pr.nome, SUM(ip.quantidade), SUM(ip.quantidade * ip.preco_unit),
+                   COUNT(DISTINCT ip.pedido_id)
+            FROM pedidos p
+            JOIN itens_pedido ip ON ip.pedido_id = p.id
+            JOIN produtos pr ON pr.id = ip.produto_id
+            WHERE p.created_date BETWEEN ? AND ?{filtro_status.replace('status', 'p.status')}
+            GROUP BY pr.id
+            ORDER BY SUM(ip.quantidade) DESC
+            LIMIT ?
+        """, params + [limite_top])
+        top_produtos = tuple(
+            (linha[0], linha[1], int(linha[2] or 0), float(linha[3] or 0), linha[4])
+            for linha in c.fetchall()
+        )
+    finally:
+        conn.close()
+
+    quantidade = 0
+    faturamento = 0.0
+    menor = None
+    maior = None
+    status_acumulado = {}
+    dias = {}
+    for dia, status_pedido, qtd, soma, minimo, maximo in grupos:
+        soma = float(soma or 0)
+        quantidade += qtd
+        faturamento += soma
+        menor = minimo if menor is None or (minimo is not None and minimo < menor) else menor
+        maior = maximo if maior is None or (maximo is not None and maximo > maior) else maior
+
+        qtd_status, soma_status = status_acumulado.get(status_pedido, (0, 0.0))
+        status_acumulado[status_pedido] = (qtd_status + qtd, soma_status + soma)
+
+        qtd_dia, soma_dia = dias.get(dia, (0, 0.0))
+        dias[dia] = (qtd_dia + qtd, soma_dia + soma)
+
+    return AgregadoPeriodo(
+        data_inicio=data_inicio,
+        data_fim=data_fim,
+        status=status or "Todos",
+        novos_clientes=novos_clientes or 0,
+        total_clientes=total_clientes or 0,
+        total_pedidos_geral=total_pedidos_geral or 0,
+        quantidade_pedidos=quantidade,
+        faturamento=faturamento,
+        ticket_medio=faturamento / quantidade if quantidade else 0.0,
+        menor_pedido=float(menor or 0),
+        maior_pedido=float(maior or 0),
+        por_status=tuple(
+            (s, qtd, soma) for s, (qtd, soma) in sorted(status_acumulado.items(), key=lambda i: str(i[0]))
+        ),
+        serie_diaria=tuple(
+            (dia, qtd, soma, soma / qtd if qtd else 0.0) for dia, (qtd, soma) in dias.items()
+        ),
+        top_clientes=top_clientes,
+        top_produtos=top_produtos,
+    )
+
+
+def agregar_periodo_em_cache(data_inicio, data_fim, status="Todos", db_path=None):
+    """agregar_periodo() passando pelo cache de relatórios."""
+    return cache_relatorios.obter(
+        'agregado', data_inicio, data_fim, status,
+        lambda: agregar_periodo(data_inicio, data_fim, status, db_path=db_path)
+    )
+
+
+def periodo_anterior(data_inicio, data_fim, dias=None):
+    """
+    Retorna (inicio, fim) do período imediatamente anterior.
+    Sem 'dias', usa a mesma duração do período informado.
+    """
+    inicio = datetime.strptime(data_inicio, "%Y-%m-%d")
+    if dias is None:
+        dias = (datetime.strptime(data_fim, "%Y-%m-%d") - inicio).days
+    return (
+        (inicio - timedelta(days=dias)).strftime("%Y-%m-%d"),
+        (inicio - timedelta(days=1)).strftime("%Y-%m-%d"),
+    )
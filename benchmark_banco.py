@@ -0,0 +1,148 @@
+# benchmark_banco.py
+"""
+Benchmark de leitura/escrita concorrente no SQLite.
+
+Compara o perfil 'compatibilidade' (journal de rollback, comportamento antigo)
+com o perfil 'padrao' (WAL + PRAGMAs ajustados) usando um banco temporário:
+N threads leitoras executam consultas de relatório enquanto uma thread
+escritora grava pedidos, como acontece quando um PDF com IA é gerado
+enquanto um pedido é salvo.
+
+Uso:
+    python benchmark_banco.py [--segundos 5] [--leitores 4] [--pedidos 5000]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+import db
+
+
+CONSULTA_LEITURA = """
+    SELECT status, COUNT(*), SUM(total)
+    FROM pedidos
+    WHERE data >= ?
+    GROUP BY status
+"""
+
+
+def _popular(caminho, quantidade_pedidos):
+    """Cria o schema e insere dados de exemplo no banco temporário."""
+    conn = sqlite3.connect(caminho)
+    conn.executescript("""
+        CREATE TABLE clientes (id INTEGER PRIMARY KEY AUTOINCREMENT, nome TEXT NOT NULL,
+                               email TEXT UNIQUE, telefone TEXT,
+                               created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE pedidos (id INTEGER PRIMARY KEY AUTOINCREMENT, cliente_id INTEGER,
+                              data DATE NOT NULL, total REAL NOT NULL,
+                              status TEXT DEFAULT 'Pendente',
+                              created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+    """)
+    conn.executemany(
+        "INSERT INTO clientes (nome, email) VALUES (?, ?)",
+        [(f"Cliente {i}", f"cliente{i}@email.com") for i in range(1, 501)]
+    )
+    status = ['Pendente', 'Concluído', 'Cancelado']
+    conn.executemany(
+        "INSERT INTO pedidos (cliente_id, data, total, status) VALUES (?, date('now', ?), ?, ?)",
+        [
+            (random.randint(1, 500), f"-{random.randint(0, 365)} days",
+             round(random.uniform(10, 5000), 2), random.choice(status))
+            for _ in range(quantidade_pedidos)
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+
+def _executar_cenario(caminho, perfil, segundos, leitores):
+    """Roda leitores e um escritor pelo tempo informado e devolve os contadores."""
+    db.configurar_armazenamento(perfil)
+    contadores = {'leituras': 0, 'escritas': 0, 'erros_ocupado': 0}
+    lock = threading.Lock()
+    parar = threading.Event()
+
+    def somar(chave):
+        with lock:
+            contadores[chave] += 1
+
+    def leitor():
+        while not parar.is_set():
+            conn = db.get_connection(caminho)
+            try:
+                db.executar_com_retentativa(
+                    lambda: conn.execute(CONSULTA_LEITURA, ('2000-01-01',)).fetchall()
+                )
+                somar('leituras')
+            except sqlite3.OperationalError:
+                somar('erros_ocupado')
+            finally:
+                conn.close()
+
+    def escritor():
+        while not parar.is_set():
+            conn = db.get_connection(caminho)
+
+            def gravar():
+                try:
+                    conn.execute(
+                        "INSERT INTO pedidos (cliente_id, data, total) VALUES (?, DATE('now'), ?)",
+                        (random.randint(1, 500), round(random.uniform(10, 5000), 2))
+                    )
+                    conn.commit()
+                except sqlite3.OperationalError:
+                    conn.rollback()
+                    raise
+
+            try:
+                db.executar_com_retentativa(gravar)
+                somar('escritas')
+            except sqlite3.OperationalError:
+                somar('erros_ocupado')
+            finally:
+                conn.close()
+
+    threads = [threading.Thread(target=leitor, daemon=True) for _ in range(leitores)]
+    threads.append(threading.Thread(target=escritor, daemon=True))
+    for t in threads:
+        t.start()
+    time.sleep(segundos)
+    parar.set()
+    for t in threads:
+        t.join()
+    db.fechar_conexoes()
+    return contadores
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de concorrência do SQLite")
+    parser.add_argument('--segundos', type=float, default=5.0)
+    parser.add_argument('--leitores', type=int, default=4)
+    parser.add_argument('--pedidos', type=int, default=5000)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="bench_db_")
+    try:
+        print(f"{'Perfil':<16}{'Leituras/s':>12}{'Escritas/s':>12}{'Ocupado':>10}")
+        for perfil in ('compatibilidade', 'padrao'):
+            caminho = os.path.join(pasta, f"bench_{perfil}.db")
+            _popular(caminho, args.pedidos)
+            resultado = _executar_cenario(caminho, perfil, args.segundos, args.leitores)
+            print(
+                f"{perfil:<16}"
+                f"{resultado['leituras'] / args.segundos:>12.1f}"
+                f"{resultado['escritas'] / args.segundos:>12.1f}"
+                f"{resultado['erros_ocupado']:>10}"
+            )
+    finally:
+        db.configurar_armazenamento('padrao')
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+# benchmark_ia.py
+"""
+Benchmark dos caminhos que usam a IA, contra o Ollama simulado.
+
+Sobe o ollama_simulado.py em uma porta livre, cria um banco temporário com
+dados de exemplo e mede:
+- AgenteIA.enviar_pergunta_com_contexto (perguntas novas e repetidas/cache);
+- AgenteIA.gerar_resposta_stream (inclui tempo até o primeiro fragmento);
+- utils.analisar_pedidos;
+- as análises de IA dos relatórios (análise completa e PDF com IA);
+- envios simultâneos pela fila central da IA.
+
+Para cada cenário mostra p50/p95 de latência, vazão (chamadas/s) e o
+overhead fora do modelo: tempo total menos o tempo que o simulador passou
+"gerando" (latência + tokens), ou seja, o custo do próprio sistema.
+
+Uso:
+    python benchmark_ia.py [--iteracoes 20] [--latencia 0.05] [--tokens-por-segundo 400]
+                           [--tokens 40] [--pedidos 2000] [--simultaneos 8]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+import db
+from ollama_simulado import ServidorOllamaSimulado
+
+
+def _percentil(valores, percentual):
+    """Percentil por posição mais próxima (valores em qualquer ordem)."""
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    indice = max(0, min(len(ordenados) - 1, round(percentual / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+def _popular(quantidade_pedidos):
+    """Cria o schema no banco atual (db.CAMINHO_BANCO) e insere dados de exemplo."""
+    db.inicializar_banco()
+    conn = db.get_connection()
+    try:
+        conn.executemany(
+            "INSERT INTO clientes (nome, email) VALUES (?, ?)",
+            [(f"Cliente {i}", f"cliente{i}@email.com") for i in range(1, 301)]
+        )
+        conn.executemany(
+            "INSERT INTO produtos (nome, preco, estoque) VALUES (?, ?, ?)",
+            [(f"Produto {i}", round(random.uniform(5, 500), 2), random.randint(0, 100)) for i in range(1, 51)]
+        )
+        status = ['Pendente', 'Concluído', 'Cancelado']
+        for _ in range(quantidade_pedidos):
+            cursor = conn.execute(
+                "INSERT INTO pedidos (cliente_id, data, total, status, created_at) "
+                "VALUES (?, date('now', ?), ?, ?, datetime('now', ?))",
+                (random.randint(1, 300), f"-{random.randint(0, 60)} days",
+                 round(random.uniform(10, 2000), 2), random.choice(status),
+                 f"-{random.randint(0, 60)} days")
+            )
+            conn.execute(
+                "INSERT INTO itens_pedido (pedido_id, produto_id, quantidade, preco_unit) VALUES (?, ?, ?, ?)",
+                (cursor.lastrowid, random.randint(1, 50), random.randint(1, 5), round(random.uniform(5, 500), 2))
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _medir(servidor, iteracoes, chamada, preparar=None):
+    """
+    Executa chamada(i) 'iteracoes' vezes, em sequência; preparar(i) roda antes
+    de cada chamada, fora da medição.
+    Retorna (latências, tempo de parede somado, segundos gastos no modelo).
+    """
+    latencias = []
+    tempo_modelo = 0.0
+    for i in range(iteracoes):
+        if preparar:
+            preparar(i)
+        modelo_antes = servidor.estatisticas()['tempo_modelo']
+        t0 = time.perf_counter()
+        chamada(i)
+        latencias.append(time.perf_counter() - t0)
+        tempo_modelo += servidor.estatisticas()['tempo_modelo'] - modelo_antes
+    return latencias, sum(latencias), tempo_modelo
+
+
+def _cenarios(agente_ia, caminho, primeiro_fragmento):
+    """
+    Lista de (nome, chamada(i), preparar(i) ou None).
+    O cenário de stream anota em 'primeiro_fragmento' o tempo até o 1º fragmento.
+    """
+    from utils import analisar_pedidos
+
+    def limpar_cache(_):
+        agente_ia.cache_respostas.limpar()
+
+    def pergunta_nova(i):
+        _, erro = agente_ia.enviar_pergunta_com_contexto(f"Como estão as vendas do cliente {i}?")
+        if erro:
+            raise RuntimeError(erro)
+
+    def pergunta_repetida(_):
+        _, erro = agente_ia.enviar_pergunta_com_contexto("Resumo de vendas")
+        if erro:
+            raise RuntimeError(erro)
+
+    def stream(i):
+        t0 = time.perf_counter()
+        for indice, _ in enumerate(agente_ia.gerar_resposta_stream(f"Quais produtos estão acabando? ({i})")):
+            if indice == 0:
+                primeiro_fragmento.append(time.perf_counter() - t0)
+
+    def analise_pedidos(_):
+        resultado = analisar_pedidos(db_path=caminho, periodo_dias=30)
+        if not resultado['sucesso']:
+            raise RuntimeError(resultado['erro'])
+
+    cenarios = [
+        ("AgenteIA: pergunta nova", pergunta_nova, None),
+        ("AgenteIA: pergunta repetida (cache)", pergunta_repetida, None),
+        ("AgenteIA: stream", stream, None),
+        ("utils.analisar_pedidos", analise_pedidos, limpar_cache),
+    ]
+
+    try:
+        from views.relatorios_views import RelatorioViews
+    except Exception as e:
+        print(f"(relatórios ignorados: não foi possível importar a view - {e})")
+        return cenarios
+
+    # Só os métodos de trabalho (sem Tk): coletam dados e chamam a IA
+    relatorio = RelatorioViews.__new__(RelatorioViews)
+    relatorio.db_path = caminho
+    data_fim = time.strftime("%Y-%m-%d")
+    data_inicio = time.strftime("%Y-%m-%d", time.localtime(time.time() - 30 * 86400))
+
+    def analise_completa(_):
+        _, erro = relatorio._executar_analise_completa_ia(data_inicio, data_fim)
+        if erro:
+            raise RuntimeError(erro)
+
+    def analise_pdf(_):
+        _, erro = relatorio._executar_analise_pdf_ia(data_inicio, data_fim)
+        if erro:
+            raise RuntimeError(erro)
+
+    cenarios += [
+        ("Relatórios: análise completa IA", analise_completa, limpar_cache),
+        ("Relatórios: PDF com IA", analise_pdf, limpar_cache),
+    ]
+    return cenarios
+
+
+def _medir_fila(servidor, agente_ia, simultaneos):
+    """Envios simultâneos pela fila da IA: mede a vazão com o modelo serializado."""
+    from fila_ia import PRIORIDADE_CHAT, enviar_para_ia
+
+    agente_ia.cache_respostas.limpar()
+    latencias = []
+    lock = threading.Lock()
+    pronto = threading.Event()
+    modelo_antes = servidor.estatisticas()['tempo_modelo']
+    inicio = time.perf_counter()
+
+    def ao_concluir(t0):
+        def registrar(_):
+            with lock:
+                latencias.append(time.perf_counter() - t0)
+                if len(latencias) == simultaneos:
+                    pronto.set()
+        return registrar
+
+    for i in range(simultaneos):
+        enviar_para_ia(
+            agente_ia.enviar_pergunta_com_contexto, f"Pergunta simultânea {i}",
+            prioridade=PRIORIDADE_CHAT, ao_concluir=ao_concluir(time.perf_counter()),
+        )
+    pronto.wait(timeout=120)
+    parede = time.perf_counter() - inicio
+    return latencias, parede, servidor.estatisticas()['tempo_modelo'] - modelo_antes
+
+
+def _imprimir(nome, latencias, parede, tempo_modelo):
+    n = len(latencias)
+    # Tempo de parede que não foi geração no simulador (na fila, a espera
+    # entre trabalhos não conta: o modelo estava ocupado com outro)
+    overhead = (parede - tempo_modelo) / n * 1000 if n else 0.0
+    print(
+        f"{nome:<38}{n:>5}"
+        f"{_percentil(latencias, 50) * 1000:>10.1f}"
+        f"{_percentil(latencias, 95) * 1000:>10.1f}"
+        f"{n / parede if parede else 0:>10.1f}"
+        f"{max(overhead, 0.0):>12.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos caminhos de IA com Ollama simulado")
+    parser.add_argument('--iteracoes', type=int, default=20)
+    parser.add_argument('--latencia', type=float, default=0.05)
+    parser.add_argument('--tokens-por-segundo', type=float, default=400)
+    parser.add_argument('--tokens', type=int, default=40)
+    parser.add_argument('--pedidos', type=int, default=2000)
+    parser.add_argument('--simultaneos', type=int, default=8)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="bench_ia_")
+    db_original = db.CAMINHO_BANCO
+    servidor = ServidorOllamaSimulado(
+        latencia=args.latencia, tokens_por_segundo=args.tokens_por_segundo,
+        tokens_resposta=args.tokens,
+    ).iniciar()
+    try:
+        db.CAMINHO_BANCO = os.path.join(pasta, "bench_ia.db")
+        _popular(args.pedidos)
+
+        from agente_ia import agente_ia
+        url_original = agente_ia.url_ollama
+        agente_ia.configurar_url(servidor.url)
+        try:
+            print(f"Ollama simulado em {servidor.url}: latência {args.latencia * 1000:.0f} ms, "
+                  f"{args.tokens} tokens a {args.tokens_por_segundo:.0f} tokens/s\n")
+            primeiro_fragmento = []
+            cenarios = _cenarios(agente_ia, db.CAMINHO_BANCO, primeiro_fragmento)
+            print(f"{'Cenário':<38}{'N':>5}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}{'overhead ms':>12}")
+
+            for nome, chamada, preparar in cenarios:
+                _imprimir(nome, *_medir(servidor, args.iteracoes, chamada, preparar))
+
+            _imprimir(f"Fila IA: {args.simultaneos} simultâneos", *_medir_fila(servidor, agente_ia, args.simultaneos))
+
+            if primeiro_fragmento:
+                print(f"\nStream: primeiro fragmento p50 {_percentil(primeiro_fragmento, 50) * 1000:.1f} ms, "
+                      f"p95 {_percentil(primeiro_fragmento, 95) * 1000:.1f} ms")
+            print(f"Ollama simulado: {servidor.estatisticas()['requisicoes']} requisições, "
+                  f"{servidor.estatisticas()['geracoes']} gerações")
+        finally:
+            agente_ia.configurar_url(url_original)
+    finally:
+        servidor.parar()
+        db.fechar_conexoes()
+        db.CAMINHO_BANCO = db_original
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
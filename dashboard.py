@@ -1,18 +1,17 @@
 # dashboard.py
-import sqlite3
-import os
 from datetime import datetime, timedelta
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
-from logs import log_operacao, log_erro
+from logs import log_operacao, log_erro, metricas_logs
+from db import get_connection
 
 class Dashboard:
     def __init__(self, db_path='clientes_pedidos.db'):
         self.db_path = db_path
     
     def _conectar_db(self):
-        return sqlite3.connect(self.db_path)
+        return get_connection(self.db_path)
     
     def get_metricas_principais(self):
         """Retorna as métricas principais para o dashboard."""
@@ -98,17 +97,17 @@ class Dashboard:
             data_limite = (datetime.now() - timedelta(days=dias)).strftime('%Y-%m-%d')
             
             cursor.execute("""
-                SELECT date(created_at) as data, COUNT(*) as total
-                FROM pedidos 
-                WHERE created_at >= ?
-                GROUP BY date(created_at)
+                SELECT dia as data, SUM(quantidade) as total
+                FROM vendas_diarias
+                WHERE dia >= ?
+                GROUP BY dia
                 ORDER BY data
             """, (data_limite,))
             
             resultados = cursor.fetchall()
             conn.close()
             
-            log_operacao("DASHBOARD", "Evolução de pedidos consultada", f"{len(resultados)} registros")
+            log_operacao("DASHBOARD", "Evolução de pedidos consultada", f"{len(resultados)} registros", linhas=len(resultados))
             
             return resultados
             
@@ -164,32 +163,19 @@ class Dashboard:
     def get_metricas_logs(self):
         """Retorna métricas relacionadas aos logs."""
         try:
-            # Conta arquivos de log na pasta logs
-            if os.path.exists('logs'):
-                arquivos_log = [f for f in os.listdir('logs') if f.endswith('.log')]
-                total_arquivos_log = len(arquivos_log)
-                
-                # Tenta contar linhas do log atual
-                data_atual = datetime.now().strftime("%Y-%m-%d")
-                log_hoje = f'logs/sistema_clientes_pedidos_{data_atual}.log'
-                
-                if os.path.exists(log_hoje):
-                    with open(log_hoje, 'r', encoding='utf-8') as f:
-                        linhas_log = len(f.readlines())
-                else:
-                    linhas_log = 0
-            else:
-                total_arquivos_log = 0
-                linhas_log = 0
+            # Contadores mantidos pelo próprio sistema de logs (sem ler os arquivos)
+            contadores = metricas_logs()
             
             return {
-                'total_arquivos_log': total_arquivos_log,
-                'linhas_log_hoje': linhas_log
+                'total_arquivos_log': contadores['arquivos_log'],
+                'linhas_log_hoje': contadores['registros'],
+                'niveis_log_hoje': contadores['niveis'],
+                'modulos_log_hoje': contadores['modulos']
             }
             
         except Exception as e:
             log_erro(f"Erro ao buscar métricas de logs: {str(e)}")
-            return {'total_arquivos_log': 0, 'linhas_log_hoje': 0}
+            return {'total_arquivos_log': 0, 'linhas_log_hoje': 0, 'niveis_log_hoje': {}, 'modulos_log_hoje': {}}
         
     def _log_manual(self):
         """Registra um log manual de atualização."""
@@ -1,10 +1,433 @@
 # db.py
+import itertools
+import os
+import re
 import sqlite3
+import threading
+import time
 from decimal import Decimal, ROUND_HALF_UP
 
+from instrumentacao import span
+
+CAMINHO_BANCO = 'clientes_pedidos.db'
+
+
+# === PERFIS DE ARMAZENAMENTO (PRAGMAs) ===
+
+PERFIS_ARMAZENAMENTO = {
+    # WAL permite leitores simultâneos a um escritor; NORMAL é seguro com WAL
+    'padrao': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -20000,        # ~20 MB (valor negativo = KiB)
+        'mmap_size': 268435456,      # 256 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout_ms': 5000,
+        'tentativas': 5,
+        'espera_inicial': 0.05,
+        'espera_maxima': 1.0,
+    },
+    # Mesmo perfil, mas com fsync a cada commit
+    'seguro': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -20000,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+        'busy_timeout_ms': 10000,
+        'tentativas': 8,
+        'espera_inicial': 0.05,
+        'espera_maxima': 2.0,
+    },
+    # Comportamento original do SQLite (journal de rollback)
+    'compatibilidade': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout_ms': 5000,
+        'tentativas': 1,
+        'espera_inicial': 0.05,
+        'espera_maxima': 1.0,
+    },
+}
+
+_perfil_ativo = dict(PERFIS_ARMAZENAMENTO['padrao'])
+
+
+def configurar_armazenamento(perfil='padrao', **ajustes):
+    """
+    Define o perfil de armazenamento usado pelas novas conexões.
+    Ajustes individuais (ex.: busy_timeout_ms=2000) sobrescrevem o perfil.
+    As conexões já abertas são fechadas para que o novo perfil valha para todas.
+    """
+    global _perfil_ativo
+    if perfil not in PERFIS_ARMAZENAMENTO:
+        raise ValueError(f"Perfil de armazenamento desconhecido: {perfil}")
+    novo = dict(PERFIS_ARMAZENAMENTO[perfil])
+    desconhecidos = set(ajustes) - set(novo)
+    if desconhecidos:
+        raise ValueError(f"Ajustes inválidos: {', '.join(sorted(desconhecidos))}")
+    novo.update(ajustes)
+    _perfil_ativo = novo
+    fechar_conexoes()
+
+
+def obter_perfil_armazenamento():
+    """Retorna uma cópia do perfil de armazenamento em uso."""
+    return dict(_perfil_ativo)
+
+
+def aplicar_perfil(conn, perfil=None):
+    """Aplica os PRAGMAs do perfil em uma conexão recém-aberta."""
+    perfil = perfil or _perfil_ativo
+    conn.execute(f"PRAGMA busy_timeout = {int(perfil['busy_timeout_ms'])}")
+    conn.execute(f"PRAGMA journal_mode = {perfil['journal_mode']}")
+    conn.execute(f"PRAGMA synchronous = {perfil['synchronous']}")
+    conn.execute(f"PRAGMA cache_size = {int(perfil['cache_size'])}")
+    conn.execute(f"PRAGMA mmap_size = {int(perfil['mmap_size'])}")
+    conn.execute(f"PRAGMA temp_store = {perfil['temp_store']}")
+
+
+def _banco_ocupado(erro):
+    """Indica se o erro é SQLITE_BUSY/SQLITE_LOCKED (vale nova tentativa)."""
+    mensagem = str(erro).lower()
+    return 'locked' in mensagem or 'busy' in mensagem
+
+
+def executar_com_retentativa(funcao, *args, **kwargs):
+    """
+    Executa funcao(*args, **kwargs) repetindo em caso de banco ocupado,
+    com espera exponencial conforme o perfil de armazenamento ativo.
+    """
+    perfil = _perfil_ativo
+    tentativas = max(1, int(perfil['tentativas']))
+    espera = perfil['espera_inicial']
+    for tentativa in range(1, tentativas + 1):
+        try:
+            return funcao(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if tentativa == tentativas or not _banco_ocupado(e):
+                raise
+            time.sleep(espera)
+            espera = min(espera * 2, perfil['espera_maxima'])
+
+
+# === NOTIFICAÇÃO DE ESCRITAS (invalidação de caches) ===
+
+_ouvintes_escrita = []
+
+_RE_TABELA_ESCRITA = re.compile(
+    r'^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)'
+    r'\s+["\[`]?(\w+)',
+    re.IGNORECASE
+)
+
+
+def registrar_ouvinte_escrita(funcao):
+    """
+    Registra funcao(tabelas, caminho) para ser chamada após cada commit com
+    alterações. tabelas é um frozenset com os nomes das tabelas alteradas, ou
+    None quando não é possível saber quais foram (commit direto de uma view);
+    caminho é o arquivo do banco alterado (use mesmo_banco() para filtrar).
+    """
+    if funcao not in _ouvintes_escrita:
+        _ouvintes_escrita.append(funcao)
+
+
+def remover_ouvinte_escrita(funcao):
+    """Remove um ouvinte registrado com registrar_ouvinte_escrita."""
+    if funcao in _ouvintes_escrita:
+        _ouvintes_escrita.remove(funcao)
+
+
+def notificar_escrita(tabelas=None, caminho=None):
+    """Avisa os ouvintes de que as tabelas informadas foram alteradas no banco 'caminho'."""
+    if tabelas is not None:
+        tabelas = frozenset(t.lower() for t in tabelas)
+    caminho = caminho or CAMINHO_BANCO
+    for funcao in list(_ouvintes_escrita):
+        try:
+            funcao(tabelas, caminho)
+        except Exception:
+            # Um ouvinte com problema não pode impedir a escrita
+            pass
+
+
+def mesmo_banco(caminho, referencia=None):
+    """Indica se 'caminho' é o banco 'referencia' (padrão: o banco principal atual)."""
+    if caminho is None:
+        return True
+    return os.path.abspath(caminho) == os.path.abspath(referencia or CAMINHO_BANCO)
+
+
+def tabelas_afetadas(sql):
+    """Retorna as tabelas escritas por um comando INSERT/UPDATE/DELETE."""
+    encontrada = _RE_TABELA_ESCRITA.match(sql or "")
+    return frozenset([encontrada.group(1).lower()]) if encontrada else frozenset()
+
+
+# === POOL DE CONEXÕES POR THREAD ===
+
+_numeros_savepoint = itertools.count(1)
+
+
+class ConexaoPool:
+    """
+    Conexão emprestada do pool. Repassa tudo à conexão sqlite3 real,
+    mas close() apenas devolve a conexão ao pool em vez de fechá-la.
+
+    Um empréstimo aninhado (a thread já tem a conexão emprestada, com uma
+    transação aberta) trabalha dentro de um SAVEPOINT: commit() vira RELEASE
+    e rollback() vira ROLLBACK TO, sem confirmar nem descartar o trabalho de
+    quem pegou a conexão antes. Os avisos de escrita ficam para o commit real.
+    """
+
+    def __init__(self, pool, conn, temporaria=False, savepoint=None):
+        self._pool = pool
+        self._conn = conn
+        self._temporaria = temporaria
+        self._savepoint = savepoint
+        self._devolvida = False
+        self._mudancas = conn.total_changes
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+    def __enter__(self):
+        if self._savepoint is None:
+            self._conn.__enter__()
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        if tipo is None:
+            self.confirmar()
+        elif self._savepoint is None:
+            return self._conn.__exit__(tipo, valor, tb)
+        else:
+            self.rollback()
+        return False
+
+    def commit(self):
+        """Confirma a transação e avisa os ouvintes se houve alteração."""
+        self.confirmar()
+
+    def confirmar(self, tabelas=None):
+        """Commit informando (quando conhecidas) as tabelas alteradas."""
+        houve_mudanca = self._conn.total_changes != self._mudancas
+        if self._savepoint is not None:
+            # Incorpora à transação de fora e reabre o savepoint para o que vier depois
+            self._conn.execute(f"RELEASE {self._savepoint}")
+            self._conn.execute(f"SAVEPOINT {self._savepoint}")
+            self._mudancas = self._conn.total_changes
+            if houve_mudanca:
+                self._pool._adiar_aviso(self._conn, tabelas)
+            return
+        self._conn.commit()
+        self._mudancas = self._conn.total_changes
+        houve_mudanca, tabelas = self._pool._juntar_avisos_adiados(self._conn, houve_mudanca, tabelas)
+        if houve_mudanca:
+            notificar_escrita(tabelas, self._pool.caminho)
+
+    def rollback(self):
+        """Descarta o que não foi confirmado (no aninhado, só o próprio trabalho)."""
+        if self._savepoint is not None:
+            self._conn.execute(f"ROLLBACK TO {self._savepoint}")
+        else:
+            self._conn.rollback()
+            self._pool._descartar_avisos_adiados(self._conn)
+        self._mudancas = self._conn.total_changes
+
+    def close(self):
+        """Devolve a conexão ao pool (pode ser chamado mais de uma vez)."""
+        if self._devolvida:
+            return
+        self._devolvida = True
+        if self._savepoint is not None:
+            try:
+                self._conn.execute(f"ROLLBACK TO {self._savepoint}")
+                self._conn.execute(f"RELEASE {self._savepoint}")
+            except sqlite3.Error:
+                # A transação de fora já terminou e levou o savepoint junto
+                pass
+        self._pool._devolver(self._conn, self._temporaria)
+
+
+class PoolConexoes:
+    """
+    Pool limitado de conexões SQLite com uma conexão fixa por thread.
+
+    - Cada thread reutiliza sempre a mesma conexão enquanto estiver viva;
+    - conexões de threads encerradas voltam para a lista de livres;
+    - acima de tamanho_maximo, a thread recebe uma conexão temporária;
+    - conexões ociosas há mais de intervalo_verificacao passam por um SELECT 1;
+    - toda conexão nova recebe os PRAGMAs do perfil de armazenamento ativo.
+    """
+
+    def __init__(self, caminho=CAMINHO_BANCO, tamanho_maximo=8, intervalo_verificacao=30.0):
+        self.caminho = caminho
+        self.tamanho_maximo = tamanho_maximo
+        self.intervalo_verificacao = intervalo_verificacao
+        self._lock = threading.Lock()
+        self._por_thread = {}  # ident -> [thread, conexão, último uso, empréstimos abertos]
+        self._livres = []
+        # id(conexão) -> tabelas alteradas em empréstimos aninhados (None = desconhecidas)
+        self._avisos_adiados = {}
+
+    def _criar_conexao(self):
+        perfil = _perfil_ativo
+        conn = sqlite3.connect(
+            self.caminho,
+            timeout=perfil['busy_timeout_ms'] / 1000,
+            check_same_thread=False
+        )
+        aplicar_perfil(conn, perfil)
+        return conn
+
+    @staticmethod
+    def _conexao_saudavel(conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _fechar_silenciosamente(conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _recolher_threads_encerradas(self):
+        """Devolve à lista de livres as conexões de threads que já terminaram."""
+        for ident, registro in list(self._por_thread.items()):
+            thread, conn = registro[0], registro[1]
+            if not thread.is_alive():
+                del self._por_thread[ident]
+                try:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    self._livres.append(conn)
+                except sqlite3.Error:
+                    self._fechar_silenciosamente(conn)
+
+    def obter(self):
+        """Retorna a conexão da thread atual embrulhada em ConexaoPool."""
+        thread = threading.current_thread()
+        agora = time.monotonic()
+        with self._lock:
+            registro = self._por_thread.get(thread.ident)
+            if registro is not None and registro[0] is not thread:
+                # ident reaproveitado por outra thread: a anterior já terminou
+                self._recolher_threads_encerradas()
+                registro = self._por_thread.get(thread.ident)
+
+            if registro is None:
+                if len(self._por_thread) >= self.tamanho_maximo:
+                    self._recolher_threads_encerradas()
+                if len(self._por_thread) >= self.tamanho_maximo:
+                    return ConexaoPool(self, self._criar_conexao(), temporaria=True)
+                conn = self._livres.pop() if self._livres else self._criar_conexao()
+                registro = [thread, conn, agora, 0]
+                self._por_thread[thread.ident] = registro
+
+            # Verificação de saúde apenas para conexões ociosas há algum tempo
+            if registro[3] == 0 and agora - registro[2] > self.intervalo_verificacao:
+                if not self._conexao_saudavel(registro[1]):
+                    self._fechar_silenciosamente(registro[1])
+                    registro[1] = self._criar_conexao()
+
+            registro[2] = agora
+            registro[3] += 1
+            conn = registro[1]
+            savepoint = None
+            if registro[3] > 1 and conn.in_transaction:
+                savepoint = f"emprestimo_{next(_numeros_savepoint)}"
+                conn.execute(f"SAVEPOINT {savepoint}")
+            return ConexaoPool(self, conn, savepoint=savepoint)
+
+    def _adiar_aviso(self, conn, tabelas):
+        """Guarda as tabelas confirmadas por um empréstimo aninhado até o commit real."""
+        with self._lock:
+            adiadas = self._avisos_adiados.get(id(conn), frozenset())
+            if tabelas is None or adiadas is None:
+                self._avisos_adiados[id(conn)] = None
+            else:
+                self._avisos_adiados[id(conn)] = adiadas | frozenset(tabelas)
+
+    def _juntar_avisos_adiados(self, conn, houve_mudanca, tabelas):
+        """Retorna (houve_mudanca, tabelas) somando o que ficou adiado na conexão."""
+        with self._lock:
+            if id(conn) not in self._avisos_adiados:
+                return houve_mudanca, tabelas
+            adiadas = self._avisos_adiados.pop(id(conn))
+        if not houve_mudanca:
+            return True, adiadas
+        if tabelas is None or adiadas is None:
+            return True, None
+        return True, frozenset(tabelas) | adiadas
+
+    def _descartar_avisos_adiados(self, conn):
+        with self._lock:
+            self._avisos_adiados.pop(id(conn), None)
+
+    def _devolver(self, conn, temporaria):
+        if temporaria:
+            self._fechar_silenciosamente(conn)
+            return
+        with self._lock:
+            registro = self._por_thread.get(threading.get_ident())
+            if registro is None or registro[1] is not conn:
+                return
+            registro[2] = time.monotonic()
+            registro[3] = max(0, registro[3] - 1)
+            if registro[3] == 0:
+                # Mesmo comportamento do close() original: descarta o que não foi commitado
+                self._avisos_adiados.pop(id(conn), None)
+                try:
+                    if conn.in_transaction:
+                        conn.rollback()
+                except sqlite3.Error:
+                    pass
+
+    def fechar_todas(self):
+        """Fecha todas as conexões do pool (chamado no encerramento do app)."""
+        with self._lock:
+            conexoes = [registro[1] for registro in self._por_thread.values()] + self._livres
+            self._por_thread.clear()
+            self._livres = []
+        for conn in conexoes:
+            self._fechar_silenciosamente(conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def obter_pool(caminho=None):
+    """Retorna (criando se preciso) o pool do arquivo de banco informado."""
+    caminho = caminho or CAMINHO_BANCO
+    with _pools_lock:
+        pool = _pools.get(caminho)
+        if pool is None:
+            pool = PoolConexoes(caminho)
+            _pools[caminho] = pool
+        return pool
+
+
+def fechar_conexoes():
+    """Fecha as conexões de todos os pools abertos."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.fechar_todas()
+
+
 def inicializar_banco():
     """Inicializa o banco de dados com tabelas necessárias."""
-    conn = sqlite3.connect('clientes_pedidos.db')
+    conn = get_connection()
     cursor = conn.cursor()
     
     # Tabela clientes
@@ -56,12 +479,385 @@ def inicializar_banco():
     ''')
     
     conn.commit()
+    aplicar_migracoes(conn)
     conn.close()
 
 
-def get_connection():
-    """Retorna conexão com o banco."""
-    return sqlite3.connect('clientes_pedidos.db')
+# === MIGRAÇÕES DE SCHEMA (versão em PRAGMA user_version) ===
+
+# Cada migração é (versão, descrição, passos). Um passo é um comando SQL
+# ou uma função que recebe a conexão. As versões devem ser crescentes.
+MIGRACOES = [
+    (1, "Índices de pedidos por cliente, data de criação, status e data", [
+        # Top clientes / subconsultas por cliente: cobre SUM(total) e COUNT
+        "CREATE INDEX IF NOT EXISTS idx_pedidos_cliente ON pedidos (cliente_id, total)",
+        # Filtros e ordenações por created_at nos relatórios e dashboard
+        "CREATE INDEX IF NOT EXISTS idx_pedidos_created_at ON pedidos (created_at)",
+        # Distribuição por status
+        "CREATE INDEX IF NOT EXISTS idx_pedidos_status ON pedidos (status, total)",
+        # Lista de pedidos (ORDER BY data DESC, id DESC) e análise por período
+        "CREATE INDEX IF NOT EXISTS idx_pedidos_data ON pedidos (data, id)",
+    ]),
+    (2, "Índices de itens_pedido por pedido e produto", [
+        # Itens de um pedido e joins pedido -> itens (cobre os campos somados)
+        "CREATE INDEX IF NOT EXISTS idx_itens_pedido_pedido "
+        "ON itens_pedido (pedido_id, produto_id, quantidade, preco_unit)",
+        # Produtos mais vendidos (join produto -> itens)
+        "CREATE INDEX IF NOT EXISTS idx_itens_pedido_produto "
+        "ON itens_pedido (produto_id, quantidade, preco_unit)",
+    ]),
+    (3, "Índice de clientes por data de cadastro", [
+        "CREATE INDEX IF NOT EXISTS idx_clientes_created_at ON clientes (created_at)",
+    ]),
+    (4, "Coluna created_date (date(created_at)) indexada em clientes e pedidos", [
+        lambda conn: _adicionar_coluna_data(conn, 'clientes'),
+        lambda conn: _adicionar_coluna_data(conn, 'pedidos'),
+        "CREATE INDEX IF NOT EXISTS idx_clientes_created_date ON clientes (created_date)",
+        # Cobre COUNT/SUM/AVG por período e a quebra por status sem ler a tabela
+        "CREATE INDEX IF NOT EXISTS idx_pedidos_created_date ON pedidos (created_date, status, total)",
+    ]),
+    (5, "Resumo vendas_diarias por dia e status mantido por triggers", [
+        """
+        CREATE TABLE IF NOT EXISTS vendas_diarias (
+            dia TEXT NOT NULL,
+            status TEXT NOT NULL,
+            quantidade INTEGER NOT NULL DEFAULT 0,
+            faturamento REAL NOT NULL DEFAULT 0,
+            menor_pedido REAL,
+            maior_pedido REAL,
+            PRIMARY KEY (dia, status)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_vendas_diarias_ins
+        AFTER INSERT ON pedidos
+        BEGIN
+            INSERT INTO vendas_diarias (dia, status, quantidade, faturamento, menor_pedido, maior_pedido)
+            VALUES (date(NEW.created_at), COALESCE(NEW.status, ''), 1, NEW.total, NEW.total, NEW.total)
+            ON CONFLICT (dia, status) DO UPDATE SET
+                quantidade = quantidade + 1,
+                faturamento = faturamento + excluded.faturamento,
+                menor_pedido = MIN(COALESCE(menor_pedido, excluded.menor_pedido), excluded.menor_pedido),
+                maior_pedido = MAX(COALESCE(maior_pedido, excluded.maior_pedido), excluded.maior_pedido);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_vendas_diarias_del
+        AFTER DELETE ON pedidos
+        BEGIN
+            UPDATE vendas_diarias SET
+                quantidade = quantidade - 1,
+                faturamento = faturamento - OLD.total,
+                menor_pedido = (SELECT MIN(total) FROM pedidos
+                                WHERE created_date = vendas_diarias.dia
+                                  AND COALESCE(status, '') = vendas_diarias.status),
+                maior_pedido = (SELECT MAX(total) FROM pedidos
+                                WHERE created_date = vendas_diarias.dia
+                                  AND COALESCE(status, '') = vendas_diarias.status)
+            WHERE dia = date(OLD.created_at) AND status = COALESCE(OLD.status, '');
+            DELETE FROM vendas_diarias WHERE quantidade <= 0;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_vendas_diarias_upd
+        AFTER UPDATE OF total, status, created_at ON pedidos
+        BEGIN
+            UPDATE vendas_diarias SET
+                quantidade = quantidade - 1,
+                faturamento = faturamento - OLD.total,
+                menor_pedido = (SELECT MIN(total) FROM pedidos
+                                WHERE created_date = vendas_diarias.dia
+                                  AND COALESCE(status, '') = vendas_diarias.status),
+                maior_pedido = (SELECT MAX(total) FROM pedidos
+                                WHERE created_date = vendas_diarias.dia
+                                  AND COALESCE(status, '') = vendas_diarias.status)
+            WHERE dia = date(OLD.created_at) AND status = COALESCE(OLD.status, '');
+            DELETE FROM vendas_diarias WHERE quantidade <= 0;
+            INSERT INTO vendas_diarias (dia, status, quantidade, faturamento, menor_pedido, maior_pedido)
+            VALUES (date(NEW.created_at), COALESCE(NEW.status, ''), 1, NEW.total, NEW.total, NEW.total)
+            ON CONFLICT (dia, status) DO UPDATE SET
+                quantidade = quantidade + 1,
+                faturamento = faturamento + excluded.faturamento,
+                menor_pedido = MIN(COALESCE(menor_pedido, excluded.menor_pedido), excluded.menor_pedido),
+                maior_pedido = MAX(COALESCE(maior_pedido, excluded.maior_pedido), excluded.maior_pedido);
+        END
+        """,
+        lambda conn: reconstruir_vendas_diarias(conn),
+    ]),
+    (6, "Cache persistente de respostas da IA", [
+        """
+        CREATE TABLE IF NOT EXISTS cache_respostas_ia (
+            chave TEXT PRIMARY KEY,
+            pergunta TEXT NOT NULL,
+            modelo TEXT NOT NULL,
+            hash_contexto TEXT NOT NULL,
+            resposta TEXT NOT NULL,
+            criado_em REAL NOT NULL,
+            usado_em REAL NOT NULL,
+            acessos INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """,
+        # Descarte LRU (menos usadas recentemente primeiro)
+        "CREATE INDEX IF NOT EXISTS idx_cache_respostas_ia_uso ON cache_respostas_ia (usado_em)",
+    ]),
+    (7, "Registro de alterações (tipo, id) para o índice de busca, mantido por triggers", [
+        # tipo é o tipo de documento do indice_busca: cliente, produto ou pedidos
+        # (resumo de pedidos de um cliente, com registro_id = id do cliente)
+        """
+        CREATE TABLE IF NOT EXISTS alteracoes_busca (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo TEXT NOT NULL,
+            registro_id INTEGER NOT NULL
+        )
+        """,
+        # Guarda só as 10000 alterações mais recentes; quem ficou para trás recarrega tudo
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_alteracoes_busca_limite
+        AFTER INSERT ON alteracoes_busca
+        BEGIN
+            DELETE FROM alteracoes_busca WHERE seq <= NEW.seq - 10000;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_busca_clientes_ins
+        AFTER INSERT ON clientes
+        BEGIN
+            INSERT INTO alteracoes_busca (tipo, registro_id) VALUES ('cliente', NEW.id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_busca_clientes_upd
+        AFTER UPDATE OF nome, email, telefone ON clientes
+        BEGIN
+            INSERT INTO alteracoes_busca (tipo, registro_id) VALUES ('cliente', NEW.id), ('pedidos', NEW.id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_busca_clientes_del
+        AFTER DELETE ON clientes
+        BEGIN
+            INSERT INTO alteracoes_busca (tipo, registro_id) VALUES ('cliente', OLD.id), ('pedidos', OLD.id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_busca_produtos_ins
+        AFTER INSERT ON produtos
+        BEGIN
+            INSERT INTO alteracoes_busca (tipo, registro_id) VALUES ('produto', NEW.id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_busca_produtos_upd
+        AFTER UPDATE OF nome, preco, estoque ON produtos
+        BEGIN
+            INSERT INTO alteracoes_busca (tipo, registro_id) VALUES ('produto', NEW.id);
+        END
+        """,
+        # O nome do produto entra no resumo de pedidos de quem o comprou
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_busca_produtos_nome
+        AFTER UPDATE OF nome ON produtos
+        BEGIN
+            INSERT INTO alteracoes_busca (tipo, registro_id)
+            SELECT DISTINCT 'pedidos', p.cliente_id
+            FROM itens_pedido ip JOIN pedidos p ON p.id = ip.pedido_id
+            WHERE ip.produto_id = NEW.id AND p.cliente_id IS NOT NULL;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_busca_produtos_del
+        AFTER DELETE ON produtos
+        BEGIN
+            INSERT INTO alteracoes_busca (tipo, registro_id) VALUES ('produto', OLD.id);
+            INSERT INTO alteracoes_busca (tipo, registro_id)
+            SELECT DISTINCT 'pedidos', p.cliente_id
+            FROM itens_pedido ip JOIN pedidos p ON p.id = ip.pedido_id
+            WHERE ip.produto_id = OLD.id AND p.cliente_id IS NOT NULL;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_busca_pedidos_ins
+        AFTER INSERT ON pedidos
+        WHEN NEW.cliente_id IS NOT NULL
+        BEGIN
+            INSERT INTO alteracoes_busca (tipo, registro_id) VALUES ('pedidos', NEW.cliente_id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_busca_pedidos_upd
+        AFTER UPDATE OF cliente_id, data, total, status ON pedidos
+        BEGIN
+            INSERT INTO alteracoes_busca (tipo, registro_id)
+            SELECT 'pedidos', OLD.cliente_id WHERE OLD.cliente_id IS NOT NULL
+            UNION
+            SELECT 'pedidos', NEW.cliente_id WHERE NEW.cliente_id IS NOT NULL;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_busca_pedidos_del
+        AFTER DELETE ON pedidos
+        WHEN OLD.cliente_id IS NOT NULL
+        BEGIN
+            INSERT INTO alteracoes_busca (tipo, registro_id) VALUES ('pedidos', OLD.cliente_id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_busca_itens_ins
+        AFTER INSERT ON itens_pedido
+        BEGIN
+            INSERT INTO alteracoes_busca (tipo, registro_id)
+            SELECT 'pedidos', cliente_id FROM pedidos WHERE id = NEW.pedido_id AND cliente_id IS NOT NULL;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_busca_itens_upd
+        AFTER UPDATE OF pedido_id, produto_id ON itens_pedido
+        BEGIN
+            INSERT INTO alteracoes_busca (tipo, registro_id)
+            SELECT DISTINCT 'pedidos', cliente_id FROM pedidos
+            WHERE id IN (OLD.pedido_id, NEW.pedido_id) AND cliente_id IS NOT NULL;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_busca_itens_del
+        AFTER DELETE ON itens_pedido
+        BEGIN
+            INSERT INTO alteracoes_busca (tipo, registro_id)
+            SELECT 'pedidos', cliente_id FROM pedidos WHERE id = OLD.pedido_id AND cliente_id IS NOT NULL;
+        END
+        """,
+    ]),
+]
+
+
+def reconstruir_vendas_diarias(conn=None):
+    """
+    Recalcula vendas_diarias a partir de pedidos (backfill).
+    Os triggers mantêm a tabela em dia depois disso; use novamente apenas se
+    os dados forem alterados por fora do SQLite ou para conferência.
+    Retorna o número de linhas (dia, status) geradas.
+    """
+    proprio = conn is None
+    conn = conn or get_connection()
+    try:
+        conn.execute("DELETE FROM vendas_diarias")
+        conn.execute("""
+            INSERT INTO vendas_diarias (dia, status, quantidade, faturamento, menor_pedido, maior_pedido)
+            SELECT created_date, COALESCE(status, ''), COUNT(*), SUM(total), MIN(total), MAX(total)
+            FROM pedidos
+            WHERE created_date IS NOT NULL
+            GROUP BY created_date, COALESCE(status, '')
+        """)
+        linhas = conn.execute("SELECT COUNT(*) FROM vendas_diarias").fetchone()[0]
+        if proprio:
+            conn.confirmar({'vendas_diarias'})
+        return linhas
+    except Exception:
+        if proprio:
+            conn.rollback()
+        raise
+    finally:
+        if proprio:
+            conn.close()
+
+
+def _adicionar_coluna_data(conn, tabela):
+    """
+    Adiciona created_date = date(created_at) à tabela, permitindo filtros
+    por período que usam índice (created_date BETWEEN ? AND ?).
+    Usa coluna gerada quando o SQLite suporta (3.31+); caso contrário,
+    cria uma coluna comum mantida por triggers.
+    """
+    colunas = [linha[1] for linha in conn.execute(f"PRAGMA table_xinfo({tabela})")]
+    if 'created_date' in colunas:
+        return
+    if sqlite3.sqlite_version_info >= (3, 31, 0):
+        conn.execute(
+            f"ALTER TABLE {tabela} ADD COLUMN created_date TEXT "
+            f"GENERATED ALWAYS AS (date(created_at)) VIRTUAL"
+        )
+        return
+    conn.execute(f"ALTER TABLE {tabela} ADD COLUMN created_date TEXT")
+    conn.execute(f"UPDATE {tabela} SET created_date = date(created_at)")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{tabela}_created_date_ins
+        AFTER INSERT ON {tabela}
+        BEGIN
+            UPDATE {tabela} SET created_date = date(NEW.created_at) WHERE id = NEW.id;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{tabela}_created_date_upd
+        AFTER UPDATE OF created_at ON {tabela}
+        BEGIN
+            UPDATE {tabela} SET created_date = date(NEW.created_at) WHERE id = NEW.id;
+        END
+    """)
+
+
+def versao_schema(conn=None):
+    """Retorna a versão do schema gravada em PRAGMA user_version."""
+    proprio = conn is None
+    conn = conn or get_connection()
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        if proprio:
+            conn.close()
+
+
+def aplicar_migracoes(conn=None, migracoes=None):
+    """
+    Aplica, em ordem e uma única vez, as migrações com versão maior que a
+    registrada no banco. Cada migração roda em sua própria transação junto
+    com a atualização de PRAGMA user_version. Retorna a versão final.
+    """
+    proprio = conn is None
+    conn = conn or get_connection()
+    migracoes = MIGRACOES if migracoes is None else migracoes
+    try:
+        versao_atual = versao_schema(conn)
+        for versao, descricao, passos in sorted(migracoes, key=lambda m: m[0]):
+            if versao <= versao_atual:
+                continue
+            try:
+                conn.execute("BEGIN")
+                for passo in passos:
+                    if callable(passo):
+                        passo(conn)
+                    else:
+                        conn.execute(passo)
+                conn.execute(f"PRAGMA user_version = {int(versao)}")
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                raise RuntimeError(f"Falha na migração {versao} ({descricao}): {e}") from e
+            versao_atual = versao
+        return versao_atual
+    finally:
+        if proprio:
+            conn.close()
+
+
+def explicar_consulta(sql, parametros=(), conn=None):
+    """Retorna as linhas de detalhe do EXPLAIN QUERY PLAN de uma consulta."""
+    proprio = conn is None
+    conn = conn or get_connection()
+    try:
+        return [linha[-1] for linha in conn.execute(f"EXPLAIN QUERY PLAN {sql}", parametros).fetchall()]
+    finally:
+        if proprio:
+            conn.close()
+
+
+def consulta_usa_indice(sql, indice, parametros=(), conn=None):
+    """Indica se o plano da consulta usa o índice informado."""
+    return any(indice in detalhe for detalhe in explicar_consulta(sql, parametros, conn))
+
+
+def get_connection(caminho=None):
+    """Retorna a conexão da thread atual, emprestada do pool."""
+    return obter_pool(caminho).obter()
 
 
 # === FUNÇÕES DE EXECUÇÃO E CONSULTA COM TRATAMENTO DE VALORES ===
@@ -73,14 +869,25 @@ def formatar_decimal(valor):
     return Decimal(str(valor)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
 
+def _resumo_sql(sql):
+    """SQL em uma linha e encurtado, para os spans de instrumentação."""
+    return " ".join(sql.split())[:120] if sql else ""
+
+
 def executar_comando(sql, parametros=()):
     """
     Executa um comando SQL (INSERT, UPDATE, DELETE),
     convertendo automaticamente valores monetários para Decimal com 2 casas.
+    Repete o comando com espera exponencial se o banco estiver ocupado.
     Retorna:
     - INSERT: id do último registro inserido (lastrowid)
     - UPDATE/DELETE: número de linhas afetadas (rowcount)
     """
+    with span("db.executar_comando", sql=_resumo_sql(sql)):
+        return executar_com_retentativa(_executar_comando, sql, parametros)
+
+
+def _executar_comando(sql, parametros=()):
     conn = get_connection()
     cursor = conn.cursor()
     try:
@@ -91,7 +898,7 @@ def executar_comando(sql, parametros=()):
         )
 
         cursor.execute(sql, parametros_formatados)
-        conn.commit()
+        conn.confirmar(tabelas_afetadas(sql) or None)
 
         comando = sql.strip().split()[0].upper() if sql else ""
         if comando == "INSERT":
@@ -109,6 +916,11 @@ def consultar(sql, parametros=()):
     """
     Executa uma consulta SQL (SELECT) e retorna os valores formatados.
     """
+    with span("db.consultar", sql=_resumo_sql(sql)):
+        return executar_com_retentativa(_consultar, sql, parametros)
+
+
+def _consultar(sql, parametros=()):
     conn = get_connection()
     cursor = conn.cursor()
     try:
@@ -132,6 +944,11 @@ def consultar_um(sql, parametros=()):
     """
     Executa uma consulta SQL e retorna apenas um resultado formatado.
     """
+    with span("db.consultar_um", sql=_resumo_sql(sql)):
+        return executar_com_retentativa(_consultar_um, sql, parametros)
+
+
+def _consultar_um(sql, parametros=()):
     conn = get_connection()
     cursor = conn.cursor()
     try:
@@ -0,0 +1,177 @@
+# executor_tarefas.py
+"""
+Executor compartilhado para carregar dados fora da thread do Tk.
+
+As views enviam a função pesada (consultas, leitura de arquivos, IA) para um
+pool de threads e recebem o resultado de volta na thread da interface via
+widget.after(0, ...), como o restante do sistema já fazia com threads avulsas.
+
+Tarefas enviadas com a mesma 'chave' se substituem: a mais nova cancela a
+anterior (ex.: uma busca digitada supera a busca anterior), e o resultado de
+uma tarefa cancelada nunca chega à interface.
+
+Uso:
+    executar_em_segundo_plano(
+        consultar_clientes, filtro,
+        widget=self, chave="clientes_busca",
+        ao_concluir=self._preencher_lista, ao_falhar=self._mostrar_erro,
+    )
+"""
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from logs import log_erro
+
+
+class Tarefa:
+    """Execução em segundo plano que pode ser cancelada ou substituída."""
+
+    def __init__(self, chave=None):
+        self.chave = chave
+        self.futuro = None
+        self._cancelada = threading.Event()
+
+    @property
+    def cancelada(self):
+        return self._cancelada.is_set()
+
+    def cancelar(self):
+        """Cancela a tarefa; se já estiver rodando, o resultado é descartado."""
+        self._cancelada.set()
+        if self.futuro is not None:
+            self.futuro.cancel()
+
+    def concluida(self):
+        return self.futuro is not None and self.futuro.done()
+
+    def resultado(self, timeout=None):
+        """Aguarda e retorna o resultado (uso fora da thread da interface)."""
+        return self.futuro.result(timeout)
+
+
+class ExecutorTarefas:
+    """Pool de threads com cancelamento por chave e entrega via after()."""
+
+    def __init__(self, max_threads=4, prefixo="tarefa"):
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix=prefixo)
+        self._por_chave = {}
+        self._lock = threading.Lock()
+        self._encerrado = False
+
+    def executar(self, funcao, *args, widget=None, ao_concluir=None, ao_falhar=None,
+                 chave=None, passar_tarefa=False, **kwargs):
+        """
+        Executa funcao(*args, **kwargs) em segundo plano e retorna a Tarefa.
+
+        ao_concluir(resultado) e ao_falhar(erro) são chamados na thread do Tk
+        por widget.after(0, ...); sem widget, rodam na própria thread de trabalho.
+        Sem ao_falhar, o erro é apenas registrado no log.
+        Com passar_tarefa=True a função recebe 'tarefa=' para checar tarefa.cancelada.
+        """
+        tarefa = Tarefa(chave)
+        anterior = None
+        with self._lock:
+            if self._encerrado:
+                raise RuntimeError("Executor de tarefas já foi encerrado")
+            if chave is not None:
+                anterior = self._por_chave.get(chave)
+                self._por_chave[chave] = tarefa
+            if passar_tarefa:
+                kwargs['tarefa'] = tarefa
+            tarefa.futuro = self._executor.submit(self._rodar, tarefa, funcao, args, kwargs)
+
+        # Fora do lock: cancelar pode disparar o callback de conclusão na hora
+        if anterior is not None:
+            anterior.cancelar()
+
+        tarefa.futuro.add_done_callback(
+            lambda futuro: self._finalizar(tarefa, futuro, widget, ao_concluir, ao_falhar)
+        )
+        return tarefa
+
+    def _rodar(self, tarefa, funcao, args, kwargs):
+        if tarefa.cancelada:
+            raise CancelledError()
+        return funcao(*args, **kwargs)
+
+    def _finalizar(self, tarefa, futuro, widget, ao_concluir, ao_falhar):
+        with self._lock:
+            if tarefa.chave is not None and self._por_chave.get(tarefa.chave) is tarefa:
+                del self._por_chave[tarefa.chave]
+
+        if futuro.cancelled() or tarefa.cancelada:
+            return
+
+        erro = futuro.exception()
+        if isinstance(erro, CancelledError):
+            return
+        if erro is not None:
+            if ao_falhar is None:
+                log_erro(f"Erro em tarefa de segundo plano ({tarefa.chave or 'sem chave'}): {erro}")
+                return
+            callback, valor = ao_falhar, erro
+        else:
+            if ao_concluir is None:
+                return
+            callback, valor = ao_concluir, futuro.result()
+
+        self._entregar(tarefa, widget, callback, valor)
+
+    def _entregar(self, tarefa, widget, callback, valor):
+        """Chama o callback na thread do Tk, se o widget ainda existir."""
+        def entregar():
+            if tarefa.cancelada:
+                return
+            try:
+                if widget is not None and not widget.winfo_exists():
+                    return
+                callback(valor)
+            except Exception as e:
+                log_erro(f"Erro ao entregar resultado de tarefa ({tarefa.chave or 'sem chave'}): {e}")
+
+        if widget is None:
+            entregar()
+            return
+        try:
+            widget.after(0, entregar)
+        except Exception:
+            # Janela fechada ou mainloop encerrado: resultado descartado
+            pass
+
+    def cancelar(self, chave):
+        """Cancela a tarefa pendente com a chave informada, se houver."""
+        with self._lock:
+            tarefa = self._por_chave.pop(chave, None)
+        if tarefa is not None:
+            tarefa.cancelar()
+
+    def cancelar_todas(self):
+        with self._lock:
+            tarefas = list(self._por_chave.values())
+            self._por_chave.clear()
+        for tarefa in tarefas:
+            tarefa.cancelar()
+
+    def encerrar(self, esperar=False):
+        """Cancela o que estiver pendente e encerra o pool (ao sair do app)."""
+        with self._lock:
+            self._encerrado = True
+        self.cancelar_todas()
+        self._executor.shutdown(wait=esperar, cancel_futures=True)
+
+
+# Instância global
+executor_tarefas = ExecutorTarefas()
+
+
+# Funções de conveniência
+def executar_em_segundo_plano(funcao, *args, **kwargs):
+    return executor_tarefas.executar(funcao, *args, **kwargs)
+
+
+def cancelar_tarefa(chave):
+    executor_tarefas.cancelar(chave)
+
+
+def encerrar_executor():
+    executor_tarefas.encerrar()
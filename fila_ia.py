@@ -0,0 +1,321 @@
+# fila_ia.py
+"""
+Fila central de trabalhos da IA (Ollama).
+
+O modelo local atende bem uma geração por vez; pedidos paralelos vindos do
+chat, dos relatórios e da análise de pedidos só disputam a mesma CPU/GPU.
+Todo trabalho que chama o modelo passa por aqui:
+
+- no máximo 'max_simultaneas' trabalhos rodam ao mesmo tempo (padrão 1);
+- a fila respeita prioridades: o chat interativo passa na frente das
+  análises de relatório;
+- pedidos idênticos ('identidade') enquanto um deles ainda está na fila ou
+  rodando são agrupados em um único trabalho, e todos recebem o resultado;
+- cada envio devolve uma InscricaoIA que pode ser cancelada; o trabalho só é
+  cancelado quando ninguém mais espera por ele. Envios com a mesma 'chave'
+  substituem o anterior, como no executor de tarefas.
+
+Os resultados chegam à thread do Tk via widget.after(0, ...), com a mesma
+interface de executar_em_segundo_plano.
+
+Uso:
+    enviar_para_ia(
+        gerar_analise, data_inicio, data_fim,
+        prioridade=PRIORIDADE_RELATORIO, identidade=("analise", data_inicio, data_fim),
+        widget=self, chave="relatorio_analise", ao_concluir=self._exibir,
+    )
+"""
+import heapq
+import itertools
+import threading
+from concurrent.futures import CancelledError
+
+from logs import log_erro
+
+
+# Quanto menor, antes sai da fila
+PRIORIDADE_CHAT = 0
+PRIORIDADE_ANALISE = 5
+PRIORIDADE_RELATORIO = 10
+
+_contexto_thread = threading.local()
+
+
+class TrabalhoIA:
+    """Chamada ao modelo na fila; pode ser compartilhada por pedidos idênticos."""
+
+    def __init__(self, funcao, args, kwargs, prioridade, identidade):
+        self.funcao = funcao
+        self.args = args
+        self.kwargs = kwargs
+        self.prioridade = prioridade
+        self.identidade = identidade
+        self.iniciado = False
+        self.inscricoes = []
+        self.resultado = None
+        self.erro = None
+        self._cancelado = threading.Event()
+        self._concluido = threading.Event()
+
+    @property
+    def cancelada(self):
+        return self._cancelado.is_set()
+
+    def concluido(self):
+        return self._concluido.is_set()
+
+    def aguardar(self, timeout=None):
+        """Aguarda e retorna o resultado (uso fora da thread da interface)."""
+        if not self._concluido.wait(timeout):
+            raise TimeoutError("Trabalho da IA não terminou no tempo informado")
+        if self.cancelada:
+            raise CancelledError()
+        if self.erro is not None:
+            raise self.erro
+        return self.resultado
+
+
+class InscricaoIA:
+    """Interesse de quem enviou no resultado de um TrabalhoIA."""
+
+    def __init__(self, fila, trabalho, chave, widget, ao_concluir, ao_falhar):
+        self._fila = fila
+        self.trabalho = trabalho
+        self.chave = chave
+        self.widget = widget
+        self.ao_concluir = ao_concluir
+        self.ao_falhar = ao_falhar
+        self.cancelada = False
+
+    def cancelar(self):
+        """Desiste do resultado; o trabalho é cancelado se ninguém mais esperar."""
+        self._fila._cancelar_inscricao(self)
+
+    def concluida(self):
+        return self.trabalho.concluido()
+
+
+class FilaIA:
+    """Fila com prioridade, agrupamento de pedidos idênticos e cancelamento."""
+
+    def __init__(self, max_simultaneas=1):
+        self.max_simultaneas = max_simultaneas
+        self._fila = []
+        self._sequencia = itertools.count()
+        self._condicao = threading.Condition()
+        self._por_identidade = {}
+        self._por_chave = {}
+        self._threads = []
+        self._em_execucao = 0
+        self._encerrada = False
+        self._contadores = {'enviados': 0, 'agrupados': 0, 'cancelados': 0, 'concluidos': 0}
+
+    def enviar(self, funcao, *args, prioridade=PRIORIDADE_RELATORIO, identidade=None,
+               widget=None, ao_concluir=None, ao_falhar=None, chave=None,
+               passar_tarefa=False, **kwargs):
+        """
+        Coloca funcao(*args, **kwargs) na fila e retorna a InscricaoIA.
+
+        identidade: valor (hashable) que identifica pedidos equivalentes; um
+        envio com a mesma identidade de um trabalho ainda vivo é agrupado a ele.
+        Com passar_tarefa=True a função recebe 'tarefa=' (o TrabalhoIA) para
+        checar tarefa.cancelada durante a geração.
+        """
+        anterior = None
+        with self._condicao:
+            if self._encerrada:
+                raise RuntimeError("Fila da IA já foi encerrada")
+            self._contadores['enviados'] += 1
+
+            trabalho = self._por_identidade.get(identidade) if identidade is not None else None
+            if trabalho is None or trabalho.cancelada:
+                trabalho = TrabalhoIA(funcao, args, kwargs, prioridade, identidade)
+                if passar_tarefa:
+                    kwargs['tarefa'] = trabalho
+                if identidade is not None:
+                    self._por_identidade[identidade] = trabalho
+                self._enfileirar(trabalho)
+            else:
+                self._contadores['agrupados'] += 1
+                if prioridade < trabalho.prioridade and not trabalho.iniciado:
+                    # Pedido mais urgente adianta o trabalho já enfileirado
+                    trabalho.prioridade = prioridade
+                    self._enfileirar(trabalho)
+
+            inscricao = InscricaoIA(self, trabalho, chave, widget, ao_concluir, ao_falhar)
+            trabalho.inscricoes.append(inscricao)
+            if chave is not None:
+                anterior = self._por_chave.get(chave)
+                self._por_chave[chave] = inscricao
+
+        # Fora do lock, como no executor de tarefas
+        if anterior is not None:
+            anterior.cancelar()
+        return inscricao
+
+    def _enfileirar(self, trabalho):
+        heapq.heappush(self._fila, (trabalho.prioridade, next(self._sequencia), trabalho))
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        if len(self._threads) < self.max_simultaneas:
+            thread = threading.Thread(target=self._trabalhar, name=f"fila_ia_{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+        self._condicao.notify()
+
+    def _proximo(self):
+        """Retira o próximo trabalho válido da fila (None ao encerrar)."""
+        with self._condicao:
+            while True:
+                while not self._fila and not self._encerrada:
+                    self._condicao.wait()
+                if self._encerrada:
+                    return None
+                prioridade, _, trabalho = heapq.heappop(self._fila)
+                # Entradas antigas de trabalhos adiantados, iniciados ou cancelados
+                if trabalho.cancelada or trabalho.iniciado or prioridade != trabalho.prioridade:
+                    continue
+                trabalho.iniciado = True
+                self._em_execucao += 1
+                return trabalho
+
+    def _trabalhar(self):
+        _contexto_thread.na_fila = True
+        while True:
+            trabalho = self._proximo()
+            if trabalho is None:
+                return
+            try:
+                trabalho.resultado = trabalho.funcao(*trabalho.args, **trabalho.kwargs)
+            except Exception as e:
+                trabalho.erro = e
+
+            with self._condicao:
+                self._em_execucao -= 1
+                self._contadores['concluidos'] += 1
+                if self._por_identidade.get(trabalho.identidade) is trabalho:
+                    del self._por_identidade[trabalho.identidade]
+                inscricoes = list(trabalho.inscricoes)
+                for inscricao in inscricoes:
+                    if inscricao.chave is not None and self._por_chave.get(inscricao.chave) is inscricao:
+                        del self._por_chave[inscricao.chave]
+                trabalho._concluido.set()
+
+            if trabalho.cancelada:
+                continue
+            for inscricao in inscricoes:
+                self._entregar(inscricao, trabalho)
+
+    def _entregar(self, inscricao, trabalho):
+        """Chama o callback da inscrição na thread do Tk, se o widget ainda existir."""
+        if trabalho.erro is not None:
+            if inscricao.ao_falhar is None:
+                log_erro(f"Erro em trabalho da IA ({inscricao.chave or 'sem chave'}): {trabalho.erro}")
+                return
+            callback, valor = inscricao.ao_falhar, trabalho.erro
+        else:
+            if inscricao.ao_concluir is None:
+                return
+            callback, valor = inscricao.ao_concluir, trabalho.resultado
+
+        widget = inscricao.widget
+
+        def entregar():
+            if inscricao.cancelada:
+                return
+            try:
+                if widget is not None and not widget.winfo_exists():
+                    return
+                callback(valor)
+            except Exception as e:
+                log_erro(f"Erro ao entregar resultado da IA ({inscricao.chave or 'sem chave'}): {e}")
+
+        if widget is None:
+            entregar()
+            return
+        try:
+            widget.after(0, entregar)
+        except Exception:
+            # Janela fechada ou mainloop encerrado: resultado descartado
+            pass
+
+    def _cancelar_inscricao(self, inscricao):
+        with self._condicao:
+            if inscricao.cancelada:
+                return
+            inscricao.cancelada = True
+            trabalho = inscricao.trabalho
+            if inscricao in trabalho.inscricoes:
+                trabalho.inscricoes.remove(inscricao)
+            if inscricao.chave is not None and self._por_chave.get(inscricao.chave) is inscricao:
+                del self._por_chave[inscricao.chave]
+            if trabalho.inscricoes or trabalho.concluido():
+                return
+            trabalho._cancelado.set()
+            self._contadores['cancelados'] += 1
+            if self._por_identidade.get(trabalho.identidade) is trabalho:
+                del self._por_identidade[trabalho.identidade]
+            if not trabalho.iniciado:
+                # Ainda na fila: quem aguarda é liberado na hora
+                trabalho._concluido.set()
+
+    def cancelar(self, chave):
+        """Cancela a inscrição pendente com a chave informada, se houver."""
+        with self._condicao:
+            inscricao = self._por_chave.get(chave)
+        if inscricao is not None:
+            inscricao.cancelar()
+
+    def encerrar(self):
+        """Cancela tudo o que estiver na fila e encerra as threads (ao sair do app)."""
+        with self._condicao:
+            self._encerrada = True
+            pendentes = [trabalho for _, _, trabalho in self._fila]
+            self._fila.clear()
+            self._por_chave.clear()
+            self._por_identidade.clear()
+            for trabalho in pendentes:
+                if not trabalho.iniciado:
+                    trabalho._cancelado.set()
+                    trabalho._concluido.set()
+            self._condicao.notify_all()
+
+    def estatisticas(self):
+        with self._condicao:
+            pendentes = len({
+                id(trabalho) for _, _, trabalho in self._fila
+                if not trabalho.cancelada and not trabalho.iniciado
+            })
+            return dict(self._contadores, pendentes=pendentes, em_execucao=self._em_execucao)
+
+
+# Instância global
+fila_ia = FilaIA()
+
+
+# Funções de conveniência
+def enviar_para_ia(funcao, *args, **kwargs):
+    return fila_ia.enviar(funcao, *args, **kwargs)
+
+
+def executar_na_fila_ia(funcao, *args, prioridade=PRIORIDADE_RELATORIO, identidade=None,
+                        timeout=None, **kwargs):
+    """
+    Passa funcao pela fila e aguarda o resultado (nunca na thread do Tk).
+    Dentro de um trabalho da fila a função roda direto, sem reenfileirar.
+    """
+    if getattr(_contexto_thread, 'na_fila', False):
+        return funcao(*args, **kwargs)
+    inscricao = fila_ia.enviar(funcao, *args, prioridade=prioridade, identidade=identidade, **kwargs)
+    try:
+        return inscricao.trabalho.aguardar(timeout)
+    except TimeoutError:
+        inscricao.cancelar()
+        raise
+
+
+def cancelar_trabalho_ia(chave):
+    fila_ia.cancelar(chave)
+
+
+def encerrar_fila_ia():
+    fila_ia.encerrar()
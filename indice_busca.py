@@ -0,0 +1,393 @@
+# indice_busca.py
+"""
+Índice de busca local (BM25) sobre clientes, produtos e o resumo de pedidos
+de cada cliente, usado para montar o contexto dos prompts da IA.
+
+Em vez de mandar ao modelo sempre os mesmos poucos registros recentes, o
+AgenteIA busca aqui os registros mais relevantes para a pergunta e coloca
+apenas esses (top-k) no prompt.
+
+O índice é atualizado de forma incremental: triggers do db registram em
+alteracoes_busca o (tipo, id) de cada documento afetado por uma escrita, e o
+ouvinte de escrita marca o índice como desatualizado. Na próxima busca só os
+documentos registrados depois da última sincronização são relidos do banco e,
+desses, só os que tiveram o texto alterado são reindexados. A pontuação usa
+NumPy quando disponível, com cálculo em Python puro como alternativa.
+
+Uso:
+    for registro in buscar_registros("quem comprou notebook", k=5):
+        print(registro.tipo, registro.id, registro.resumo, registro.pontuacao)
+"""
+import math
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+
+from db import get_connection, mesmo_banco, registrar_ouvinte_escrita
+
+try:
+    import numpy as np
+    NUMPY_DISPONIVEL = True
+except ImportError:
+    NUMPY_DISPONIVEL = False
+
+
+# Parâmetros clássicos do BM25
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Ids por consulta "WHERE id IN (...)" ao reler documentos alterados
+IDS_POR_CONSULTA = 500
+
+# Tipos de documento e as tabelas que alteram cada um
+TABELAS_POR_TIPO = {
+    'cliente': frozenset({'clientes'}),
+    'produto': frozenset({'produtos'}),
+    # Resumo de pedidos por cliente inclui nome do cliente e produtos comprados
+    'pedidos': frozenset({'pedidos', 'itens_pedido', 'clientes', 'produtos'}),
+}
+TABELAS_INDEXADAS = frozenset().union(*TABELAS_POR_TIPO.values())
+
+PALAVRAS_IGNORADAS = frozenset("""
+    a o as os e de da do das dos em no na nos nas um uma uns umas para pra por
+    com sem que qual quais quem como onde quando me meu minha meus minhas se ao
+    aos e eh ha tem sao foi ser mais menos sobre ja isso este esta esse essa
+""".split())
+
+
+def normalizar_texto(texto):
+    """Minúsculas, sem acentos e com espaços simples"""
+    texto = unicodedata.normalize("NFKD", texto or "")
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).lower()
+    return re.sub(r"\s+", " ", texto).strip()
+
+
+def tokenizar(texto):
+    """Termos indexáveis do texto (sem acentos e sem palavras vazias)"""
+    return [
+        termo for termo in re.findall(r"\w+", normalizar_texto(texto))
+        if termo not in PALAVRAS_IGNORADAS and (len(termo) > 1 or termo.isdigit())
+    ]
+
+
+@dataclass(frozen=True)
+class RegistroEncontrado:
+    """Resultado de uma busca no índice."""
+    tipo: str
+    id: int
+    resumo: str
+    pontuacao: float
+
+
+class IndiceBusca:
+    """Índice BM25 incremental, seguro para uso entre threads."""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # Uma sincronização por vez: quem chega durante outra espera ela terminar
+        self._lock_sincronizacao = threading.Lock()
+        self._pendente = True
+        # Último seq de alteracoes_busca aplicado (None = nunca carregado)
+        self._ultima_alteracao = None
+        # (tipo, id) -> posição do documento
+        self._posicoes = {}
+        # posição -> (tipo, id, texto indexado, resumo) ou None se removido
+        self._documentos = []
+        self._livres = []
+        # termo -> {posição: frequência}
+        self._postagens = {}
+        # termo -> (posições, frequências) em arrays NumPy, montados sob demanda
+        self._arrays = {}
+        self._comprimentos = [] if not NUMPY_DISPONIVEL else np.zeros(0, dtype=np.float64)
+        self._total_termos = 0
+        self.reindexados = 0
+
+    # === ATUALIZAÇÃO ===
+    def ao_escrever(self, tabelas, caminho=None):
+        """Ouvinte de escrita do db: marca o índice como desatualizado."""
+        if not mesmo_banco(caminho, self.db_path):
+            return
+        if tabelas is None or tabelas & TABELAS_INDEXADAS:
+            with self._lock:
+                self._pendente = True
+
+    def sincronizar(self):
+        """
+        Aplica ao índice as alterações registradas desde a última sincronização.
+        Retorna o número de documentos reindexados ou removidos.
+        """
+        with self._lock_sincronizacao:
+            with self._lock:
+                if not self._pendente:
+                    return 0
+                self._pendente = False
+            try:
+                return self._sincronizar()
+            except Exception:
+                with self._lock:
+                    self._pendente = True
+                raise
+
+    def _sincronizar(self):
+        conn = get_connection(self.db_path)
+        try:
+            # seq lido antes dos documentos: o que mudar no meio é reaplicado depois
+            ultima, ids_por_tipo = self._alteracoes_desde(conn, self._ultima_alteracao)
+            if ultima == self._ultima_alteracao:
+                return 0
+            documentos = self._carregar_documentos(conn, ids_por_tipo)
+        finally:
+            conn.close()
+
+        alterados = 0
+        with self._lock:
+            for tipo, atuais in documentos.items():
+                ids = ids_por_tipo[tipo]
+                if ids is None:
+                    removidos = [c for c in self._posicoes if c[0] == tipo and c[1] not in atuais]
+                else:
+                    removidos = [(tipo, i) for i in ids if i not in atuais and (tipo, i) in self._posicoes]
+                for chave in removidos:
+                    self._remover(chave)
+                    alterados += 1
+                for id_registro, (texto, resumo) in atuais.items():
+                    posicao = self._posicoes.get((tipo, id_registro))
+                    if posicao is not None and self._documentos[posicao][2] == texto:
+                        if self._documentos[posicao][3] != resumo:
+                            self._documentos[posicao] = (tipo, id_registro, texto, resumo)
+                        continue
+                    if posicao is not None:
+                        self._remover((tipo, id_registro))
+                    self._adicionar(tipo, id_registro, texto, resumo)
+                    alterados += 1
+            self._ultima_alteracao = ultima
+            self.reindexados += alterados
+        return alterados
+
+    @staticmethod
+    def _alteracoes_desde(conn, ultima):
+        """
+        Retorna (último seq, {tipo: ids alterados}) depois do seq informado.
+        ids None significa recarregar o tipo inteiro: primeira carga ou
+        registro de alterações já descartado além desse ponto.
+        """
+        maximo, minimo = conn.execute("SELECT MAX(seq), MIN(seq) FROM alteracoes_busca").fetchone()
+        maximo = maximo or 0
+        if ultima is None or maximo < ultima or (minimo is not None and minimo > ultima + 1):
+            return maximo, {tipo: None for tipo in TABELAS_POR_TIPO}
+
+        ids_por_tipo = {}
+        for tipo, registro_id in conn.execute(
+            "SELECT DISTINCT tipo, registro_id FROM alteracoes_busca WHERE seq > ? AND seq <= ?",
+            (ultima, maximo)
+        ):
+            ids_por_tipo.setdefault(tipo, set()).add(registro_id)
+        return maximo, ids_por_tipo
+
+    def _carregar_documentos(self, conn, ids_por_tipo):
+        """
+        Lê do banco o texto e o resumo dos documentos informados em
+        {tipo: ids} (ids None = todos os documentos do tipo).
+        """
+        documentos = {tipo: {} for tipo in ids_por_tipo}
+        if 'cliente' in ids_por_tipo:
+            for id_cliente, nome, email, telefone in _consultar_por_ids(
+                conn, "SELECT id, nome, email, telefone FROM clientes{filtro}", "id",
+                ids_por_tipo['cliente']
+            ):
+                texto = f"cliente {id_cliente} {nome} {email or ''} {telefone or ''}"
+                resumo = f"Cliente #{id_cliente} {nome}" + (f" ({email})" if email else "")
+                documentos['cliente'][id_cliente] = (texto, resumo)
+
+        if 'produto' in ids_por_tipo:
+            for id_produto, nome, preco, estoque in _consultar_por_ids(
+                conn, "SELECT id, nome, preco, estoque FROM produtos{filtro}", "id",
+                ids_por_tipo['produto']
+            ):
+                texto = f"produto {id_produto} {nome} estoque"
+                resumo = f"Produto #{id_produto} {nome} R${float(preco or 0):.2f} estoque {estoque}"
+                documentos['produto'][id_produto] = (texto, resumo)
+
+        if 'pedidos' in ids_por_tipo:
+            ids = ids_por_tipo['pedidos']
+            produtos_por_cliente = dict(_consultar_por_ids(conn, """
+                SELECT p.cliente_id, GROUP_CONCAT(DISTINCT pr.nome)
+                FROM pedidos p
+                JOIN itens_pedido ip ON ip.pedido_id = p.id
+                JOIN produtos pr ON pr.id = ip.produto_id{filtro}
+                GROUP BY p.cliente_id
+            """, "p.cliente_id", ids))
+            for id_cliente, nome, quantidade, total, ultimo, status in _consultar_por_ids(conn, """
+                SELECT c.id, c.nome, COUNT(p.id), SUM(p.total), MAX(p.data),
+                       GROUP_CONCAT(DISTINCT p.status)
+                FROM pedidos p
+                JOIN clientes c ON c.id = p.cliente_id{filtro}
+                GROUP BY c.id
+            """, "c.id", ids):
+                produtos = produtos_por_cliente.get(id_cliente) or ""
+                texto = f"pedidos compras vendas {nome} {status or ''} {produtos}"
+                resumo = (
+                    f"Pedidos de {nome}: {quantidade} pedido(s), R${float(total or 0):.2f}, "
+                    f"último em {ultimo}"
+                )
+                if produtos:
+                    resumo += f", produtos: {produtos[:80]}"
+                documentos['pedidos'][id_cliente] = (texto, resumo)
+        return documentos
+
+    def _adicionar(self, tipo, id_registro, texto, resumo):
+        termos = tokenizar(texto)
+        if self._livres:
+            posicao = self._livres.pop()
+            self._documentos[posicao] = (tipo, id_registro, texto, resumo)
+        else:
+            posicao = len(self._documentos)
+            self._documentos.append((tipo, id_registro, texto, resumo))
+            self._crescer_comprimentos(posicao + 1)
+        self._posicoes[(tipo, id_registro)] = posicao
+        self._comprimentos[posicao] = len(termos)
+        self._total_termos += len(termos)
+
+        frequencias = {}
+        for termo in termos:
+            frequencias[termo] = frequencias.get(termo, 0) + 1
+        for termo, frequencia in frequencias.items():
+            self._postagens.setdefault(termo, {})[posicao] = frequencia
+            self._arrays.pop(termo, None)
+
+    def _remover(self, chave):
+        posicao = self._posicoes.pop(chave)
+        texto = self._documentos[posicao][2]
+        for termo in set(tokenizar(texto)):
+            postagem = self._postagens.get(termo)
+            if postagem is not None:
+                postagem.pop(posicao, None)
+                if not postagem:
+                    del self._postagens[termo]
+            self._arrays.pop(termo, None)
+        self._total_termos -= int(self._comprimentos[posicao])
+        self._comprimentos[posicao] = 0
+        self._documentos[posicao] = None
+        self._livres.append(posicao)
+
+    def _crescer_comprimentos(self, tamanho):
+        if not NUMPY_DISPONIVEL:
+            self._comprimentos.extend([0] * (tamanho - len(self._comprimentos)))
+            return
+        if tamanho > len(self._comprimentos):
+            # Dobra a capacidade para não realocar a cada documento
+            novo = np.zeros(max(tamanho, 2 * len(self._comprimentos), 64), dtype=np.float64)
+            novo[:len(self._comprimentos)] = self._comprimentos
+            self._comprimentos = novo
+
+    # === BUSCA ===
+    def buscar(self, consulta, k=5, tipos=None):
+        """
+        Retorna até k RegistroEncontrado mais relevantes para a consulta,
+        em ordem decrescente de pontuação. tipos restringe os tipos aceitos.
+        """
+        self.sincronizar()
+        termos = set(tokenizar(consulta))
+        with self._lock:
+            total_documentos = len(self._posicoes)
+            if not termos or not total_documentos:
+                return []
+            media = self._total_termos / total_documentos or 1.0
+            if NUMPY_DISPONIVEL:
+                # Sem filtro de tipo, basta ordenar os k melhores
+                limite = k if tipos is None else None
+                pontuacoes = self._pontuar_numpy(termos, total_documentos, media, limite)
+            else:
+                pontuacoes = self._pontuar_python(termos, total_documentos, media)
+
+            resultado = []
+            for posicao, pontuacao in pontuacoes:
+                tipo, id_registro, _, resumo = self._documentos[posicao]
+                if tipos is None or tipo in tipos:
+                    resultado.append(RegistroEncontrado(tipo, id_registro, resumo, pontuacao))
+                    if len(resultado) == k:
+                        break
+            return resultado
+
+    @staticmethod
+    def _idf(total_documentos, frequencia_documentos):
+        return math.log(1 + (total_documentos - frequencia_documentos + 0.5) / (frequencia_documentos + 0.5))
+
+    def _pontuar_numpy(self, termos, total_documentos, media, limite=None):
+        pontuacoes = np.zeros(len(self._documentos), dtype=np.float64)
+        for termo in termos:
+            postagem = self._postagens.get(termo)
+            if not postagem:
+                continue
+            arrays = self._arrays.get(termo)
+            if arrays is None:
+                arrays = (
+                    np.fromiter(postagem.keys(), dtype=np.int64, count=len(postagem)),
+                    np.fromiter(postagem.values(), dtype=np.float64, count=len(postagem)),
+                )
+                self._arrays[termo] = arrays
+            posicoes, frequencias = arrays
+            normalizacao = BM25_K1 * (1 - BM25_B + BM25_B * self._comprimentos[posicoes] / media)
+            pontuacoes[posicoes] += (
+                self._idf(total_documentos, len(postagem))
+                * frequencias * (BM25_K1 + 1) / (frequencias + normalizacao)
+            )
+
+        candidatas = np.flatnonzero(pontuacoes)
+        if limite is not None and len(candidatas) > limite:
+            melhores = np.argpartition(-pontuacoes[candidatas], limite - 1)[:limite]
+            candidatas = np.sort(candidatas[melhores])
+        ordem = candidatas[np.argsort(-pontuacoes[candidatas], kind="stable")]
+        return [(int(posicao), float(pontuacoes[posicao])) for posicao in ordem]
+
+    def _pontuar_python(self, termos, total_documentos, media):
+        pontuacoes = {}
+        for termo in termos:
+            postagem = self._postagens.get(termo)
+            if not postagem:
+                continue
+            idf = self._idf(total_documentos, len(postagem))
+            for posicao, frequencia in postagem.items():
+                normalizacao = BM25_K1 * (1 - BM25_B + BM25_B * self._comprimentos[posicao] / media)
+                pontuacoes[posicao] = pontuacoes.get(posicao, 0.0) + (
+                    idf * frequencia * (BM25_K1 + 1) / (frequencia + normalizacao)
+                )
+        return sorted(pontuacoes.items(), key=lambda item: (-item[1], item[0]))
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'documentos': len(self._posicoes),
+                'termos': len(self._postagens),
+                'pendente': self._pendente,
+                'ultima_alteracao': self._ultima_alteracao,
+                'reindexados': self.reindexados,
+            }
+
+
+def _consultar_por_ids(conn, sql, coluna, ids):
+    """
+    Executa sql ({filtro} vira "WHERE coluna IN (...)") em lotes de ids e
+    junta as linhas. ids None executa uma vez, sem filtro.
+    """
+    if ids is None:
+        return conn.execute(sql.format(filtro="")).fetchall()
+    ids = sorted(ids)
+    linhas = []
+    for inicio in range(0, len(ids), IDS_POR_CONSULTA):
+        lote = ids[inicio:inicio + IDS_POR_CONSULTA]
+        filtro = f" WHERE {coluna} IN ({','.join('?' * len(lote))})"
+        linhas.extend(conn.execute(sql.format(filtro=filtro), lote))
+    return linhas
+
+
+# Instância global
+indice_busca = IndiceBusca()
+registrar_ouvinte_escrita(indice_busca.ao_escrever)
+
+
+# Funções de conveniência
+def buscar_registros(consulta, k=5, tipos=None):
+    return indice_busca.buscar(consulta, k, tipos)
@@ -0,0 +1,411 @@
+# indice_logs.py
+"""
+Índice de busca dos arquivos de log (SQLite FTS5).
+
+Os arquivos logs/*.log são lidos de forma incremental (LeitorIncrementalLog,
+com o offset de cada arquivo salvo no próprio índice); os já compactados
+(.log.gz) são lidos uma vez, a partir de onde o .log tinha parado. Cada linha no
+formato do SistemaLogs vira um registro com data/hora, nível, módulo e
+operação. A busca por texto usa FTS5 e pode ser filtrada por período, nível
+e módulo, cobrindo todos os dias e não só o arquivo de hoje.
+
+O índice fica em logs/indice_logs.db, separado do banco principal, para que
+a ingestão de logs não dispute o WAL com pedidos e relatórios. Usa conexões
+sqlite3 próprias (fora do pool do db), então gravar no índice não avisa os
+ouvintes de escrita nem invalida os caches do banco principal. Sem FTS5 no
+SQLite, a busca cai para LIKE na mesma tabela.
+
+A ingestão acompanha o gravador de logs: a cada lote gravado em disco, uma
+sincronização é agendada em segundo plano (no máximo uma a cada
+INTERVALO_INGESTAO segundos). buscar_logs() ainda sincroniza antes de buscar,
+para trazer as linhas do último intervalo.
+
+Uso:
+    indice_logs.sincronizar()
+    for registro in buscar_logs("timeout", dias=7, niveis=["ERROR"], modulo="AGENTE_IA"):
+        print(registro.momento, registro.nivel, registro.mensagem)
+"""
+import gzip
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from logs import LeitorIncrementalLog, listar_arquivos_log, registrar_ouvinte_lote
+
+
+PASTA_LOGS = 'logs'
+CAMINHO_INDICE_LOGS = os.path.join(PASTA_LOGS, 'indice_logs.db')
+# Registros mais antigos que isso saem do índice
+DIAS_RETENCAO_INDICE = 90
+# Linhas gravadas por transação durante a ingestão
+LOTE_INGESTAO = 2000
+# Posição salva de um arquivo que já foi compactado e lido até o fim
+ARQUIVO_CONCLUIDO = -1
+# Espera (s) entre um lote de logs gravado e a ingestão agendada por ele
+INTERVALO_INGESTAO = 5.0
+# Espera (s) pelo lock do arquivo do índice
+TIMEOUT_INDICE_LOGS = 5.0
+
+# '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+_LINHA_PADRAO = re.compile(
+    r"^(\d{4}-\d{2}-\d{2}) (\d{2}:\d{2}:\d{2}) - (\S+) - ([A-Z]+) - (.*)$"
+)
+# Formato antigo de utils.registrar_log: '[data hora] NIVEL - mensagem'
+_LINHA_ANTIGA = re.compile(r"^\[(\d{4}-\d{2}-\d{2}) (\d{2}:\d{2}:\d{2})\] (.*)$")
+_NIVEIS_ANTIGOS = {'ERRO': 'ERROR', 'INFO': 'INFO', 'CONFIRMAÇÃO': 'INFO'}
+_PREFIXO_MODULO = re.compile(r"^([A-Z][A-Z0-9_]+): ?(.*)$")
+
+_ESQUEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS arquivos_log (
+        caminho TEXT PRIMARY KEY,
+        posicao INTEGER NOT NULL,
+        assinatura BLOB
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS registros_log (
+        id INTEGER PRIMARY KEY,
+        momento TEXT NOT NULL,
+        nivel TEXT NOT NULL,
+        modulo TEXT NOT NULL,
+        operacao TEXT NOT NULL,
+        mensagem TEXT NOT NULL,
+        arquivo TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_registros_log_momento ON registros_log(momento)",
+    "CREATE INDEX IF NOT EXISTS idx_registros_log_nivel ON registros_log(nivel, momento)",
+    "CREATE INDEX IF NOT EXISTS idx_registros_log_modulo ON registros_log(modulo, momento)",
+]
+
+_ESQUEMA_FTS = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS registros_log_fts USING fts5(
+        mensagem, content='registros_log', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+
+@dataclass(frozen=True)
+class RegistroLog:
+    """Linha de log já interpretada."""
+    momento: str
+    nivel: str
+    modulo: str
+    operacao: str
+    mensagem: str
+    arquivo: str
+
+
+def _modulo_e_operacao(mensagem):
+    """Extrai (módulo, operação) das mensagens geradas pelo SistemaLogs."""
+    if mensagem.startswith("OPERACAO: "):
+        partes = mensagem[len("OPERACAO: "):].split(" - ", 2)
+        return partes[0].strip(), (partes[1].strip() if len(partes) > 1 else "")
+    if mensagem.startswith("USUÁRIO: "):
+        _, _, acao = mensagem.partition(" - AÇÃO: ")
+        return "ACESSO", acao.strip()
+    encontrado = _PREFIXO_MODULO.match(mensagem)
+    if encontrado:
+        prefixo, resto = encontrado.groups()
+        # AGENTE_IA_ERRO, AGENTE_IA_PERGUNTA... agrupam no módulo AGENTE_IA
+        modulo = "AGENTE_IA" if prefixo.startswith("AGENTE_IA") else prefixo
+        operacao = resto.split(" - ", 1)[0].strip() if modulo == prefixo else prefixo
+        return modulo, operacao[:120]
+    return "", ""
+
+
+def interpretar_linha(linha, anterior=None):
+    """
+    Converte uma linha do arquivo em (momento, nível, módulo, operação, mensagem).
+    Linhas de continuação (tracebacks, mensagens com várias linhas) herdam os
+    campos da linha anterior; sem anterior, retorna None.
+    """
+    encontrado = _LINHA_PADRAO.match(linha)
+    if encontrado:
+        dia, hora, _, nivel, mensagem = encontrado.groups()
+        return (f"{dia} {hora}", nivel, *_modulo_e_operacao(mensagem), mensagem)
+
+    encontrado = _LINHA_ANTIGA.match(linha)
+    if encontrado:
+        dia, hora, mensagem = encontrado.groups()
+        prefixo, _, resto = mensagem.partition(" - ")
+        nivel = _NIVEIS_ANTIGOS.get(prefixo)
+        if nivel is None:
+            nivel, resto = "INFO", mensagem
+        return (f"{dia} {hora}", nivel, *_modulo_e_operacao(resto), resto)
+
+    if anterior is None or not linha.strip():
+        return None
+    return (*anterior[:4], linha)
+
+
+def _termos_fts(texto):
+    """Consulta FTS5 com todos os termos (prefixo), escapando aspas."""
+    termos = re.findall(r"\w+", texto or "")
+    return " AND ".join(f'"{termo}"*' for termo in termos)
+
+
+class IndiceLogs:
+    """Ingestão incremental dos arquivos de log e busca indexada."""
+
+    def __init__(self, caminho=CAMINHO_INDICE_LOGS, pasta=PASTA_LOGS):
+        self.caminho = caminho
+        self.pasta = pasta
+        self.fts_disponivel = None
+        self._lock = threading.Lock()
+        self._leitores = {}
+        self._ultimas = {}
+        self._limpeza_feita = False
+        self._lock_agenda = threading.Lock()
+        self._agendada = False
+        self.indexados = 0
+
+    # === ESQUEMA ===
+    def _conectar(self):
+        os.makedirs(os.path.dirname(self.caminho) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.caminho, timeout=TIMEOUT_INDICE_LOGS)
+        conn.execute("PRAGMA synchronous = NORMAL")
+        if self.fts_disponivel is None:
+            conn.execute("PRAGMA journal_mode = WAL")
+            for comando in _ESQUEMA:
+                conn.execute(comando)
+            try:
+                conn.execute(_ESQUEMA_FTS)
+                self.fts_disponivel = True
+            except sqlite3.OperationalError:
+                # SQLite compilado sem FTS5: busca por LIKE
+                self.fts_disponivel = False
+            conn.commit()
+        return conn
+
+    # === INGESTÃO ===
+    def sincronizar(self):
+        """Indexa as linhas novas de todos os arquivos de log. Retorna quantas entraram."""
+        # Uma ingestão por vez: os leitores guardam o offset de cada arquivo
+        with self._lock:
+            conn = self._conectar()
+            try:
+                if not self._limpeza_feita:
+                    self._remover_antigos(conn)
+                    self._limpeza_feita = True
+                novos = 0
+                for arquivo in listar_arquivos_log(self.pasta, 'log'):
+                    if arquivo.endswith('.gz'):
+                        novos += self._ingerir_compactado(conn, arquivo)
+                    else:
+                        novos += self._ingerir_arquivo(conn, arquivo)
+                self.indexados += novos
+                return novos
+            finally:
+                conn.close()
+
+    def agendar_sincronizacao(self, *_):
+        """
+        Ouvinte de lote do gravador de logs: agenda sincronizar() para daqui a
+        INTERVALO_INGESTAO segundos, se ainda não houver uma agendada.
+        """
+        with self._lock_agenda:
+            if self._agendada:
+                return
+            self._agendada = True
+        temporizador = threading.Timer(INTERVALO_INGESTAO, self._sincronizar_agendada)
+        temporizador.daemon = True
+        temporizador.start()
+
+    def _sincronizar_agendada(self):
+        with self._lock_agenda:
+            self._agendada = False
+        try:
+            self.sincronizar()
+        except Exception:
+            # Sem log aqui: o erro viraria um lote novo e outra tentativa
+            pass
+
+    def _leitor(self, conn, arquivo):
+        leitor = self._leitores.get(arquivo)
+        if leitor is None:
+            leitor = LeitorIncrementalLog(arquivo, bytes_iniciais=None)
+            salvo = conn.execute(
+                "SELECT posicao, assinatura FROM arquivos_log WHERE caminho = ?", (arquivo,)
+            ).fetchone()
+            if salvo:
+                leitor.restaurar(salvo[0], salvo[1])
+            self._leitores[arquivo] = leitor
+        return leitor
+
+    def _ingerir_arquivo(self, conn, arquivo):
+        leitor = self._leitor(conn, arquivo)
+        linhas, _, _ = leitor.ler()
+        if not linhas:
+            return 0
+        quantidade = self._gravar_linhas(conn, arquivo, linhas)
+        posicao, assinatura = leitor.estado()
+        self._salvar_posicao(conn, arquivo, posicao, assinatura)
+        return quantidade
+
+    def _ingerir_compactado(self, conn, arquivo):
+        """Lê o restante de um .log.gz (a partir do offset salvo do .log original)."""
+        original = arquivo[:-len('.gz')]
+        if os.path.exists(original):
+            # Compactação em andamento: o .log ainda é a fonte
+            return 0
+        salvo = conn.execute(
+            "SELECT posicao FROM arquivos_log WHERE caminho = ?", (original,)
+        ).fetchone()
+        posicao = salvo[0] if salvo else 0
+        if posicao == ARQUIVO_CONCLUIDO:
+            return 0
+
+        self._leitores.pop(original, None)
+        try:
+            with gzip.open(arquivo, 'rb') as f:
+                f.seek(posicao)
+                dados = f.read()
+        except (OSError, EOFError):
+            return 0
+        linhas = [
+            linha.decode('utf-8', errors='replace').rstrip("\r")
+            for linha in dados.split(b"\n") if linha
+        ]
+        quantidade = self._gravar_linhas(conn, original, linhas)
+        self._salvar_posicao(conn, original, ARQUIVO_CONCLUIDO, None)
+        return quantidade
+
+    def _salvar_posicao(self, conn, arquivo, posicao, assinatura):
+        conn.execute(
+            "INSERT OR REPLACE INTO arquivos_log (caminho, posicao, assinatura) VALUES (?, ?, ?)",
+            (arquivo, posicao, assinatura)
+        )
+        conn.commit()
+
+    def _gravar_linhas(self, conn, arquivo, linhas):
+        nome = os.path.basename(arquivo)
+        anterior = self._ultimas.get(arquivo)
+        registros = []
+        for linha in linhas:
+            campos = interpretar_linha(linha, anterior)
+            if campos is None:
+                continue
+            anterior = campos
+            registros.append((*campos, nome))
+        self._ultimas[arquivo] = anterior
+
+        for inicio in range(0, len(registros), LOTE_INGESTAO):
+            self._inserir(conn, registros[inicio:inicio + LOTE_INGESTAO])
+        return len(registros)
+
+    def _inserir(self, conn, registros):
+        cursor = conn.execute("SELECT COALESCE(MAX(id), 0) FROM registros_log")
+        proximo = cursor.fetchone()[0] + 1
+        com_id = [(proximo + i, *registro) for i, registro in enumerate(registros)]
+        conn.executemany(
+            "INSERT INTO registros_log (id, momento, nivel, modulo, operacao, mensagem, arquivo) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            com_id
+        )
+        if self.fts_disponivel:
+            conn.executemany(
+                "INSERT INTO registros_log_fts (rowid, mensagem) VALUES (?, ?)",
+                [(registro[0], registro[5]) for registro in com_id]
+            )
+
+    def _remover_antigos(self, conn):
+        limite = (datetime.now() - timedelta(days=DIAS_RETENCAO_INDICE)).strftime('%Y-%m-%d')
+        if self.fts_disponivel:
+            # Tabela de conteúdo externo: o FTS precisa do texto antigo para remover
+            conn.execute("""
+                INSERT INTO registros_log_fts (registros_log_fts, rowid, mensagem)
+                SELECT 'delete', id, mensagem FROM registros_log WHERE momento < ?
+            """, (limite,))
+        conn.execute("DELETE FROM registros_log WHERE momento < ?", (limite,))
+        conn.commit()
+
+    # === BUSCA ===
+    def buscar(self, texto="", dias=None, niveis=None, modulo=None, limite=500):
+        """
+        Registros mais recentes que casam com todos os termos de 'texto'.
+        dias: só os últimos N dias (1 = hoje); niveis: lista como ['ERROR'];
+        modulo: 'AGENTE_IA', 'LOGS_VIEW'...
+        """
+        condicoes, parametros = [], []
+        if dias:
+            inicio = (datetime.now() - timedelta(days=dias - 1)).strftime('%Y-%m-%d')
+            condicoes.append("r.momento >= ?")
+            parametros.append(inicio)
+        if niveis:
+            condicoes.append(f"r.nivel IN ({','.join('?' * len(niveis))})")
+            parametros.extend(niveis)
+        if modulo:
+            condicoes.append("r.modulo = ?")
+            parametros.append(modulo)
+
+        consulta_fts = _termos_fts(texto)
+        origem = "registros_log r"
+        if consulta_fts and self.fts_disponivel:
+            origem = "registros_log_fts f JOIN registros_log r ON r.id = f.rowid"
+            condicoes.append("registros_log_fts MATCH ?")
+            parametros.append(consulta_fts)
+        elif texto.strip():
+            condicoes.append("r.mensagem LIKE ?")
+            parametros.append(f"%{texto.strip()}%")
+
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        conn = self._conectar()
+        try:
+            linhas = conn.execute(f"""
+                SELECT r.momento, r.nivel, r.modulo, r.operacao, r.mensagem, r.arquivo
+                FROM {origem}
+                {where}
+                ORDER BY r.momento DESC, r.id DESC
+                LIMIT ?
+            """, (*parametros, limite)).fetchall()
+        finally:
+            conn.close()
+        return [RegistroLog(*linha) for linha in linhas]
+
+    def modulos(self):
+        """Módulos presentes no índice (para filtros)."""
+        conn = self._conectar()
+        try:
+            return [linha[0] for linha in conn.execute(
+                "SELECT DISTINCT modulo FROM registros_log WHERE modulo != '' ORDER BY modulo"
+            )]
+        finally:
+            conn.close()
+
+    def estatisticas(self):
+        conn = self._conectar()
+        try:
+            total, primeiro, ultimo = conn.execute(
+                "SELECT COUNT(*), MIN(momento), MAX(momento) FROM registros_log"
+            ).fetchone()
+        finally:
+            conn.close()
+        return {
+            'registros': total,
+            'primeiro': primeiro,
+            'ultimo': ultimo,
+            'fts5': self.fts_disponivel,
+            'indexados_nesta_sessao': self.indexados,
+        }
+
+
+# Instância global, alimentada pelos lotes do gravador de logs
+indice_logs = IndiceLogs()
+registrar_ouvinte_lote(indice_logs.agendar_sincronizacao)
+
+
+# Funções de conveniência
+def sincronizar_logs():
+    return indice_logs.sincronizar()
+
+
+def buscar_logs(texto="", dias=None, niveis=None, modulo=None, limite=500):
+    """Indexa o que houver de novo e busca."""
+    indice_logs.sincronizar()
+    return indice_logs.buscar(texto, dias, niveis, modulo, limite)
@@ -0,0 +1,266 @@
+# instrumentacao.py
+"""
+Métricas de desempenho em memória: contadores, tempos (histogramas com
+p50/p95/p99) e spans aninhados, para ver onde o tempo vai no banco, nas
+telas, nos relatórios e na IA.
+
+Cada span mede um trecho e grava a duração no histograma de mesmo nome;
+spans abertos dentro de outro (na mesma thread) viram filhos dele, e as
+árvores completas mais recentes ficam guardadas para inspeção.
+
+Uso:
+    with span("relatorio.pdf", tipo="vendas"):
+        ...                                  # consultas dentro viram filhos
+
+    @cronometrado("view.clientes.carregar")
+    def carregar(): ...
+
+    registrar_tempo("ia.stream.primeiro_fragmento", ms)
+    incrementar("ia.cache.acertos")
+    resumo_metricas()                        # usado pelo painel de Performance
+    exportar_metricas()                      # JSON para análise offline
+
+INSTRUMENTACAO=0 desativa a coleta (span e cronometrado passam a não fazer nada).
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+ATIVAR_INSTRUMENTACAO = os.environ.get("INSTRUMENTACAO", "1") != "0"
+
+# Amostras guardadas por histograma (as mais recentes); contagem, soma e
+# máximo continuam valendo para todas
+AMOSTRAS_POR_METRICA = 1024
+# Árvores de spans completas guardadas para o dump
+RASTROS_GUARDADOS = 100
+# Filhos guardados por span (um relatório pode fazer milhares de consultas)
+MAX_FILHOS_POR_SPAN = 200
+
+
+def _percentil(ordenados, percentual):
+    """Percentil por posição mais próxima de uma lista já ordenada."""
+    if not ordenados:
+        return 0.0
+    indice = max(0, min(len(ordenados) - 1, round(percentual / 100 * len(ordenados) + 0.5) - 1))
+    return ordenados[indice]
+
+
+class Histograma:
+    """Tempos (ms) de uma métrica: totais e as amostras mais recentes."""
+
+    def __init__(self, amostras=AMOSTRAS_POR_METRICA):
+        self.amostras = deque(maxlen=amostras)
+        self.contagem = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, valor):
+        self.amostras.append(valor)
+        self.contagem += 1
+        self.soma += valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def copia(self):
+        copia = Histograma(self.amostras.maxlen)
+        copia.amostras.extend(self.amostras)
+        copia.contagem, copia.soma, copia.maximo = self.contagem, self.soma, self.maximo
+        return copia
+
+    def resumo(self):
+        ordenados = sorted(self.amostras)
+        return {
+            'contagem': self.contagem,
+            'media_ms': round(self.soma / self.contagem, 3) if self.contagem else 0.0,
+            'p50_ms': round(_percentil(ordenados, 50), 3),
+            'p95_ms': round(_percentil(ordenados, 95), 3),
+            'p99_ms': round(_percentil(ordenados, 99), 3),
+            'max_ms': round(self.maximo, 3),
+            'total_ms': round(self.soma, 3),
+        }
+
+
+class Span:
+    """Trecho medido; filhos são os spans abertos dentro dele na mesma thread."""
+
+    __slots__ = ('nome', 'atributos', 'inicio', 'duracao_ms', 'filhos', 'omitidos', 'erro', '_registro', '_t0')
+
+    def __init__(self, registro, nome, atributos):
+        self._registro = registro
+        self.nome = nome
+        self.atributos = atributos
+        self.inicio = None
+        self.duracao_ms = None
+        self.filhos = []
+        self.omitidos = 0
+        self.erro = None
+
+    def __enter__(self):
+        self.inicio = time.time()
+        self._t0 = time.perf_counter()
+        self._registro._abrir(self)
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        self.duracao_ms = (time.perf_counter() - self._t0) * 1000
+        if tipo is not None:
+            self.erro = tipo.__name__
+        self._registro._fechar(self)
+        return False
+
+    def como_dict(self):
+        dados = {
+            'nome': self.nome,
+            'inicio': datetime.fromtimestamp(self.inicio).isoformat(timespec='milliseconds'),
+            'duracao_ms': round(self.duracao_ms, 3),
+        }
+        if self.atributos:
+            dados['atributos'] = self.atributos
+        if self.erro:
+            dados['erro'] = self.erro
+        if self.filhos:
+            dados['filhos'] = [filho.como_dict() for filho in self.filhos]
+        if self.omitidos:
+            dados['filhos_omitidos'] = self.omitidos
+        return dados
+
+
+class RegistroMetricas:
+    """Contadores, histogramas e rastros do processo (seguro entre threads)."""
+
+    def __init__(self, ativo=ATIVAR_INSTRUMENTACAO):
+        self.ativo = ativo
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._contadores = {}
+        self._histogramas = {}
+        self._rastros = deque(maxlen=RASTROS_GUARDADOS)
+        self._desde = time.time()
+
+    # === COLETA ===
+    def incrementar(self, nome, valor=1):
+        if not self.ativo:
+            return
+        with self._lock:
+            self._contadores[nome] = self._contadores.get(nome, 0) + valor
+
+    def registrar_tempo(self, nome, duracao_ms):
+        if not self.ativo:
+            return
+        with self._lock:
+            histograma = self._histogramas.get(nome)
+            if histograma is None:
+                histograma = self._histogramas[nome] = Histograma()
+            histograma.registrar(duracao_ms)
+
+    def span(self, nome, **atributos):
+        """Context manager que mede o trecho (aninhável)."""
+        if not self.ativo:
+            return contextlib.nullcontext()
+        return Span(self, nome, atributos)
+
+    def cronometrado(self, nome):
+        """Decorador: cada chamada da função vira um span com esse nome."""
+        def decorador(funcao):
+            @functools.wraps(funcao)
+            def envolvida(*args, **kwargs):
+                with self.span(nome):
+                    return funcao(*args, **kwargs)
+            return envolvida
+        return decorador
+
+    def _pilha(self):
+        pilha = getattr(self._local, 'pilha', None)
+        if pilha is None:
+            pilha = self._local.pilha = []
+        return pilha
+
+    def _abrir(self, span):
+        pilha = self._pilha()
+        if pilha:
+            pai = pilha[-1]
+            if len(pai.filhos) < MAX_FILHOS_POR_SPAN:
+                pai.filhos.append(span)
+            else:
+                pai.omitidos += 1
+        pilha.append(span)
+
+    def _fechar(self, span):
+        pilha = self._pilha()
+        # Tolerante a spans fechados fora de ordem (ou em outra thread)
+        if span in pilha:
+            while pilha.pop() is not span:
+                pass
+        self.registrar_tempo(span.nome, span.duracao_ms)
+        if span.erro:
+            self.incrementar(f"{span.nome}.erros")
+        if not pilha:
+            with self._lock:
+                self._rastros.append(span)
+
+    # === CONSULTA ===
+    def resumo(self):
+        """Contadores e p50/p95/p99 de cada métrica, ordenadas pelo tempo total."""
+        with self._lock:
+            contadores = dict(self._contadores)
+            copias = {nome: h.copia() for nome, h in self._histogramas.items()}
+        # Ordenar as amostras fica fora do lock
+        histogramas = {nome: h.resumo() for nome, h in copias.items()}
+        return {
+            'desde': datetime.fromtimestamp(self._desde).isoformat(timespec='seconds'),
+            'contadores': dict(sorted(contadores.items())),
+            'tempos': dict(sorted(histogramas.items(), key=lambda item: -item[1]['total_ms'])),
+        }
+
+    def rastros(self):
+        """Árvores de spans mais recentes, da mais antiga para a mais nova."""
+        with self._lock:
+            rastros = list(self._rastros)
+        return [span.como_dict() for span in rastros]
+
+    def exportar(self, caminho=None):
+        """Grava resumo + rastros em JSON e retorna o caminho do arquivo."""
+        if caminho is None:
+            os.makedirs('logs', exist_ok=True)
+            caminho = os.path.join('logs', f"desempenho_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        dados = self.resumo()
+        dados['gerado_em'] = datetime.now().isoformat(timespec='seconds')
+        dados['rastros'] = self.rastros()
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2, default=str)
+        return caminho
+
+    def limpar(self):
+        with self._lock:
+            self._contadores.clear()
+            self._histogramas.clear()
+            self._rastros.clear()
+            self._desde = time.time()
+
+
+# Instância global usada pelo sistema todo
+metricas = RegistroMetricas()
+
+
+def span(nome, **atributos):
+    return metricas.span(nome, **atributos)
+
+def cronometrado(nome):
+    return metricas.cronometrado(nome)
+
+def registrar_tempo(nome, duracao_ms):
+    metricas.registrar_tempo(nome, duracao_ms)
+
+def incrementar(nome, valor=1):
+    metricas.incrementar(nome, valor)
+
+def resumo_metricas():
+    return metricas.resumo()
+
+def exportar_metricas(caminho=None):
+    return metricas.exportar(caminho)
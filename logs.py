@@ -1,7 +1,17 @@
 # logs.py
+import atexit
+import gzip
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import random
+import re
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
 from typing import Any, Callable, Optional
 
 # Imports opcionais de UI para instrumentação automática (não obrigatórios)
@@ -17,19 +27,615 @@ try:  # customtkinter é opcional
 except Exception:  # pragma: no cover
     ctk = None
 
-class SafeStreamHandler(logging.StreamHandler):
+# Widgets (tk, ttk, ctk) cujo 'command' a instrumentação de UI envolve
+_CLASSES_COM_COMMAND = frozenset({
+    "Button", "Checkbutton", "Radiobutton", "Scale", "Spinbox",
+    "CTkButton", "CTkCheckBox", "CTkSwitch", "CTkRadioButton", "CTkSegmentedButton",
+    "CTkOptionMenu", "CTkComboBox", "CTkSlider",
+})
+
+# Sink estruturado (JSON lines) ao lado do .log; LOGS_JSONL=0 desativa
+GRAVAR_JSONL = os.environ.get("LOGS_JSONL", "1") != "0"
+
+# Rotação: troca de arquivo à meia-noite e ao passar deste tamanho
+TAMANHO_MAXIMO_ARQUIVO_LOG = 10 * 1024 * 1024
+# Arquivos (compactados ou não) mais antigos que isso são apagados
+DIAS_RETENCAO_LOGS = 30
+
+# <aplicação>_<AAAA-MM-DD>[.<parte>].<log|jsonl>[.gz]
+_NOME_ARQUIVO_LOG = re.compile(
+    r"^(?P<prefixo>.+)_(?P<data>\d{4}-\d{2}-\d{2})(?:\.(?P<parte>\d+))?\.(?P<extensao>log|jsonl)(?P<gz>\.gz)?$"
+)
+
+# Contadores por dia, nível e módulo (ver MetricasLogs), gravados a cada tantos segundos
+ARQUIVO_METRICAS_LOGS = 'metricas_logs.json'
+INTERVALO_GRAVACAO_METRICAS = 5.0
+
+# Registros aguardando gravação; acima disso a fila descarta (ver FilaLogsHandler)
+TAMANHO_FILA_LOGS = 10000
+# Máximo de registros gravados entre dois flushes do disco
+LOTE_MAXIMO_LOGS = 500
+
+
+class GravacaoEmLote:
+    """
+    Mixin para handlers de stream: enquanto 'em_lote' estiver ativo o flush
+    de cada registro é adiado, e descarregar() grava o lote de uma vez.
+    """
+    em_lote = False
+
+    def flush(self):
+        if not self.em_lote:
+            super().flush()
+
+    def descarregar(self):
+        super().flush()
+
+
+class SafeStreamHandler(GravacaoEmLote, logging.StreamHandler):
     """StreamHandler que ignora erros de flush (OSError errno 22)."""
+    def descarregar(self):
+        try:
+            super().descarregar()
+        except (OSError, ValueError):
+            # Ignora erros de flush em streams inválidos
+            pass
+
     def flush(self):
         try:
             super().flush()
         except (OSError, ValueError):
-            # Ignora erros de flush em streams inválidos
             pass
 
+
+def abrir_log(caminho):
+    """Abre um arquivo de log para leitura de texto, compactado (.gz) ou não."""
+    if caminho.endswith('.gz'):
+        return gzip.open(caminho, 'rt', encoding='utf-8', errors='replace')
+    return open(caminho, 'r', encoding='utf-8', errors='replace')
+
+
+def listar_arquivos_log(pasta='logs', extensao='log', dias=None):
+    """
+    Arquivos de log da pasta com a extensão pedida ('log' ou 'jsonl'),
+    compactados ou não, em ordem cronológica (data e parte).
+    dias=N: só os últimos N dias (1 = hoje).
+    """
+    if not os.path.isdir(pasta):
+        return []
+    limite = (datetime.now() - timedelta(days=dias - 1)).strftime('%Y-%m-%d') if dias else None
+    encontrados = []
+    for nome in os.listdir(pasta):
+        partes = _NOME_ARQUIVO_LOG.match(nome)
+        if not partes or partes.group('extensao') != extensao:
+            continue
+        if limite and partes.group('data') < limite:
+            continue
+        encontrados.append(((partes.group('data'), int(partes.group('parte') or 1)), os.path.join(pasta, nome)))
+    return [caminho for _, caminho in sorted(encontrados)]
+
+
+class ArquivoLogsHandler(GravacaoEmLote, logging.FileHandler):
+    """
+    FileHandler com flush por lote e rotação: passa para o arquivo do dia
+    seguinte à meia-noite (mesmo com o app aberto) e abre uma nova parte
+    (<data>.2.log, <data>.3.log...) ao passar de tamanho_maximo. Os arquivos
+    nunca são renomeados, então leitores que acompanham o arquivo atual não
+    se perdem. ao_fechar(caminho) é chamado com cada arquivo que deixou de
+    ser usado.
+    """
+
+    def __init__(self, pasta, prefixo, extensao, tamanho_maximo=TAMANHO_MAXIMO_ARQUIVO_LOG,
+                 ao_fechar=None, encoding='utf-8'):
+        self.pasta = pasta
+        self.prefixo = prefixo
+        self.extensao = extensao
+        self.tamanho_maximo = tamanho_maximo
+        self.ao_fechar = ao_fechar
+        self._data = datetime.now().strftime('%Y-%m-%d')
+        self._parte = self._ultima_parte(self._data)
+        self.caminho = self._montar_caminho()
+        super().__init__(self.caminho, encoding=encoding)
+        self._tamanho = os.path.getsize(self.caminho)
+        self._proxima_meia_noite = self._calcular_meia_noite()
+
+    def _montar_caminho(self):
+        parte = f".{self._parte}" if self._parte > 1 else ""
+        return os.path.join(self.pasta, f"{self.prefixo}_{self._data}{parte}.{self.extensao}")
+
+    def _ultima_parte(self, data):
+        """Continua na última parte do dia; se ela já foi compactada, começa a próxima."""
+        ultima, compactada = 1, False
+        for caminho in listar_arquivos_log(self.pasta, self.extensao):
+            partes = _NOME_ARQUIVO_LOG.match(os.path.basename(caminho))
+            if partes.group('prefixo') == self.prefixo and partes.group('data') == data:
+                numero = int(partes.group('parte') or 1)
+                if numero >= ultima:
+                    ultima, compactada = numero, bool(partes.group('gz'))
+        return ultima + 1 if compactada else ultima
+
+    def _calcular_meia_noite(self):
+        amanha = datetime.strptime(self._data, '%Y-%m-%d') + timedelta(days=1)
+        return amanha.timestamp()
+
+    def emit(self, record):
+        try:
+            if record.created >= self._proxima_meia_noite or (
+                self.tamanho_maximo and self._tamanho >= self.tamanho_maximo
+            ):
+                self._rotacionar(record.created)
+            mensagem = self.format(record)
+            self.stream.write(mensagem + self.terminator)
+            # Em caracteres: aproximação suficiente do tamanho em bytes
+            self._tamanho += len(mensagem) + 1
+            self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+    def _rotacionar(self, momento):
+        fechado = self.caminho
+        data = datetime.fromtimestamp(momento).strftime('%Y-%m-%d')
+        if data != self._data:
+            self._data = data
+            self._parte = self._ultima_parte(data)
+            self._proxima_meia_noite = self._calcular_meia_noite()
+        else:
+            self._parte += 1
+        self.caminho = self._montar_caminho()
+        self.acquire()
+        try:
+            if self.stream:
+                self.stream.flush()
+                self.stream.close()
+            self.baseFilename = os.path.abspath(self.caminho)
+            self.stream = self._open()
+        finally:
+            self.release()
+        self._tamanho = os.path.getsize(self.caminho)
+        if self.ao_fechar is not None and fechado != self.caminho:
+            self.ao_fechar(fechado)
+
+
+class CompactadorLogs:
+    """
+    Compacta (gzip) em segundo plano os arquivos de log que não estão mais
+    em uso e apaga os que passaram da retenção. Uma execução por vez; pedidos
+    durante uma execução geram uma nova passada ao final.
+    """
+
+    def __init__(self, pasta='logs', dias_retencao=DIAS_RETENCAO_LOGS, arquivos_em_uso=None):
+        self.pasta = pasta
+        self.dias_retencao = dias_retencao
+        self.arquivos_em_uso = arquivos_em_uso or (lambda: ())
+        self._lock = threading.Lock()
+        self._thread = None
+        self._repetir = False
+        self.compactados = 0
+        self.removidos = 0
+        # Arquivos na pasta por extensão, contados na última passada
+        self.arquivos = {}
+
+    def agendar(self, *_):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._repetir = True
+                return
+            self._thread = threading.Thread(target=self._executar, name="compactador_logs", daemon=True)
+            self._thread.start()
+
+    def _executar(self):
+        while True:
+            try:
+                self.executar_agora()
+            except Exception as e:
+                print(f"Erro na manutenção dos logs: {e}")
+            with self._lock:
+                if not self._repetir:
+                    return
+                self._repetir = False
+
+    @staticmethod
+    def _posicao(partes):
+        """(data, parte) do arquivo: a rotação só avança nessa ordem."""
+        return partes.group('data'), int(partes.group('parte') or 1)
+
+    def executar_agora(self):
+        """Uma passada de retenção + compactação (na thread de quem chamar)."""
+        self._recuperar_temporarios()
+        # Só mexe em arquivos anteriores ao atual da mesma série (prefixo + extensão).
+        # Como a rotação só avança, a lista pode estar defasada sem risco de pegar
+        # um arquivo recém-aberto.
+        atuais = {}
+        for caminho in self.arquivos_em_uso():
+            partes = _NOME_ARQUIVO_LOG.match(os.path.basename(caminho))
+            if partes:
+                atuais[(partes.group('prefixo'), partes.group('extensao'))] = self._posicao(partes)
+        limite = (datetime.now() - timedelta(days=self.dias_retencao)).strftime('%Y-%m-%d')
+        for extensao in ('log', 'jsonl'):
+            arquivos = listar_arquivos_log(self.pasta, extensao)
+            restantes = len(arquivos)
+            for caminho in arquivos:
+                partes = _NOME_ARQUIVO_LOG.match(os.path.basename(caminho))
+                atual = atuais.get((partes.group('prefixo'), extensao))
+                if atual is not None and self._posicao(partes) >= atual:
+                    continue
+                if partes.group('data') < limite:
+                    restantes -= self._remover(caminho)
+                elif not partes.group('gz'):
+                    self._compactar(caminho)
+            self.arquivos[extensao] = restantes
+
+    def _remover(self, caminho):
+        try:
+            os.remove(caminho)
+        except OSError:
+            return False
+        self.removidos += 1
+        return True
+
+    def _recuperar_temporarios(self):
+        """
+        Trata .gz.tmp deixados por uma passada interrompida: sem o original,
+        o temporário é a única cópia (completa) e vira o .gz; com o original,
+        é descartado e a compactação é refeita.
+        """
+        if not os.path.isdir(self.pasta):
+            return
+        for nome in os.listdir(self.pasta):
+            if not nome.endswith('.gz.tmp'):
+                continue
+            temporario = os.path.join(self.pasta, nome)
+            original = temporario[:-len('.gz.tmp')]
+            try:
+                if os.path.exists(original):
+                    os.remove(temporario)
+                else:
+                    os.replace(temporario, original + '.gz')
+            except OSError:
+                pass
+
+    def _compactar(self, caminho):
+        compactado = caminho + '.gz'
+        if not os.path.exists(compactado):
+            temporario = compactado + '.tmp'
+            try:
+                with open(caminho, 'rb') as origem, gzip.open(temporario, 'wb') as destino:
+                    shutil.copyfileobj(origem, destino)
+                # O .gz completo existe antes de o original sair: nunca fica só o .tmp
+                os.replace(temporario, compactado)
+            except OSError:
+                try:
+                    os.remove(temporario)
+                except OSError:
+                    pass
+                return
+            self.compactados += 1
+        try:
+            os.remove(caminho)
+        except OSError:
+            # Ainda aberto por outro processo (Windows): sai na próxima passada
+            pass
+
+
+class MetricasLogs(logging.Handler):
+    """
+    Handler que não grava registros: só conta, por dia, quantos foram
+    emitidos em cada nível e módulo. O dashboard lê esses contadores em vez
+    de varrer os arquivos. O estado vai para ARQUIVO_METRICAS_LOGS no fim de
+    um lote do gravador (no máximo a cada INTERVALO_GRAVACAO_METRICAS) e ao
+    encerrar, e é retomado na próxima execução.
+    """
+    em_lote = False
+
+    def __init__(self, pasta='logs', dias_retencao=DIAS_RETENCAO_LOGS):
+        super().__init__()
+        self.caminho = os.path.join(pasta, ARQUIVO_METRICAS_LOGS)
+        self.dias_retencao = dias_retencao
+        self._dias = self._carregar()
+        self._alterado = False
+        self._ultima_gravacao = time.monotonic()
+
+    def _carregar(self):
+        try:
+            with open(self.caminho, encoding='utf-8') as f:
+                dias = json.load(f)['dias']
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+        return dias if isinstance(dias, dict) else {}
+
+    def emit(self, record):
+        data = datetime.fromtimestamp(record.created).strftime('%Y-%m-%d')
+        dia = self._dias.get(data)
+        if dia is None:
+            dia = self._dias[data] = {'registros': 0, 'niveis': {}, 'modulos': {}}
+            limite = (datetime.now() - timedelta(days=self.dias_retencao)).strftime('%Y-%m-%d')
+            for antigo in [d for d in self._dias if d < limite]:
+                del self._dias[antigo]
+        campos = getattr(record, 'campos', None) or {}
+        modulo = campos.get('modulo') or 'GERAL'
+        dia['registros'] += 1
+        dia['niveis'][record.levelname] = dia['niveis'].get(record.levelname, 0) + 1
+        dia['modulos'][modulo] = dia['modulos'].get(modulo, 0) + 1
+        self._alterado = True
+
+    def descarregar(self, forcar=False):
+        """Grava os contadores se mudaram e já passou o intervalo (ou se forcar)."""
+        with self.lock:
+            if not self._alterado:
+                return
+            if not forcar and time.monotonic() - self._ultima_gravacao < INTERVALO_GRAVACAO_METRICAS:
+                return
+            conteudo = json.dumps({'dias': self._dias}, ensure_ascii=False)
+            self._alterado = False
+            self._ultima_gravacao = time.monotonic()
+        temporario = self.caminho + '.tmp'
+        try:
+            with open(temporario, 'w', encoding='utf-8') as f:
+                f.write(conteudo)
+            os.replace(temporario, self.caminho)
+        except OSError:
+            # Tenta de novo no próximo lote
+            self._alterado = True
+
+    def do_dia(self, data=None):
+        """Contadores de um dia (hoje por padrão): registros, niveis e modulos."""
+        data = data or datetime.now().strftime('%Y-%m-%d')
+        with self.lock:
+            dia = self._dias.get(data)
+            if dia is None:
+                return {'registros': 0, 'niveis': {}, 'modulos': {}}
+            return {'registros': dia['registros'], 'niveis': dict(dia['niveis']), 'modulos': dict(dia['modulos'])}
+
+    def close(self):
+        self.descarregar(forcar=True)
+        super().close()
+
+
+class FormatadorJsonl(logging.Formatter):
+    """
+    Uma linha JSON por registro: momento, nível e mensagem, mais os campos
+    tipados passados em extra={'campos': {...}} (modulo, operacao,
+    duracao_ms, tokens, modelo, linhas...).
+    """
+
+    def format(self, record):
+        dados = {
+            'momento': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'mensagem': record.getMessage(),
+        }
+        campos = getattr(record, 'campos', None)
+        if campos:
+            dados.update(campos)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class FilaLogsHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que nunca bloqueia quem loga (a thread do Tk).
+
+    Com a fila cheia, registros INFO/DEBUG novos são descartados; avisos e
+    erros tiram o registro mais antigo da fila para entrar no lugar.
+    """
+
+    def __init__(self, fila):
+        super().__init__(fila)
+        self.descartados = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= logging.WARNING:
+            try:
+                self.queue.get_nowait()
+                self.queue.task_done()
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                pass
+        # Um registro se perdeu: o novo ou o mais antigo que saiu para ele
+        self.descartados += 1
+
+
+class GravadorLogs(logging.handlers.QueueListener):
+    """
+    Thread de fundo que tira os registros da fila e grava em lotes: um único
+    flush por lote em vez de um por linha. Avisa no próprio log quando a
+    fila precisou descartar registros.
+    """
+
+    def __init__(self, fila, handler_fila, *handlers, ouvintes_lote=None):
+        super().__init__(fila, *handlers, respect_handler_level=True)
+        self.handler_fila = handler_fila
+        # Chamados com os registros gravados em cada lote, depois do flush em disco
+        self.ouvintes_lote = ouvintes_lote if ouvintes_lote is not None else []
+        self.gravados = 0
+        self._descartados_avisados = 0
+
+    def _monitor(self):
+        fila = self.queue
+        encerrar = False
+        for handler in self.handlers:
+            handler.em_lote = True
+        try:
+            while not encerrar:
+                lote = [self.dequeue(True)]
+                gravados_antes = self.gravados
+                while len(lote) < LOTE_MAXIMO_LOGS:
+                    try:
+                        lote.append(self.dequeue(False))
+                    except queue.Empty:
+                        break
+                for record in lote:
+                    if record is self._sentinel:
+                        encerrar = True
+                    else:
+                        self._gravar(record)
+                    fila.task_done()
+                self._avisar_descartados()
+                self._descarregar()
+                if self.gravados != gravados_antes:
+                    self._avisar_ouvintes(self.gravados - gravados_antes)
+        finally:
+            for handler in self.handlers:
+                handler.em_lote = False
+
+    def enqueue_sentinel(self):
+        # Ao encerrar pode esperar a fila andar: ninguém mais enfileira
+        self.queue.put(self._sentinel)
+
+    def _gravar(self, record):
+        try:
+            self.handle(record)
+            self.gravados += 1
+        except Exception:
+            # Nunca derruba a thread de gravação
+            pass
+
+    def _avisar_descartados(self):
+        descartados = self.handler_fila.descartados
+        if descartados == self._descartados_avisados:
+            return
+        novos = descartados - self._descartados_avisados
+        self._descartados_avisados = descartados
+        self._gravar(logging.LogRecord(
+            self.handler_fila.name or "logs", logging.WARNING, __file__, 0,
+            f"LOGS_DESCARTADOS: {novos} registro(s) descartado(s) com a fila de logs cheia",
+            None, None
+        ))
+
+    def _descarregar(self):
+        for handler in self.handlers:
+            try:
+                handler.descarregar()
+            except Exception:
+                pass
+
+    def _avisar_ouvintes(self, quantidade):
+        for funcao in list(self.ouvintes_lote):
+            try:
+                funcao(quantidade)
+            except Exception:
+                pass
+
+
+class LeitorIncrementalLog:
+    """
+    Acompanha um arquivo de log como 'tail -f': guarda o offset em bytes e a
+    identidade do arquivo (inode + primeiros bytes, pois o inode pode ser
+    reaproveitado) e, a cada ler(), devolve só as linhas novas.
+
+    Se o arquivo for trocado (rotação) ou encolher (truncado), recomeça do
+    início e avisa com reiniciado=True, para quem exibe descartar o que tinha.
+    Na primeira leitura de um arquivo grande só o final é lido (bytes_iniciais;
+    None lê o arquivo inteiro). estado()/restaurar() permitem continuar de onde
+    parou em outra execução.
+    """
+
+    def __init__(self, caminho, bytes_iniciais=2 * 1024 * 1024):
+        self.caminho = caminho
+        self.bytes_iniciais = bytes_iniciais
+        self._identidade = None
+        self._assinatura = b""
+        self._posicao = None
+        self._resto = b""
+
+    TAMANHO_ASSINATURA = 64
+
+    def reiniciar(self, caminho=None):
+        """Esquece a posição atual; a próxima leitura volta ao final do arquivo."""
+        if caminho is not None:
+            self.caminho = caminho
+        self._identidade = None
+        self._assinatura = b""
+        self._posicao = None
+        self._resto = b""
+
+    def estado(self):
+        """(posição, assinatura) da última linha completa lida, para restaurar() depois."""
+        if self._posicao is None:
+            return None, b""
+        return self._posicao - len(self._resto), self._assinatura
+
+    def restaurar(self, posicao, assinatura):
+        """Continua a partir de uma posição salva; se o arquivo mudou, ler() recomeça do início."""
+        self.reiniciar()
+        self._posicao = posicao
+        self._assinatura = assinatura or b""
+
+    def ler(self):
+        """
+        Retorna (linhas_novas, reiniciado, tamanho_em_bytes).
+        A última linha só é devolvida quando termina em quebra de linha.
+        """
+        try:
+            stats = os.stat(self.caminho)
+        except FileNotFoundError:
+            reiniciado = self._posicao is not None
+            self.reiniciar()
+            return [], reiniciado, 0
+
+        identidade = (stats.st_dev, stats.st_ino)
+        with open(self.caminho, 'rb') as f:
+            assinatura = f.read(self.TAMANHO_ASSINATURA)
+            reiniciado = False
+            if self._posicao is None:
+                reiniciado = True
+                inicio = max(0, stats.st_size - (self.bytes_iniciais or stats.st_size))
+            elif ((self._identidade is not None and identidade != self._identidade)
+                  or stats.st_size < self._posicao
+                  or not assinatura.startswith(self._assinatura)):
+                # Rotacionado ou truncado: lê o arquivo novo desde o começo
+                reiniciado = True
+                inicio = 0
+            else:
+                inicio = self._posicao
+            if reiniciado:
+                self._resto = b""
+            self._identidade = identidade
+            self._assinatura = assinatura
+
+            if stats.st_size == inicio:
+                self._posicao = inicio
+                return [], reiniciado, stats.st_size
+
+            f.seek(inicio)
+            dados = f.read()
+            self._posicao = f.tell()
+
+        if reiniciado and inicio > 0:
+            # Começou no meio de uma linha: descarta o pedaço
+            quebra = dados.find(b"\n")
+            dados = dados[quebra + 1:] if quebra >= 0 else b""
+
+        dados = self._resto + dados
+        partes = dados.split(b"\n")
+        self._resto = partes.pop()
+        linhas = [parte.decode('utf-8', errors='replace').rstrip("\r") for parte in partes]
+        return linhas, reiniciado, self._posicao
+
+
 class SistemaLogs:
     def __init__(self, nome_aplicacao="sistema_clientes_pedidos"):
         self.nome_aplicacao = nome_aplicacao
         self.logger = None
+        self._handler_arquivo = None
+        self._handler_jsonl = None
+        self.metricas = None
+        self.gravador = None
+        self._handlers_gravacao = []
+        self._ouvintes_lote = []
+        self._lock_encerramento = threading.Lock()
+        # Instrumentação de UI: todos os eventos, em nível INFO
+        self.amostragem_ui = 1.0
+        self.nivel_ui = logging.INFO
         self._configurar_logs()
     
     def _configurar_logs(self):
@@ -38,9 +644,8 @@ class SistemaLogs:
         if not os.path.exists('logs'):
             os.makedirs('logs')
         
-        # Nome do arquivo com data
-        data_atual = datetime.now().strftime("%Y-%m-%d")
-        log_file = f'logs/{self.nome_aplicacao}_{data_atual}.log'
+        # Arquivos fechados pela rotação são compactados em segundo plano
+        self.compactador = CompactadorLogs('logs', arquivos_em_uso=self._arquivos_em_uso)
         
         # Configuração do logger
         logger = logging.getLogger(self.nome_aplicacao)
@@ -56,8 +661,8 @@ class SistemaLogs:
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         
-        # Handler para arquivo
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        # Handler para arquivo (um por dia, com partes por tamanho)
+        file_handler = ArquivoLogsHandler('logs', self.nome_aplicacao, 'log', ao_fechar=self.compactador.agendar)
         file_handler.setLevel(logging.INFO)
         file_handler.setFormatter(formatter)
         
@@ -66,38 +671,108 @@ class SistemaLogs:
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(formatter)
         
-        # Adiciona handlers
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        # Quem loga só enfileira; a gravação em disco/console fica na thread do gravador
+        fila = queue.Queue(maxsize=TAMANHO_FILA_LOGS)
+        handler_fila = FilaLogsHandler(fila)
+        handler_fila.set_name(self.nome_aplicacao)
+        logger.addHandler(handler_fila)
+        
+        self._handler_arquivo = file_handler
+        self._handlers_gravacao = [file_handler, console_handler]
+        if GRAVAR_JSONL:
+            jsonl_handler = ArquivoLogsHandler('logs', self.nome_aplicacao, 'jsonl', ao_fechar=self.compactador.agendar)
+            jsonl_handler.setLevel(logging.INFO)
+            jsonl_handler.setFormatter(FormatadorJsonl())
+            self._handler_jsonl = jsonl_handler
+            self._handlers_gravacao.append(jsonl_handler)
+        self.metricas = MetricasLogs('logs')
+        self._handlers_gravacao.append(self.metricas)
+        self.gravador = GravadorLogs(fila, handler_fila, *self._handlers_gravacao, ouvintes_lote=self._ouvintes_lote)
+        self.gravador.start()
         
         self.logger = logger
+        # Dias anteriores e partes deixadas por execuções passadas
+        self.compactador.agendar()
+    
+    @property
+    def arquivo_log(self):
+        """Arquivo .log em uso agora (muda na rotação)."""
+        return self._handler_arquivo.caminho if self._handler_arquivo else None
+    
+    @property
+    def arquivo_jsonl(self):
+        return self._handler_jsonl.caminho if self._handler_jsonl else None
+    
+    def _arquivos_em_uso(self):
+        return [handler.caminho for handler in (self._handler_arquivo, self._handler_jsonl) if handler]
     
-    def log_info(self, mensagem):
+    def encerrar(self):
+        """
+        Grava o que ainda estiver na fila e para a thread do gravador (ao sair).
+        Logs posteriores passam a ser gravados direto, sem fila.
+        """
+        with self._lock_encerramento:
+            gravador, self.gravador = self.gravador, None
+        if gravador is None or self.logger is None:
+            return
+        for handler in self._handlers_gravacao:
+            self.logger.addHandler(handler)
+        self.logger.removeHandler(gravador.handler_fila)
+        gravador.stop()
+        for handler in self._handlers_gravacao:
+            handler.descarregar()
+        self.metricas.descarregar(forcar=True)
+    
+    def registrar_ouvinte_lote(self, funcao):
+        """funcao(quantidade) é chamada na thread do gravador após cada lote gravado."""
+        if funcao not in self._ouvintes_lote:
+            self._ouvintes_lote.append(funcao)
+    
+    def estatisticas(self):
+        """Situação da fila de logs: pendentes, gravados e descartados."""
+        gravador = self.gravador
+        if gravador is None:
+            return {'ativo': False, 'pendentes': 0, 'gravados': 0, 'descartados': 0}
+        return {
+            'ativo': True,
+            'pendentes': gravador.queue.qsize(),
+            'gravados': gravador.gravados,
+            'descartados': gravador.handler_fila.descartados,
+        }
+    
+    @staticmethod
+    def _campos(**campos):
+        """Campos tipados do registro (vão só para o JSONL), sem os vazios."""
+        return {chave: valor for chave, valor in campos.items() if valor not in (None, "")}
+    
+    def log_info(self, mensagem, campos=None):
         """Registra log de informação."""
         if self.logger:
-            self.logger.info(mensagem)
+            self.logger.info(mensagem, extra={'campos': campos})
     
-    def log_erro(self, mensagem):
+    def log_erro(self, mensagem, campos=None):
         """Registra log de erro."""
         if self.logger:
-            self.logger.error(mensagem)
+            self.logger.error(mensagem, extra={'campos': campos})
     
-    def log_warning(self, mensagem):
+    def log_warning(self, mensagem, campos=None):
         """Registra log de aviso."""
         if self.logger:
-            self.logger.warning(mensagem)
+            self.logger.warning(mensagem, extra={'campos': campos})
     
     def log_acesso(self, usuario, acao):
         """Registra log de acesso específico."""
         mensagem = f"USUÁRIO: {usuario} - AÇÃO: {acao}"
-        self.log_info(mensagem)
+        self.log_info(mensagem, self._campos(modulo="ACESSO", operacao=acao, usuario=usuario))
     
-    def log_operacao(self, modulo, operacao, detalhes=""):
-        """Registra log de operação do sistema."""
+    def log_operacao(self, modulo, operacao, detalhes="", duracao_ms=None, linhas=None):
+        """Registra log de operação do sistema (duração e nº de linhas opcionais)."""
         mensagem = f"OPERACAO: {modulo} - {operacao}"
         if detalhes:
             mensagem += f" - DETALHES: {detalhes}"
-        self.log_info(mensagem)
+        self.log_info(mensagem, self._campos(
+            modulo=modulo, operacao=operacao, duracao_ms=duracao_ms, linhas=linhas
+        ))
     
     def log_ia(self, acao, detalhes="", modelo=""):
         """Registra log específico para operações de IA."""
@@ -106,14 +781,14 @@ class SistemaLogs:
             mensagem += f" - MODELO: {modelo}"
         if detalhes:
             mensagem += f" - DETALHES: {detalhes}"
-        self.log_info(mensagem)
+        self.log_info(mensagem, self._campos(modulo="AGENTE_IA", operacao=acao, modelo=modelo))
     
     def log_ia_erro(self, acao, erro, modelo=""):
         """Registra log de erro específico para IA."""
         mensagem = f"AGENTE_IA_ERRO: {acao} - ERRO: {erro}"
         if modelo:
             mensagem += f" - MODELO: {modelo}"
-        self.log_erro(mensagem)
+        self.log_erro(mensagem, self._campos(modulo="AGENTE_IA", operacao=acao, erro=str(erro), modelo=modelo))
     
     def log_ia_pergunta(self, pergunta, tokens_utilizados=0, tempo_resposta=0, modelo=""):
         """Registra log de perguntas processadas pela IA."""
@@ -124,7 +799,10 @@ class SistemaLogs:
             mensagem += f" - TEMPO: {tempo_resposta:.2f}s"
         if modelo:
             mensagem += f" - MODELO: {modelo}"
-        self.log_info(mensagem)
+        self.log_info(mensagem, self._campos(
+            modulo="AGENTE_IA", operacao="pergunta", modelo=modelo, tokens=tokens_utilizados or None,
+            duracao_ms=round(tempo_resposta * 1000, 1) if tempo_resposta else None
+        ))
     
     def log_ia_resposta(self, pergunta, resposta, tokens_utilizados=0, tempo_resposta=0, modelo=""):
         """Registra log de respostas da IA."""
@@ -135,7 +813,11 @@ class SistemaLogs:
             mensagem += f" - TEMPO: {tempo_resposta:.2f}s"
         if modelo:
             mensagem += f" - MODELO: {modelo}"
-        self.log_info(mensagem)
+        self.log_info(mensagem, self._campos(
+            modulo="AGENTE_IA", operacao="resposta", modelo=modelo, tokens=tokens_utilizados or None,
+            duracao_ms=round(tempo_resposta * 1000, 1) if tempo_resposta else None,
+            caracteres=len(resposta)
+        ))
     
     def log_ia_conexao(self, status, modelo="", detalhes=""):
         """Registra log de status de conexão com IA."""
@@ -145,10 +827,11 @@ class SistemaLogs:
         if detalhes:
             mensagem += f" - DETALHES: {detalhes}"
         
+        campos = self._campos(modulo="AGENTE_IA", operacao="conexao", status=status, modelo=modelo)
         if "conectado" in status.lower() or "sucesso" in status.lower():
-            self.log_info(mensagem)
+            self.log_info(mensagem, campos)
         else:
-            self.log_erro(mensagem)
+            self.log_erro(mensagem, campos)
     
     def log_ia_analise(self, tipo_analise, resultado, tempo_processamento=0, modelo=""):
         """Registra log de análises realizadas pela IA."""
@@ -157,72 +840,119 @@ class SistemaLogs:
             mensagem += f" - TEMPO: {tempo_processamento:.2f}s"
         if modelo:
             mensagem += f" - MODELO: {modelo}"
-        self.log_info(mensagem)
+        self.log_info(mensagem, self._campos(
+            modulo="AGENTE_IA", operacao="analise", tipo=tipo_analise, modelo=modelo,
+            duracao_ms=round(tempo_processamento * 1000, 1) if tempo_processamento else None
+        ))
 
     # =====================
     # UI: Instrumentação Automática (tkinter/customtkinter)
     # =====================
-    def instrument_ui(self, root: Any, modulo: str = "UI", incluir_children: bool = True):
+    def configurar_instrumentacao_ui(self, amostragem: float = 1.0, nivel: int = logging.INFO):
+        """Padrões da instrumentação: fração de eventos registrados (0 a 1) e nível dos logs."""
+        self.amostragem_ui = max(0.0, min(1.0, amostragem))
+        self.nivel_ui = nivel
+
+    def instrument_ui(self, root: Any, modulo: str = "UI", incluir_children: bool = True,
+                      amostragem: Optional[float] = None, nivel: Optional[int] = None):
         """Instrumenta widgets tkinter/customtkinter para gerar logs automáticos.
 
-        - Buttons/CTkButton: loga cliques e envolve o 'command' para log antes/depois
+        - Buttons/CTkButton: loga o 'command' (uma linha, com duração) ou o clique se não houver command
         - Entry/CTkEntry: loga texto ao pressionar Enter e ao perder foco (se alterado)
         - Combobox: loga seleção
         - Checkbutton/Radiobutton/CTkSwitch/CTkCheckBox: loga alternância
         - Treeview: loga seleção
         - Notebook: loga troca de abas
 
+        Nada é calculado na instrumentação: a identificação do widget só é montada
+        quando um evento passa pelo nível e pela amostragem (amostragem/nivel
+        sobrescrevem os padrões de configurar_instrumentacao_ui para esta árvore).
+        Widgets já instrumentados são pulados, então basta chamar de novo (na
+        raiz ou só no frame novo) depois de criar widgets.
+
         Chame uma vez após criar a UI principal:
             logs.sistema_logs.instrument_ui(root)
         """
         if root is None:
             return
+        config = (modulo, amostragem, nivel)
+        pendentes = [root]
         try:
-            # Evita instrumentar o mesmo widget múltiplas vezes
-            if getattr(root, "_autolog_instrumented", False):
-                pass
-            else:
-                setattr(root, "_autolog_instrumented", True)
-                self._instrument_widget(root, modulo)
-
-            if incluir_children and hasattr(root, "winfo_children"):
-                for child in root.winfo_children():
-                    self.instrument_ui(child, modulo, incluir_children)
+            while pendentes:
+                widget = pendentes.pop()
+                # Evita instrumentar o mesmo widget múltiplas vezes
+                if not getattr(widget, "_autolog_instrumented", False):
+                    setattr(widget, "_autolog_instrumented", True)
+                    self._instrument_widget(widget, config)
+                if incluir_children and hasattr(widget, "winfo_children"):
+                    pendentes.extend(widget.winfo_children())
         except Exception as e:  # nunca quebra a UI por causa do log
             self.log_warning(f"INSTRUMENTACAO_UI_FALHOU: {e}")
 
     # -------- Internos --------
+    def _registrar_evento_ui(self, config, operacao: str, widget: Any,
+                             valor: Optional[Callable] = None, nivel: Optional[int] = None,
+                             duracao_ms: Optional[float] = None):
+        """Aplica nível e amostragem antes de montar qualquer texto do evento."""
+        modulo, amostragem, nivel_config = config
+        nivel = nivel or nivel_config or self.nivel_ui
+        if self.logger is None or not self.logger.isEnabledFor(nivel):
+            return
+        amostragem = self.amostragem_ui if amostragem is None else amostragem
+        # Erros nunca ficam de fora da amostra
+        if nivel < logging.ERROR and amostragem < 1.0 and random.random() >= amostragem:
+            return
+        detalhes = self._widget_path(widget)
+        if valor is not None:
+            try:
+                detalhes += f" -> {valor()}"
+            except Exception:
+                pass
+        self.logger.log(nivel, f"OPERACAO: {modulo} - {operacao} - DETALHES: {detalhes}", extra={
+            'campos': self._campos(modulo=modulo, operacao=operacao, duracao_ms=duracao_ms)
+        })
+
     def _widget_path(self, widget: Any) -> str:
+        # Calculado no primeiro evento e guardado no próprio widget
+        cache = getattr(widget, "_autolog_id", None)
+        if cache is not None:
+            return cache
         try:
             # Gera uma identificação amigável
             cls = widget.__class__.__name__
             name = getattr(widget, "_name", None) or getattr(widget, "_w", "")
             text = None
-            # tenta pegar texto do widget (quando existir)
-            for key in ("text",):
-                try:
-                    val = widget.cget(key)
-                    if val:
-                        text = str(val)
-                        break
-                except Exception:
-                    pass
+            try:
+                val = widget.cget("text")
+                if val:
+                    text = str(val)
+            except Exception:
+                pass
             parts = [p for p in [cls, name, text] if p]
-            return "|".join(parts)
+            identificacao = "|".join(parts)
+        except Exception:
+            identificacao = str(widget)
+        try:
+            setattr(widget, "_autolog_id", identificacao)
         except Exception:
-            return str(widget)
+            pass
+        return identificacao
 
-    def _wrap_command(self, widget: Any, cmd: Callable, modulo: str) -> Callable:
+    def _wrap_command(self, widget: Any, cmd: Callable, config) -> Callable:
         def _wrapped(*args, **kwargs):
-            info = self._widget_path(widget)
-            self.log_operacao(modulo, "COMMAND_IN", detalhes=info)
+            inicio = time.perf_counter()
             try:
-                return cmd(*args, **kwargs)
-            finally:
-                self.log_operacao(modulo, "COMMAND_OUT", detalhes=info)
+                resultado = cmd(*args, **kwargs)
+            except Exception as e:
+                self._registrar_evento_ui(config, "COMMAND_ERRO", widget, lambda erro=e: erro, nivel=logging.ERROR)
+                raise
+            duracao_ms = (time.perf_counter() - inicio) * 1000
+            self._registrar_evento_ui(config, "COMMAND", widget, lambda: f"{duracao_ms:.0f} ms",
+                                      duracao_ms=round(duracao_ms, 1))
+            return resultado
         return _wrapped
 
-    def _maybe_wrap_command(self, widget: Any, modulo: str):
+    def _maybe_wrap_command(self, widget: Any, config) -> bool:
         # Tenta capturar e envolver o 'command' do widget (tk, ttk, ctk)
         get_ok = False
         current = None
@@ -238,12 +968,12 @@ class SistemaLogs:
             except Exception:
                 continue
         if not get_ok:
-            return
+            return False
         # valida callable
         if not callable(current):
-            return
+            return False
         # definir
-        wrapped = self._wrap_command(widget, current, modulo)
+        wrapped = self._wrap_command(widget, current, config)
         for setter in (
             lambda w, cb: w.configure(command=cb),
             lambda w, cb: setattr(w, "command", cb),
@@ -252,9 +982,10 @@ class SistemaLogs:
                 setter(widget, wrapped)
                 # Marca para evitar dupla
                 setattr(widget, "_autolog_cmd_wrapped", True)
-                break
+                return True
             except Exception:
                 continue
+        return False
 
     def _bind(self, widget: Any, sequence: str, handler: Callable):
         try:
@@ -265,84 +996,64 @@ class SistemaLogs:
             except Exception:
                 pass
 
-    def _instrument_widget(self, widget: Any, modulo: str):
-        wcls = widget.__class__.__name__
-        wclass = None
-        try:
-            wclass = widget.winfo_class()
-        except Exception:
-            wclass = None
+    def _instrument_widget(self, widget: Any, config):
+        # Classes da hierarquia em Python: reconhece subclasses sem chamar o Tk
+        classes = {c.__name__ for c in type(widget).__mro__}
 
-        info = self._widget_path(widget)
+        # 1) Envolve o command só de widgets que têm command (Buttons, Check, Radio, CTk components)
+        com_command = False
+        if classes & _CLASSES_COM_COMMAND:
+            com_command = self._maybe_wrap_command(widget, config)
 
-        # 1) Tenta envolver command se existir (Buttons, Check, Radio, Menus, CTk components)
-        self._maybe_wrap_command(widget, modulo)
-
-        # 2) Eventos específicos por tipo/assinatura
-        # Buttons (mesmo sem command)
-        if any(k in (wcls, wclass) for k in ("Button", "TButton", "CTkButton")):
-            self._bind(widget, "<ButtonRelease-1>", lambda e, i=info: self.log_operacao(modulo, "CLICK", detalhes=i))
+        # 2) Eventos específicos por tipo
+        # Buttons sem command: o clique é o único sinal (com command, o COMMAND já registra)
+        if not com_command and classes & {"Button", "CTkButton"}:
+            self._bind(widget, "<ButtonRelease-1>",
+                       lambda e, w=widget: self._registrar_evento_ui(config, "CLICK", w))
 
         # Entries
-        if any(k in (wcls, wclass) for k in ("Entry", "TEntry", "CTkEntry")):
-            # Armazena último valor
-            try:
-                setattr(widget, "_autolog_last_value", widget.get())
-            except Exception:
-                setattr(widget, "_autolog_last_value", "")
-
-            def on_return(e, w=widget):
+        if classes & {"Entry", "CTkEntry"} and "Combobox" not in classes:
+            def on_focus_in(e, w=widget):
                 try:
-                    val = w.get()
+                    setattr(w, "_autolog_last_value", w.get())
                 except Exception:
-                    val = ""
-                self.log_operacao(modulo, "ENTRY_RETURN", detalhes=f"{self._widget_path(w)} -> '{val}'")
+                    pass
+
+            def on_return(e, w=widget):
+                self._registrar_evento_ui(config, "ENTRY_RETURN", w, lambda: f"'{w.get()}'")
 
             def on_focus_out(e, w=widget):
                 try:
                     val = w.get()
                 except Exception:
-                    val = ""
-                last = getattr(w, "_autolog_last_value", None)
-                if val != last:
-                    self.log_operacao(modulo, "ENTRY_CHANGE", detalhes=f"{self._widget_path(w)} -> '{val}'")
+                    return
+                if val != getattr(w, "_autolog_last_value", val):
                     setattr(w, "_autolog_last_value", val)
+                    self._registrar_evento_ui(config, "ENTRY_CHANGE", w, lambda: f"'{val}'")
 
+            self._bind(widget, "<FocusIn>", on_focus_in)
             self._bind(widget, "<Return>", on_return)
             self._bind(widget, "<FocusOut>", on_focus_out)
 
         # Combobox
-        if any(k in (wcls, wclass) for k in ("Combobox", "TCombobox")):
-            def on_combo(e, w=widget):
-                try:
-                    val = w.get()
-                except Exception:
-                    val = ""
-                self.log_operacao(modulo, "COMBO_SELECT", detalhes=f"{self._widget_path(w)} -> '{val}'")
-            self._bind(widget, "<<ComboboxSelected>>", on_combo)
+        if "Combobox" in classes:
+            self._bind(widget, "<<ComboboxSelected>>",
+                       lambda e, w=widget: self._registrar_evento_ui(config, "COMBO_SELECT", w, lambda: f"'{w.get()}'"))
 
         # Treeview seleção
-        if any(k in (wcls, wclass) for k in ("Treeview",)):
-            def on_tree(e, w=widget):
-                try:
-                    sel = w.selection()
-                except Exception:
-                    sel = []
-                self.log_operacao(modulo, "TREE_SELECT", detalhes=f"{self._widget_path(w)} -> {list(sel)}")
-            self._bind(widget, "<<TreeviewSelect>>", on_tree)
+        if "Treeview" in classes:
+            self._bind(widget, "<<TreeviewSelect>>",
+                       lambda e, w=widget: self._registrar_evento_ui(config, "TREE_SELECT", w, lambda: list(w.selection())))
 
         # Notebook tab change
-        if any(k in (wcls, wclass) for k in ("Notebook", "TNotebook")):
-            def on_tab(e, w=widget):
-                try:
-                    idx = w.index("current")
-                except Exception:
-                    idx = -1
-                self.log_operacao(modulo, "TAB_CHANGED", detalhes=f"{self._widget_path(w)} -> {idx}")
-            self._bind(widget, "<<NotebookTabChanged>>", on_tab)
+        if "Notebook" in classes:
+            self._bind(widget, "<<NotebookTabChanged>>",
+                       lambda e, w=widget: self._registrar_evento_ui(config, "TAB_CHANGED", w, lambda: w.index("current")))
 
 # Instância global para uso em todo o sistema
 sistema_logs = SistemaLogs()
+# Garante que a fila seja gravada mesmo se o app sair sem passar por encerrar_logs()
+atexit.register(sistema_logs.encerrar)
 
 # Funções de conveniência para uso rápido
 def log_info(mensagem):
@@ -357,8 +1068,67 @@ def log_warning(mensagem):
 def log_acesso(usuario, acao):
     sistema_logs.log_acesso(usuario, acao)
 
-def log_operacao(modulo, operacao, detalhes=""):
-    sistema_logs.log_operacao(modulo, operacao, detalhes)
+def log_operacao(modulo, operacao, detalhes="", duracao_ms=None, linhas=None):
+    sistema_logs.log_operacao(modulo, operacao, detalhes, duracao_ms, linhas)
+
+def encerrar_logs():
+    sistema_logs.encerrar()
+
+def registrar_ouvinte_lote(funcao):
+    sistema_logs.registrar_ouvinte_lote(funcao)
+
+def caminho_arquivo_log():
+    """Arquivo em que o sistema está gravando os logs agora."""
+    return sistema_logs.arquivo_log
+
+def metricas_logs(data=None):
+    """
+    Contadores dos logs sem ler os arquivos: registros do dia (hoje por
+    padrão) por nível e módulo, e quantos arquivos .log existem na pasta.
+    """
+    contadores = sistema_logs.metricas.do_dia(data)
+    contadores['arquivos_log'] = sistema_logs.compactador.arquivos.get('log', 0)
+    return contadores
+
+# =====================
+# Leitura dos logs estruturados (JSONL)
+# =====================
+def arquivos_jsonl(dias=None, pasta='logs'):
+    """Arquivos .jsonl (e .jsonl.gz) da pasta, do mais antigo para o mais novo (dias=N: só os últimos N dias)."""
+    return listar_arquivos_log(pasta, 'jsonl', dias)
+
+def ler_registros(arquivos=None, dias=None, modulo=None, operacao=None, nivel=None):
+    """
+    Percorre os registros estruturados um a um (gerador, sem carregar os
+    arquivos na memória), já como dicionários. Filtra por módulo, operação e
+    nível; linhas inválidas são ignoradas.
+
+    Exemplo:
+        duracoes = [r['duracao_ms'] for r in ler_registros(dias=7, modulo="AGENTE_IA", operacao="resposta")
+                    if 'duracao_ms' in r]
+    """
+    # Filtro barato no texto antes do json.loads (o formatador usa ": " como separador)
+    trecho_modulo = f'"modulo": {json.dumps(modulo, ensure_ascii=False)}' if modulo is not None else None
+    for arquivo in (arquivos if arquivos is not None else arquivos_jsonl(dias)):
+        try:
+            with abrir_log(arquivo) as f:
+                for linha in f:
+                    if trecho_modulo is not None and trecho_modulo not in linha:
+                        continue
+                    try:
+                        registro = json.loads(linha)
+                    except ValueError:
+                        continue
+                    if modulo is not None and registro.get('modulo') != modulo:
+                        continue
+                    if operacao is not None and registro.get('operacao') != operacao:
+                        continue
+                    if nivel is not None and registro.get('nivel') != nivel:
+                        continue
+                    yield registro
+        except (OSError, EOFError):
+            # Arquivo sumiu (retenção) ou .gz incompleto
+            continue
 
 # Funções específicas para IA
 def log_ia(acao, detalhes="", modelo=""):
@@ -387,14 +1157,20 @@ def log_ia_operacao(acao, detalhes="", modelo=""):
 # =====================
 # Atalho público para instrumentação de UI
 # =====================
-def enable_ui_autolog(root: Any, modulo: str = "UI"):
+def enable_ui_autolog(root: Any, modulo: str = "UI", amostragem: Optional[float] = None,
+                      nivel: Optional[int] = None):
     """Ativa logs automáticos de ações de UI no widget raiz informado.
 
+    Pode ser chamado de novo após criar widgets: só os novos são instrumentados.
+
     Exemplo de uso após construir a janela/principal:
         from logs import enable_ui_autolog
-        enable_ui_autolog(root, modulo="RELATORIOS")
+        enable_ui_autolog(root, modulo="RELATORIOS", amostragem=0.25)
     """
     try:
-        sistema_logs.instrument_ui(root, modulo=modulo)
+        sistema_logs.instrument_ui(root, modulo=modulo, amostragem=amostragem, nivel=nivel)
     except Exception as e:
-        sistema_logs.log_warning(f"ENABLE_UI_AUTOLOG_FALHOU: {e}")
\ No newline at end of file
+        sistema_logs.log_warning(f"ENABLE_UI_AUTOLOG_FALHOU: {e}")
+
+def configurar_instrumentacao_ui(amostragem: float = 1.0, nivel: int = logging.INFO):
+    sistema_logs.configurar_instrumentacao_ui(amostragem, nivel)
@@ -1,7 +1,10 @@
 # main.py
 import customtkinter as ctk
 from tkinter import messagebox
-from db import inicializar_banco
+from db import inicializar_banco, fechar_conexoes
+from executor_tarefas import encerrar_executor
+from fila_ia import encerrar_fila_ia
+from agente_ia import agente_ia
 from views.cliente_views import ClientesView
 from views.pedidos_views import PedidosView
 from views.produtos_views import ProdutosView 
@@ -9,7 +12,7 @@ from views.dashboard_view import DashboardView
 from views.agente_ai_views import AgenteIAView
 from views.relatorios_views import RelatorioViews
 from views.logs_views import LogsView
-from logs import log_operacao, log_info, log_erro
+from logs import log_operacao, log_info, log_erro, encerrar_logs
 
 
 class App(ctk.CTk):
@@ -271,7 +274,12 @@ class App(ctk.CTk):
                         self.agente_ia_view.janela.destroy()
                 except:
                     pass
+            encerrar_fila_ia()
+            encerrar_executor()
+            agente_ia.fechar()
+            fechar_conexoes()
             self.destroy()
+            encerrar_logs()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,192 @@
+# ollama_simulado.py
+"""
+Servidor HTTP que imita o Ollama, para testes e benchmarks sem o modelo.
+
+Implementa GET /api/tags e POST /api/generate (com e sem "stream"), com
+latência inicial (avaliação do prompt) e velocidade de geração em tokens/s
+configuráveis. O tempo gasto "no modelo" é acumulado nas estatísticas do
+servidor, o que permite ao benchmark separar o custo do sistema do custo da
+geração.
+
+Uso:
+    python ollama_simulado.py [--porta 11435] [--latencia 0.2] [--tokens-por-segundo 50]
+
+    # em outro terminal, a aplicação aponta para o simulador:
+    OLLAMA_URL=http://127.0.0.1:11435 python main.py
+
+    # ou dentro do Python:
+    servidor = ServidorOllamaSimulado(latencia=0.05).iniciar()
+    agente_ia.configurar_url(servidor.url)
+    ...
+    servidor.parar()
+"""
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+PALAVRAS_RESPOSTA = (
+    "Com base nos dados do sistema, as vendas seguem estáveis no período. "
+    "Recomendo acompanhar os pedidos pendentes, revisar o estoque dos produtos "
+    "mais vendidos e entrar em contato com os clientes de maior ticket médio."
+).split()
+
+
+class _ManipuladorOllama(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como o Ollama real
+
+    def log_message(self, formato, *args):
+        # Silencioso: o benchmark imprime o próprio relatório
+        pass
+
+    def _enviar_json(self, status, dados):
+        corpo = json.dumps(dados).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _escrever_pedaco(self, dados):
+        linha = (json.dumps(dados) + "\n").encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(linha), linha))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path != "/api/tags":
+            self._enviar_json(404, {"error": "not found"})
+            return
+        self.server.registrar(requisicao=True)
+        self._enviar_json(200, {
+            "models": [{"name": nome, "model": nome} for nome in self.server.modelos]
+        })
+
+    def do_POST(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        try:
+            pedido = json.loads(self.rfile.read(tamanho) or b"{}")
+        except ValueError:
+            self._enviar_json(400, {"error": "invalid JSON"})
+            return
+        if self.path != "/api/generate":
+            self._enviar_json(404, {"error": "not found"})
+            return
+
+        modelo = pedido.get("model", "")
+        if modelo not in self.server.modelos:
+            self._enviar_json(404, {"error": f"model '{modelo}' not found"})
+            return
+
+        limite = (pedido.get("options") or {}).get("num_predict") or self.server.tokens_resposta
+        quantidade = max(1, min(int(limite), self.server.tokens_resposta))
+        tokens = [
+            PALAVRAS_RESPOSTA[i % len(PALAVRAS_RESPOSTA)] + " " for i in range(quantidade)
+        ]
+        inicio = time.perf_counter()
+        time.sleep(self.server.latencia)
+        intervalo = 1.0 / self.server.tokens_por_segundo if self.server.tokens_por_segundo else 0.0
+
+        base = {"model": modelo, "created_at": datetime.now(timezone.utc).isoformat()}
+        if pedido.get("stream", True):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for token in tokens:
+                    time.sleep(intervalo)
+                    self._escrever_pedaco(dict(base, response=token, done=False))
+                duracao = time.perf_counter() - inicio
+                self._escrever_pedaco(dict(
+                    base, response="", done=True,
+                    total_duration=int(duracao * 1e9), eval_count=len(tokens)
+                ))
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # Cliente cancelou a geração
+                duracao = time.perf_counter() - inicio
+                self.close_connection = True
+        else:
+            time.sleep(intervalo * len(tokens))
+            duracao = time.perf_counter() - inicio
+            self._enviar_json(200, dict(
+                base, response="".join(tokens).strip(), done=True,
+                total_duration=int(duracao * 1e9), eval_count=len(tokens)
+            ))
+        self.server.registrar(requisicao=True, geracao=True, tempo_modelo=duracao)
+
+
+class ServidorOllamaSimulado(ThreadingHTTPServer):
+    """Ollama falso com latência e taxa de tokens configuráveis."""
+
+    daemon_threads = True
+
+    def __init__(self, porta=0, host="127.0.0.1", latencia=0.05, tokens_por_segundo=200,
+                 tokens_resposta=40, modelos=("qwen2.5:0.5b",)):
+        super().__init__((host, porta), _ManipuladorOllama)
+        self.latencia = latencia
+        self.tokens_por_segundo = tokens_por_segundo
+        self.tokens_resposta = tokens_resposta
+        self.modelos = tuple(modelos)
+        self._lock = threading.Lock()
+        self._estatisticas = {'requisicoes': 0, 'geracoes': 0, 'tempo_modelo': 0.0}
+        self._thread = None
+
+    @property
+    def url(self):
+        host, porta = self.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def registrar(self, requisicao=False, geracao=False, tempo_modelo=0.0):
+        with self._lock:
+            self._estatisticas['requisicoes'] += int(requisicao)
+            self._estatisticas['geracoes'] += int(geracao)
+            self._estatisticas['tempo_modelo'] += tempo_modelo
+
+    def estatisticas(self):
+        """Contadores acumulados: requisições, gerações e segundos 'no modelo'."""
+        with self._lock:
+            return dict(self._estatisticas)
+
+    def iniciar(self):
+        """Atende em uma thread de fundo e retorna o próprio servidor."""
+        self._thread = threading.Thread(target=self.serve_forever, name="ollama_simulado", daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor que imita a API do Ollama")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--porta', type=int, default=11435)
+    parser.add_argument('--latencia', type=float, default=0.2,
+                        help="segundos até o primeiro token")
+    parser.add_argument('--tokens-por-segundo', type=float, default=50)
+    parser.add_argument('--tokens', type=int, default=60, help="tokens por resposta")
+    parser.add_argument('--modelo', action='append', dest='modelos',
+                        help="modelo disponível (pode repetir)")
+    args = parser.parse_args()
+
+    servidor = ServidorOllamaSimulado(
+        porta=args.porta, host=args.host, latencia=args.latencia,
+        tokens_por_segundo=args.tokens_por_segundo, tokens_resposta=args.tokens,
+        modelos=args.modelos or ("qwen2.5:0.5b",),
+    )
+    print(f"Ollama simulado em {servidor.url} (Ctrl+C para sair)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# reconstruir_vendas_diarias.py
+"""
+Recalcula a tabela de resumo vendas_diarias a partir de pedidos.
+
+A migração 5 de db.py já faz esse preenchimento uma vez e os triggers mantêm
+o resumo atualizado a cada inserção, alteração ou exclusão de pedido. Este
+comando serve para bancos alterados por fora da aplicação ou para conferir
+se o resumo está consistente.
+
+Uso:
+    python reconstruir_vendas_diarias.py              # banco padrão
+    python reconstruir_vendas_diarias.py caminho.db
+    python reconstruir_vendas_diarias.py --verificar  # só compara, não grava
+"""
+import sys
+
+import db
+
+
+CONSULTA_DIRETA = """
+    SELECT created_date, COALESCE(status, ''), COUNT(*), ROUND(SUM(total), 2)
+    FROM pedidos
+    WHERE created_date IS NOT NULL
+    GROUP BY created_date, COALESCE(status, '')
+"""
+
+CONSULTA_RESUMO = """
+    SELECT dia, status, quantidade, ROUND(faturamento, 2)
+    FROM vendas_diarias
+"""
+
+
+def divergencias(caminho=None):
+    """Retorna as linhas (dia, status) em que o resumo difere de pedidos."""
+    conn = db.get_connection(caminho)
+    try:
+        direto = {tuple(linha[:2]): tuple(linha[2:]) for linha in conn.execute(CONSULTA_DIRETA)}
+        resumo = {tuple(linha[:2]): tuple(linha[2:]) for linha in conn.execute(CONSULTA_RESUMO)}
+    finally:
+        conn.close()
+    return sorted(
+        (chave, direto.get(chave), resumo.get(chave))
+        for chave in direto.keys() | resumo.keys()
+        if direto.get(chave) != resumo.get(chave)
+    )
+
+
+def main():
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    caminho = argumentos[0] if argumentos else None
+    if caminho:
+        db.CAMINHO_BANCO = caminho
+
+    try:
+        db.inicializar_banco()
+        if '--verificar' in sys.argv:
+            diferencas = divergencias()
+            for (dia, status), direto, resumo in diferencas:
+                print(f"{dia} {status or '(sem status)'}: pedidos={direto} resumo={resumo}")
+            if diferencas:
+                print(f"\n{len(diferencas)} divergência(s) encontrada(s).")
+                sys.exit(1)
+            print("vendas_diarias consistente com pedidos.")
+            return
+
+        linhas = db.reconstruir_vendas_diarias()
+        print(f"vendas_diarias reconstruída: {linhas} linha(s) (dia, status).")
+    finally:
+        db.fechar_conexoes()
+
+
+if __name__ == "__main__":
+    main()
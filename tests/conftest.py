@@ -0,0 +1,29 @@
+# tests/conftest.py
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# Os módulos do sistema ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# logs.py cria logs/ (e o gravador) no diretório atual ao ser importado:
+# nos testes isso acontece numa pasta temporária, não no repositório
+_PASTA_EXECUCAO = tempfile.mkdtemp(prefix="testes_clientes_pedidos_")
+atexit.register(shutil.rmtree, _PASTA_EXECUCAO, True)
+os.chdir(_PASTA_EXECUCAO)
+
+import db  # noqa: E402
+
+
+@pytest.fixture
+def banco_temporario(tmp_path, monkeypatch):
+    """Banco novo com schema e migrações aplicados; vira o banco padrão do db."""
+    caminho = str(tmp_path / "teste.db")
+    monkeypatch.setattr(db, "CAMINHO_BANCO", caminho)
+    db.inicializar_banco()
+    yield caminho
+    db.fechar_conexoes()
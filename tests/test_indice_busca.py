@@ -0,0 +1,100 @@
+# tests/test_indice_busca.py
+"""O índice de busca relê só os documentos alterados e não devolve dados velhos."""
+import threading
+
+import pytest
+
+import db
+from indice_busca import IndiceBusca
+
+
+def _executar(sql, parametros=()):
+    conn = db.get_connection()
+    try:
+        cursor = conn.execute(sql, parametros)
+        conn.commit()
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def indice(banco_temporario):
+    for i in range(1, 21):
+        cliente = _executar("INSERT INTO clientes (nome, email) VALUES (?, ?)", (f"Cliente {i}", f"c{i}@email.com"))
+        pedido = _executar(
+            "INSERT INTO pedidos (cliente_id, data, total) VALUES (?, '2025-03-01', 10)", (cliente,)
+        )
+        _executar("INSERT INTO produtos (nome, preco) VALUES (?, 5)", (f"Produto{i}",))
+        _executar("INSERT INTO itens_pedido (pedido_id, produto_id, quantidade, preco_unit) VALUES (?, ?, 2, 5)",
+                  (pedido, i))
+    indice = IndiceBusca()
+    db.registrar_ouvinte_escrita(indice.ao_escrever)
+    indice.sincronizar()
+    yield indice
+    db.remover_ouvinte_escrita(indice.ao_escrever)
+
+
+def test_escrita_reindexa_apenas_documentos_afetados(indice):
+    reindexados = indice.reindexados
+    pedido = _executar("INSERT INTO pedidos (cliente_id, data, total) VALUES (3, '2025-03-02', 99)")
+    _executar("INSERT INTO itens_pedido (pedido_id, produto_id, quantidade, preco_unit) VALUES (?, 7, 1, 5)",
+              (pedido,))
+
+    resultado = indice.buscar("produto7", k=5, tipos={'pedidos'})
+
+    assert indice.reindexados - reindexados == 1
+    assert {r.id for r in resultado} == {3, 7}
+
+
+def test_remocao_e_alteracao_de_nome(indice):
+    _executar("UPDATE produtos SET nome = 'Grampeador' WHERE id = 5")
+    _executar("DELETE FROM itens_pedido WHERE pedido_id = (SELECT id FROM pedidos WHERE cliente_id = 9)")
+    _executar("DELETE FROM pedidos WHERE cliente_id = 9")
+
+    assert {(r.tipo, r.id) for r in indice.buscar("grampeador", k=10)} == {('produto', 5), ('pedidos', 5)}
+    assert all(r.id != 9 for r in indice.buscar("cliente 9", k=50, tipos={'pedidos'}))
+    assert [r.id for r in indice.buscar("c9@email.com", k=1)] == [9]
+
+
+def test_escrita_sem_tabelas_nao_recarrega_tudo(indice):
+    reindexados = indice.reindexados
+    conn = db.get_connection()
+    try:
+        conn.execute("UPDATE clientes SET telefone = '1234' WHERE id = 2")
+        conn.confirmar()
+    finally:
+        conn.close()
+
+    assert indice.sincronizar() == 1
+    assert indice.reindexados - reindexados == 1
+
+
+def test_busca_concorrente_espera_sincronizacao_em_andamento(indice):
+    carregando = threading.Event()
+    liberar = threading.Event()
+    carregar = indice._carregar_documentos
+
+    def carregar_devagar(conn, ids_por_tipo):
+        documentos = carregar(conn, ids_por_tipo)
+        carregando.set()
+        liberar.wait(5)
+        return documentos
+
+    indice._carregar_documentos = carregar_devagar
+    _executar("INSERT INTO produtos (nome, preco) VALUES ('Luminaria', 30)")
+
+    primeira = threading.Thread(target=indice.sincronizar)
+    primeira.start()
+    assert carregando.wait(5)
+
+    resultados = []
+    segunda = threading.Thread(target=lambda: resultados.append(indice.buscar("luminaria")))
+    segunda.start()
+    segunda.join(0.2)
+    assert segunda.is_alive()
+
+    liberar.set()
+    primeira.join(5)
+    segunda.join(5)
+    assert [r.tipo for r in resultados[0]] == ['produto']
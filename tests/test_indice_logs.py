@@ -0,0 +1,131 @@
+# tests/test_indice_logs.py
+"""Interpretação das linhas de log e ingestão incremental do índice de logs."""
+import gzip
+import os
+from datetime import datetime
+
+import pytest
+
+import db
+from indice_logs import IndiceLogs, interpretar_linha
+
+HOJE = datetime.now().strftime('%Y-%m-%d')
+
+
+def _linha(hora, nivel, mensagem):
+    return f"{HOJE} {hora} - app - {nivel} - {mensagem}\n"
+
+
+def _acrescentar(caminho, texto):
+    with open(caminho, 'a', encoding='utf-8') as f:
+        f.write(texto)
+
+
+# === INTERPRETAÇÃO ===
+def test_interpreta_formato_padrao():
+    campos = interpretar_linha("2025-03-01 10:00:00 - app - INFO - OPERACAO: PEDIDOS - Criar - pedido 12")
+    assert campos == ("2025-03-01 10:00:00", "INFO", "PEDIDOS", "Criar", "OPERACAO: PEDIDOS - Criar - pedido 12")
+
+    campos = interpretar_linha("2025-03-01 10:00:01 - app - ERROR - AGENTE_IA_ERRO: Timeout")
+    assert campos[1:4] == ("ERROR", "AGENTE_IA", "AGENTE_IA_ERRO")
+
+
+def test_interpreta_formato_antigo():
+    assert interpretar_linha("[2025-03-01 09:00:00] ERRO - banco travado") == (
+        "2025-03-01 09:00:00", "ERROR", "", "", "banco travado"
+    )
+    # Prefixo desconhecido: INFO com a mensagem inteira
+    assert interpretar_linha("[2025-03-01 09:00:00] Sistema iniciado")[1:] == (
+        "INFO", "", "", "Sistema iniciado"
+    )
+
+
+def test_linhas_de_continuacao_herdam_a_anterior():
+    anterior = interpretar_linha("2025-03-01 10:00:00 - app - ERROR - LOGS_VIEW: falhou")
+    assert interpretar_linha('  File "x.py", line 1', anterior) == (
+        "2025-03-01 10:00:00", "ERROR", "LOGS_VIEW", "falhou", '  File "x.py", line 1'
+    )
+    assert interpretar_linha("continuação sem anterior") is None
+    assert interpretar_linha("   ", anterior) is None
+
+
+# === INGESTÃO E BUSCA ===
+@pytest.fixture
+def pasta(tmp_path):
+    pasta = tmp_path / "logs"
+    pasta.mkdir()
+    return pasta
+
+
+def _indice(tmp_path, pasta):
+    return IndiceLogs(caminho=str(tmp_path / "indice.db"), pasta=str(pasta))
+
+
+def _registros(indice):
+    return sorted((r.momento, r.mensagem) for r in indice.buscar(limite=1000))
+
+
+def test_ingestao_incremental_retoma_dentro_do_gz_sem_duplicar(tmp_path, pasta):
+    arquivo = str(pasta / f"app_{HOJE}.log")
+    _acrescentar(arquivo, _linha("10:00:00", "INFO", "primeira") + _linha("10:00:01", "INFO", "segunda"))
+    indice = _indice(tmp_path, pasta)
+    assert indice.sincronizar() == 2
+    assert indice.sincronizar() == 0
+
+    _acrescentar(arquivo, _linha("10:00:02", "INFO", "terceira"))
+    assert indice.sincronizar() == 1
+
+    # Depois de outra execução, o arquivo ganhou linhas e foi compactado
+    _acrescentar(arquivo, _linha("10:00:03", "INFO", "quarta") + _linha("10:00:04", "INFO", "quinta"))
+    with open(arquivo, 'rb') as origem, gzip.open(arquivo + '.gz', 'wb') as destino:
+        destino.write(origem.read())
+    os.remove(arquivo)
+
+    reaberto = _indice(tmp_path, pasta)
+    assert reaberto.sincronizar() == 2
+    assert reaberto.sincronizar() == 0
+    assert [mensagem for _, mensagem in _registros(reaberto)] == [
+        "primeira", "segunda", "terceira", "quarta", "quinta"
+    ]
+
+
+def test_gz_com_original_ainda_presente_e_ignorado(tmp_path, pasta):
+    arquivo = str(pasta / f"app_{HOJE}.log")
+    _acrescentar(arquivo, _linha("10:00:00", "INFO", "unica"))
+    with open(arquivo, 'rb') as origem, gzip.open(arquivo + '.gz', 'wb') as destino:
+        destino.write(origem.read())
+
+    indice = _indice(tmp_path, pasta)
+    assert indice.sincronizar() == 1
+    os.remove(arquivo)
+    assert indice.sincronizar() == 0
+    assert len(_registros(indice)) == 1
+
+
+def test_busca_por_texto_nivel_e_modulo(tmp_path, pasta):
+    _acrescentar(str(pasta / f"app_{HOJE}.log"), "".join([
+        _linha("10:00:00", "ERROR", "AGENTE_IA_ERRO: Timeout ao gerar resposta"),
+        _linha("10:00:01", "INFO", "AGENTE_IA: resposta gerada sem timeout"),
+        _linha("10:00:02", "ERROR", "OPERACAO: PEDIDOS - Salvar - timeout no banco"),
+        _linha("10:00:03", "WARNING", "LOGS_DESCARTADOS: 3 registro(s) descartado(s)"),
+    ]))
+    indice = _indice(tmp_path, pasta)
+    indice.sincronizar()
+
+    assert len(indice.buscar("timeout")) == 3
+    assert [r.modulo for r in indice.buscar("timeout", niveis=["ERROR"])] == ["PEDIDOS", "AGENTE_IA"]
+    assert [r.momento[-8:] for r in indice.buscar("timeout", modulo="AGENTE_IA")] == ["10:00:01", "10:00:00"]
+    assert [r.nivel for r in indice.buscar(niveis=["WARNING"], dias=1)] == ["WARNING"]
+    assert indice.modulos() == ["AGENTE_IA", "LOGS_DESCARTADOS", "PEDIDOS"]
+
+
+def test_ingestao_nao_avisa_ouvintes_do_banco(tmp_path, pasta):
+    _acrescentar(str(pasta / f"app_{HOJE}.log"), _linha("10:00:00", "INFO", "qualquer"))
+    recebidos = []
+    ouvinte = lambda tabelas, caminho: recebidos.append(caminho)  # noqa: E731
+    db.registrar_ouvinte_escrita(ouvinte)
+    try:
+        assert _indice(tmp_path, pasta).sincronizar() == 1
+    finally:
+        db.remover_ouvinte_escrita(ouvinte)
+    assert recebidos == []
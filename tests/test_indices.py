@@ -0,0 +1,41 @@
+# tests/test_indices.py
+"""EXPLAIN QUERY PLAN das consultas mais usadas: cada uma deve usar o índice esperado."""
+import pytest
+
+import db
+from verificar_indices import CONSULTAS_QUENTES
+
+
+@pytest.mark.parametrize(
+    "sql, parametros, indice",
+    [consulta[1:] for consulta in CONSULTAS_QUENTES],
+    ids=[consulta[0] for consulta in CONSULTAS_QUENTES],
+)
+def test_consulta_usa_indice(banco_temporario, sql, parametros, indice):
+    conn = db.get_connection()
+    try:
+        plano = db.explicar_consulta(sql, parametros, conn)
+    finally:
+        conn.close()
+    assert any(indice in detalhe for detalhe in plano), plano
+
+
+def test_indices_das_migracoes_existem(banco_temporario):
+    conn = db.get_connection()
+    try:
+        indices = {nome for (nome,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'"
+        )}
+    finally:
+        conn.close()
+    for esperado in ("idx_pedidos_cliente", "idx_pedidos_created_date", "idx_pedidos_status",
+                     "idx_itens_pedido_pedido", "idx_itens_pedido_produto", "idx_clientes_created_date"):
+        assert esperado in indices
+
+
+def test_consulta_usa_indice_helper(banco_temporario):
+    assert db.consulta_usa_indice(
+        "SELECT COUNT(*) FROM clientes WHERE created_date BETWEEN ? AND ?",
+        "idx_clientes_created_date", ('2025-01-01', '2025-12-31'),
+    )
+    assert not db.consulta_usa_indice("SELECT COUNT(*) FROM produtos WHERE nome = ?", "idx_", ('x',))
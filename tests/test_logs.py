@@ -0,0 +1,279 @@
+# tests/test_logs.py
+"""
+Rotação, compactação e retenção dos arquivos de log, leitura incremental e
+fila de gravação.
+"""
+import gzip
+import logging
+import os
+import queue
+from datetime import datetime, timedelta
+
+import pytest
+
+from logs import (
+    ArquivoLogsHandler, CompactadorLogs, FilaLogsHandler, GravadorLogs, LeitorIncrementalLog,
+    listar_arquivos_log,
+)
+
+HOJE = datetime.now().strftime('%Y-%m-%d')
+
+
+def _registro(mensagem, momento=None, nivel=logging.INFO):
+    registro = logging.LogRecord("teste", nivel, __file__, 0, mensagem, None, None)
+    if momento is not None:
+        registro.created = momento
+    return registro
+
+
+def _ler(caminho):
+    abrir = gzip.open if caminho.endswith('.gz') else open
+    with abrir(caminho, 'rt', encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+@pytest.fixture
+def handler(tmp_path):
+    fechados = []
+    handler = ArquivoLogsHandler(str(tmp_path), 'app', 'log', tamanho_maximo=100, ao_fechar=fechados.append)
+    handler.fechados = fechados
+    yield handler
+    handler.close()
+
+
+# === ROTAÇÃO ===
+def test_rotacao_por_tamanho_abre_novas_partes(handler, tmp_path):
+    for i in range(12):
+        handler.handle(_registro(f"linha {i:02d} " + "x" * 20))
+
+    arquivos = listar_arquivos_log(str(tmp_path), 'log')
+    nomes = [os.path.basename(caminho) for caminho in arquivos]
+    assert nomes[:3] == [f"app_{HOJE}.log", f"app_{HOJE}.2.log", f"app_{HOJE}.3.log"]
+    assert handler.caminho == arquivos[-1]
+    assert handler.fechados == arquivos[:-1]
+    # Nenhuma linha se perde nem muda de ordem entre as partes
+    assert [linha for caminho in arquivos for linha in _ler(caminho)] == [
+        f"linha {i:02d} " + "x" * 20 for i in range(12)
+    ]
+
+
+def test_virada_do_dia_pela_data_do_registro(handler, tmp_path):
+    handler.handle(_registro("hoje"))
+    amanha = datetime.now() + timedelta(days=1)
+    inicio_amanha = datetime.strptime(amanha.strftime('%Y-%m-%d'), '%Y-%m-%d').timestamp()
+    handler.handle(_registro("amanhã", momento=inicio_amanha + 1))
+
+    assert handler.caminho == str(tmp_path / f"app_{amanha.strftime('%Y-%m-%d')}.log")
+    assert handler.fechados == [str(tmp_path / f"app_{HOJE}.log")]
+    assert _ler(handler.fechados[0]) == ["hoje"]
+    assert _ler(handler.caminho) == ["amanhã"]
+
+
+def test_continua_depois_da_ultima_parte_compactada(tmp_path):
+    (tmp_path / f"app_{HOJE}.log.gz").write_bytes(gzip.compress(b"antigo\n"))
+    (tmp_path / f"app_{HOJE}.2.log.gz").write_bytes(gzip.compress(b"antigo\n"))
+    handler = ArquivoLogsHandler(str(tmp_path), 'app', 'log')
+    try:
+        assert handler.caminho == str(tmp_path / f"app_{HOJE}.3.log")
+    finally:
+        handler.close()
+
+
+# === COMPACTAÇÃO E RETENÇÃO ===
+def _criar(pasta, nome, conteudo="linha\n"):
+    caminho = pasta / nome
+    caminho.write_text(conteudo, encoding='utf-8')
+    return str(caminho)
+
+
+def test_compacta_so_arquivos_anteriores_ao_atual(tmp_path):
+    ontem = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    anterior = _criar(tmp_path, f"app_{ontem}.log", "de ontem\n")
+    primeira = _criar(tmp_path, f"app_{HOJE}.log")
+    atual = _criar(tmp_path, f"app_{HOJE}.2.log")
+    outra_serie = _criar(tmp_path, f"outra_{HOJE}.log")
+
+    compactador = CompactadorLogs(str(tmp_path), arquivos_em_uso=lambda: [atual, outra_serie])
+    compactador.executar_agora()
+
+    assert os.path.exists(atual) and os.path.exists(outra_serie)
+    assert not os.path.exists(anterior) and not os.path.exists(primeira)
+    assert _ler(anterior + '.gz') == ["de ontem"]
+    assert os.path.exists(primeira + '.gz')
+    assert compactador.compactados == 2
+
+
+def test_arquivo_aberto_depois_da_lista_de_em_uso_nao_e_compactado(tmp_path):
+    # A lista de em uso pode estar defasada: o que vem depois do atual é mais novo ainda
+    atual = _criar(tmp_path, f"app_{HOJE}.2.log")
+    recem_aberto = _criar(tmp_path, f"app_{HOJE}.3.log")
+
+    CompactadorLogs(str(tmp_path), arquivos_em_uso=lambda: [atual]).executar_agora()
+
+    assert os.path.exists(atual) and os.path.exists(recem_aberto)
+    assert not os.path.exists(recem_aberto + '.gz')
+
+
+def test_retencao_apaga_arquivos_antigos(tmp_path):
+    antigo = (datetime.now() - timedelta(days=40)).strftime('%Y-%m-%d')
+    recente = (datetime.now() - timedelta(days=3)).strftime('%Y-%m-%d')
+    _criar(tmp_path, f"app_{antigo}.log")
+    _criar(tmp_path, f"app_{antigo}.jsonl")
+    (tmp_path / f"app_{antigo}.2.log.gz").write_bytes(gzip.compress(b"x\n"))
+    _criar(tmp_path, f"app_{recente}.log")
+
+    compactador = CompactadorLogs(str(tmp_path), dias_retencao=30)
+    compactador.executar_agora()
+
+    assert sorted(os.listdir(tmp_path)) == [f"app_{recente}.log.gz"]
+    assert compactador.removidos == 3
+    assert compactador.arquivos == {'log': 1, 'jsonl': 0}
+
+
+def test_temporarios_de_passada_interrompida(tmp_path):
+    ontem = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    # Original já apagado: o temporário é a única cópia
+    orfao = tmp_path / f"app_{ontem}.log.gz.tmp"
+    orfao.write_bytes(gzip.compress(b"sobrou\n"))
+    # Original ainda lá: o temporário (talvez incompleto) é refeito
+    original = _criar(tmp_path, f"app_{ontem}.2.log", "inteiro\n")
+    (tmp_path / f"app_{ontem}.2.log.gz.tmp").write_bytes(b"pela metade")
+
+    CompactadorLogs(str(tmp_path)).executar_agora()
+
+    assert sorted(os.listdir(tmp_path)) == [f"app_{ontem}.2.log.gz", f"app_{ontem}.log.gz"]
+    assert _ler(str(tmp_path / f"app_{ontem}.log.gz")) == ["sobrou"]
+    assert _ler(original + '.gz') == ["inteiro"]
+
+
+# === LEITURA INCREMENTAL ===
+def _acrescentar(caminho, dados):
+    with open(caminho, 'ab') as f:
+        f.write(dados)
+
+
+def test_leitor_devolve_so_linhas_novas_e_completas(tmp_path):
+    caminho = str(tmp_path / "app.log")
+    _acrescentar(caminho, b"a\nb\n")
+    leitor = LeitorIncrementalLog(caminho, bytes_iniciais=None)
+
+    assert leitor.ler() == (["a", "b"], True, 4)
+    assert leitor.ler() == ([], False, 4)
+
+    _acrescentar(caminho, b"c\r\nme")
+    assert leitor.ler() == (["c"], False, 9)
+    # Linha sem quebra final fica guardada até terminar
+    _acrescentar(caminho, b"io\n")
+    assert leitor.ler() == (["meio"], False, 12)
+
+
+def test_leitor_estado_e_restaurar_ignoram_linha_incompleta(tmp_path):
+    caminho = str(tmp_path / "app.log")
+    _acrescentar(caminho, b"primeira\nsegun")
+    leitor = LeitorIncrementalLog(caminho, bytes_iniciais=None)
+    assert leitor.ler()[0] == ["primeira"]
+    posicao, assinatura = leitor.estado()
+    assert posicao == len(b"primeira\n")
+
+    _acrescentar(caminho, b"da\nterceira\n")
+    outro = LeitorIncrementalLog(caminho)
+    outro.restaurar(posicao, assinatura)
+    assert outro.ler() == (["segunda", "terceira"], False, 26)
+
+
+def test_leitor_recomeca_quando_arquivo_e_truncado(tmp_path):
+    caminho = str(tmp_path / "app.log")
+    _acrescentar(caminho, b"linha longa um\nlinha longa dois\n")
+    leitor = LeitorIncrementalLog(caminho, bytes_iniciais=None)
+    leitor.ler()
+
+    with open(caminho, 'wb') as f:
+        f.write(b"novo\n")
+    assert leitor.ler() == (["novo"], True, 5)
+
+
+def test_leitor_recomeca_quando_arquivo_e_trocado(tmp_path):
+    caminho = str(tmp_path / "app.log")
+    _acrescentar(caminho, b"antigo\n")
+    leitor = LeitorIncrementalLog(caminho, bytes_iniciais=None)
+    leitor.ler()
+
+    # Arquivo novo, maior e com outro começo, no mesmo caminho (rotação por renomeação)
+    novo = str(tmp_path / "novo.log")
+    _acrescentar(novo, b"rotacionado 1\nrotacionado 2\n")
+    os.replace(novo, caminho)
+    assert leitor.ler() == (["rotacionado 1", "rotacionado 2"], True, 28)
+
+
+def test_leitor_restaurado_em_arquivo_diferente_le_desde_o_inicio(tmp_path):
+    caminho = str(tmp_path / "app.log")
+    _acrescentar(caminho, b"outro conteudo\nmais uma\n")
+    leitor = LeitorIncrementalLog(caminho)
+    leitor.restaurar(5, b"assinatura de outro arquivo")
+    assert leitor.ler()[:2] == (["outro conteudo", "mais uma"], True)
+
+
+def test_leitor_primeira_leitura_so_do_final(tmp_path):
+    caminho = str(tmp_path / "app.log")
+    _acrescentar(caminho, b"".join(b"linha %02d\n" % i for i in range(100)))
+    leitor = LeitorIncrementalLog(caminho, bytes_iniciais=25)
+
+    linhas, reiniciado, _ = leitor.ler()
+    # 25 bytes pegam parte da linha 97: o pedaço é descartado
+    assert linhas == ["linha 98", "linha 99"]
+    assert reiniciado
+
+
+def test_leitor_arquivo_apagado(tmp_path):
+    caminho = str(tmp_path / "app.log")
+    _acrescentar(caminho, b"x\n")
+    leitor = LeitorIncrementalLog(caminho, bytes_iniciais=None)
+    leitor.ler()
+
+    os.remove(caminho)
+    assert leitor.ler() == ([], True, 0)
+    assert leitor.estado() == (None, b"")
+
+
+# === FILA DE GRAVAÇÃO ===
+def _mensagens_na_fila(fila):
+    return [registro.getMessage() for registro in list(fila.queue)]
+
+
+def test_fila_cheia_descarta_info_e_aviso_tira_o_mais_antigo():
+    fila = queue.Queue(maxsize=3)
+    handler = FilaLogsHandler(fila)
+    for i in range(3):
+        handler.handle(_registro(f"info {i}"))
+
+    handler.handle(_registro("info descartada"))
+    assert _mensagens_na_fila(fila) == ["info 0", "info 1", "info 2"]
+    assert handler.descartados == 1
+
+    handler.handle(_registro("aviso", nivel=logging.WARNING))
+    handler.handle(_registro("erro", nivel=logging.ERROR))
+    assert _mensagens_na_fila(fila) == ["info 2", "aviso", "erro"]
+    assert handler.descartados == 3
+
+
+def test_gravador_grava_fila_e_aviso_de_descarte_ao_parar(tmp_path):
+    fila = queue.Queue(maxsize=5)
+    handler_fila = FilaLogsHandler(fila)
+    arquivo = ArquivoLogsHandler(str(tmp_path), 'app', 'log')
+    arquivo.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+    lotes = []
+    # Ainda parado: a fila enche e descarta
+    for i in range(7):
+        handler_fila.handle(_registro(f"linha {i}"))
+    gravador = GravadorLogs(fila, handler_fila, arquivo, ouvintes_lote=[lotes.append])
+
+    gravador.start()
+    gravador.stop()
+    arquivo.close()
+
+    assert _ler(arquivo.caminho) == [f"INFO linha {i}" for i in range(5)] + [
+        "WARNING LOGS_DESCARTADOS: 2 registro(s) descartado(s) com a fila de logs cheia"
+    ]
+    assert gravador.gravados == 6
+    assert sum(lotes) == 6
+    assert not arquivo.em_lote
@@ -0,0 +1,44 @@
+# tests/test_notificacao_escrita.py
+"""Ouvintes de escrita recebem o banco alterado e ignoram os outros arquivos."""
+import db
+from agregacao_relatorios import CacheRelatorios
+
+
+def _inserir(caminho=None):
+    conn = db.get_connection(caminho)
+    try:
+        conn.execute("INSERT INTO produtos (nome, preco) VALUES ('Caneta', 2.5)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_ouvinte_recebe_caminho_do_banco(banco_temporario, tmp_path):
+    outro = str(tmp_path / "outro.db")
+    conn = db.get_connection(outro)
+    conn.execute("CREATE TABLE produtos (nome TEXT, preco REAL)")
+    conn.commit()
+    conn.close()
+
+    recebidos = []
+    ouvinte = lambda tabelas, caminho: recebidos.append(caminho)  # noqa: E731
+    db.registrar_ouvinte_escrita(ouvinte)
+    try:
+        _inserir()
+        _inserir(outro)
+    finally:
+        db.remover_ouvinte_escrita(ouvinte)
+    assert [db.mesmo_banco(caminho) for caminho in recebidos] == [True, False]
+
+
+def test_cache_relatorios_ignora_outro_banco(banco_temporario, tmp_path):
+    cache = CacheRelatorios()
+    db.registrar_ouvinte_escrita(cache.ao_escrever)
+    try:
+        cache.obter('agregado', '2025-01-01', '2025-01-31', 'Todos', lambda: 1)
+        cache.ao_escrever(frozenset({'produtos'}), str(tmp_path / "indice_logs.db"))
+        assert cache.estatisticas()['itens'] == 1
+        _inserir()
+        assert cache.estatisticas()['itens'] == 0
+    finally:
+        db.remover_ouvinte_escrita(cache.ao_escrever)
@@ -0,0 +1,74 @@
+# tests/test_pool_conexoes.py
+"""Empréstimos aninhados da conexão da thread não mexem na transação de fora."""
+import sqlite3
+
+import pytest
+
+import db
+
+
+def _contar_produtos():
+    conn = db.obter_pool().obter()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM produtos").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _ler_de_outra_conexao(caminho):
+    conn = sqlite3.connect(caminho)
+    try:
+        return conn.execute("SELECT nome FROM produtos ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_commit_aninhado_nao_confirma_trabalho_de_fora(banco_temporario):
+    externa = db.get_connection()
+    try:
+        externa.execute("INSERT INTO produtos (nome, preco) VALUES ('Externo', 1)")
+        db.executar_comando("INSERT INTO produtos (nome, preco) VALUES (?, ?)", ('Interno', 2))
+
+        # Nada foi gravado ainda: o commit interno só liberou o savepoint
+        assert _ler_de_outra_conexao(banco_temporario) == []
+        externa.rollback()
+    finally:
+        externa.close()
+
+    assert _ler_de_outra_conexao(banco_temporario) == []
+
+
+def test_rollback_aninhado_preserva_trabalho_de_fora(banco_temporario):
+    externa = db.get_connection()
+    try:
+        externa.execute("INSERT INTO produtos (nome, preco) VALUES ('Externo', 1)")
+        with pytest.raises(Exception):
+            db.executar_comando("INSERT INTO tabela_inexistente VALUES (1)")
+        interna = db.get_connection()
+        interna.execute("INSERT INTO produtos (nome, preco) VALUES ('Descartado', 2)")
+        interna.close()
+        externa.commit()
+    finally:
+        externa.close()
+
+    assert _ler_de_outra_conexao(banco_temporario) == [('Externo',)]
+
+
+def test_aviso_de_escrita_sai_no_commit_real(banco_temporario):
+    recebidos = []
+    ouvinte = lambda tabelas, caminho: recebidos.append(tabelas)  # noqa: E731
+    db.registrar_ouvinte_escrita(ouvinte)
+    try:
+        externa = db.get_connection()
+        try:
+            externa.execute("INSERT INTO clientes (nome, email) VALUES ('Ana', 'ana@email.com')")
+            db.executar_comando("INSERT INTO produtos (nome, preco) VALUES (?, ?)", ('Caneta', 2.5))
+            assert recebidos == []
+            externa.confirmar({'clientes'})
+        finally:
+            externa.close()
+    finally:
+        db.remover_ouvinte_escrita(ouvinte)
+
+    assert recebidos == [frozenset({'clientes', 'produtos'})]
+    assert _contar_produtos() == 1
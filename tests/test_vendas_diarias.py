@@ -0,0 +1,93 @@
+# tests/test_vendas_diarias.py
+"""Os triggers mantêm vendas_diarias igual ao GROUP BY sobre pedidos."""
+import random
+
+import pytest
+
+import db
+from agregacao_relatorios import CacheRelatorios
+
+DIAS = [f"2025-03-{dia:02d} 10:00:00" for dia in range(1, 8)]
+STATUS = ['Pendente', 'Concluído', 'Cancelado', None]
+
+
+def _resumo(conn):
+    return {
+        (dia, status): (quantidade, round(faturamento, 2), menor, maior)
+        for dia, status, quantidade, faturamento, menor, maior in conn.execute(
+            "SELECT dia, status, quantidade, faturamento, menor_pedido, maior_pedido FROM vendas_diarias"
+        )
+    }
+
+
+def _esperado(conn):
+    return {
+        (dia, status): (quantidade, round(faturamento, 2), menor, maior)
+        for dia, status, quantidade, faturamento, menor, maior in conn.execute("""
+            SELECT created_date, COALESCE(status, ''), COUNT(*), SUM(total), MIN(total), MAX(total)
+            FROM pedidos
+            GROUP BY created_date, COALESCE(status, '')
+        """)
+    }
+
+
+@pytest.mark.parametrize("semente", [1, 2, 3])
+def test_triggers_acompanham_operacoes_aleatorias(banco_temporario, semente):
+    aleatorio = random.Random(semente)
+    conn = db.get_connection()
+    try:
+        conn.execute("INSERT INTO clientes (nome, email) VALUES ('Cliente', 'c@email.com')")
+        ids = []
+        for _ in range(500):
+            operacao = aleatorio.random()
+            if operacao < 0.5 or not ids:
+                cursor = conn.execute(
+                    "INSERT INTO pedidos (cliente_id, data, total, status, created_at) VALUES (1, ?, ?, ?, ?)",
+                    ('2025-03-01', round(aleatorio.uniform(1, 500), 2), aleatorio.choice(STATUS),
+                     aleatorio.choice(DIAS))
+                )
+                ids.append(cursor.lastrowid)
+            elif operacao < 0.85:
+                pedido_id = aleatorio.choice(ids)
+                campo, valor = aleatorio.choice([
+                    ('total', round(aleatorio.uniform(1, 500), 2)),
+                    ('status', aleatorio.choice(STATUS)),
+                    ('created_at', aleatorio.choice(DIAS)),
+                ])
+                conn.execute(f"UPDATE pedidos SET {campo} = ? WHERE id = ?", (valor, pedido_id))
+            else:
+                pedido_id = ids.pop(aleatorio.randrange(len(ids)))
+                conn.execute("DELETE FROM pedidos WHERE id = ?", (pedido_id,))
+        conn.commit()
+
+        assert _resumo(conn) == _esperado(conn)
+    finally:
+        conn.close()
+
+
+def test_reconstrucao_confere_com_triggers_e_limpa_cache(banco_temporario):
+    conn = db.get_connection()
+    try:
+        conn.executemany(
+            "INSERT INTO pedidos (cliente_id, data, total, status, created_at) VALUES (1, '2025-03-01', ?, ?, ?)",
+            [(10.0 * i, STATUS[i % 4], DIAS[i % 7]) for i in range(1, 50)]
+        )
+        conn.commit()
+        antes = _resumo(conn)
+    finally:
+        conn.close()
+
+    cache = CacheRelatorios()
+    db.registrar_ouvinte_escrita(cache.ao_escrever)
+    try:
+        cache.obter('agregado', '2025-03-01', '2025-03-07', 'Todos', lambda: 1)
+        db.reconstruir_vendas_diarias()
+        assert cache.estatisticas()['itens'] == 0
+    finally:
+        db.remover_ouvinte_escrita(cache.ao_escrever)
+
+    conn = db.get_connection()
+    try:
+        assert _resumo(conn) == antes
+    finally:
+        conn.close()
@@ -3,34 +3,34 @@ import tkinter as tk
 from tkinter import messagebox
 from datetime import datetime, timedelta
 import re
-import os
+import logging
 import sqlite3
+from db import get_connection
+from fila_ia import executar_na_fila_ia, PRIORIDADE_ANALISE
+from logs import sistema_logs
 
 
 
-def registrar_log(mensagem):
-    """Registra uma mensagem de log em arquivo local."""
+def registrar_log(mensagem, nivel=logging.INFO):
+    """
+    Registra uma mensagem no log do sistema.
+    Passa pelo logger central (fila + gravação em lote), com o mesmo arquivo e formato.
+    """
     try:
-        # Criar pasta logs se não existir
-        if not os.path.exists('logs'):
-            os.makedirs('logs')
-        
-        log_file = f"logs/sistema_clientes_pedidos_{datetime.now().strftime('%Y-%m-%d')}.log"
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {mensagem}\n")
+        sistema_logs.logger.log(nivel, mensagem)
     except Exception as e:
         print(f"Erro ao registrar log: {e}")
 
 
 def mostrar_erro(titulo, mensagem):
     """Exibe mensagem de erro e registra log."""
-    registrar_log(f"ERRO - {titulo}: {mensagem}")
+    registrar_log(f"{titulo}: {mensagem}", logging.ERROR)
     messagebox.showerror(titulo, mensagem)
 
 
 def mostrar_info(titulo, mensagem):
     """Exibe mensagem informativa e registra log."""
-    registrar_log(f"INFO - {titulo}: {mensagem}")
+    registrar_log(f"{titulo}: {mensagem}")
     messagebox.showinfo(titulo, mensagem)
 
 
@@ -151,7 +151,7 @@ def analisar_pedidos(db_path='clientes_pedidos.db', modelo=None, periodo_dias=30
                 ia.trocar_modelo(modelo)
                 registrar_log(f"AGENTE_IA - Modelo definido para: {modelo}")
             except Exception as e:
-                registrar_log(f"AGENTE_IA - Falha ao trocar modelo '{modelo}': {e}")
+                registrar_log(f"AGENTE_IA - Não foi possível trocar o modelo para '{modelo}': {e}", logging.WARNING)
     except Exception:
         ia = None
     
@@ -165,44 +165,45 @@ def analisar_pedidos(db_path='clientes_pedidos.db', modelo=None, periodo_dias=30
     
     try:
         # Conectar ao banco
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        conn = get_connection(db_path)
+        try:
+            cursor = conn.cursor()
         
-        # Data limite para análise
-        data_limite = (datetime.now() - timedelta(days=periodo_dias)).strftime('%Y-%m-%d')
+            # Data limite para análise
+            data_limite = (datetime.now() - timedelta(days=periodo_dias)).strftime('%Y-%m-%d')
         
-        # Buscar produtos mais vendidos no período
-        query = """
-            SELECT 
-                p.nome as produto,
-                SUM(ip.quantidade) as total_vendido,
-                COUNT(DISTINCT ip.pedido_id) as num_pedidos,
-                SUM(ip.quantidade * ip.preco_unit) as receita_total,
-                AVG(ip.preco_unit) as preco_medio
-            FROM itens_pedido ip
-            INNER JOIN produtos p ON ip.produto_id = p.id
-            INNER JOIN pedidos ped ON ip.pedido_id = ped.id
-            WHERE ped.data >= ?
-            GROUP BY p.id, p.nome
-            ORDER BY total_vendido DESC
-            LIMIT 10
-        """
+            # Buscar produtos mais vendidos no período
+            query = """
+                SELECT 
+                    p.nome as produto,
+                    SUM(ip.quantidade) as total_vendido,
+                    COUNT(DISTINCT ip.pedido_id) as num_pedidos,
+                    SUM(ip.quantidade * ip.preco_unit) as receita_total,
+                    AVG(ip.preco_unit) as preco_medio
+                FROM itens_pedido ip
+                INNER JOIN produtos p ON ip.produto_id = p.id
+                INNER JOIN pedidos ped ON ip.pedido_id = ped.id
+                WHERE ped.data >= ?
+                GROUP BY p.id, p.nome
+                ORDER BY total_vendido DESC
+                LIMIT 10
+            """
         
-        cursor.execute(query, (data_limite,))
-        produtos = cursor.fetchall()
+            cursor.execute(query, (data_limite,))
+            produtos = cursor.fetchall()
         
-        # Métricas gerais
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total_pedidos,
-                SUM(total) as receita_total,
-                AVG(total) as ticket_medio
-            FROM pedidos
-            WHERE data >= ?
-        """, (data_limite,))
-        metricas = cursor.fetchone()
-        
-        conn.close()
+            # Métricas gerais
+            cursor.execute("""
+                SELECT 
+                    COUNT(*) as total_pedidos,
+                    SUM(total) as receita_total,
+                    AVG(total) as ticket_medio
+                FROM pedidos
+                WHERE data >= ?
+            """, (data_limite,))
+            metricas = cursor.fetchone()
+        finally:
+            conn.close()
         
         # Formatar dados dos produtos
         produtos_formatados = []
@@ -253,23 +254,33 @@ TOP 10 PRODUTOS MAIS VENDIDOS:
             )
         else:
             try:
-                ok, msg = ia.testar_modelo()
-                if not ok:
-                    registrar_log(f"AGENTE_IA - Indisponível: {msg}")
+                def consultar_ia():
+                    ok, msg = ia.verificar_disponibilidade()
+                    if not ok:
+                        return None, None, msg
+                    resposta, erro = ia.enviar_pergunta_com_contexto(pergunta, contexto_adicional=dados_texto)
+                    return resposta, erro, None
+
+                # Pela fila central da IA (roda direto se já estiver dentro de um trabalho dela)
+                resposta, erro, msg = executar_na_fila_ia(
+                    consultar_ia,
+                    prioridade=PRIORIDADE_ANALISE,
+                    identidade=("analisar_pedidos_ia", ia.modelo, pergunta, dados_texto),
+                )
+                if msg:
+                    registrar_log(f"AGENTE_IA - Indisponível: {msg}", logging.WARNING)
                     resultado['analise_ia'] = (
                         f"IA indisponível no momento ({msg}). Exibindo dados consolidados sem análise textual."
                     )
+                elif erro:
+                    registrar_log(f"AGENTE_IA - Análise não gerada: {erro}", logging.ERROR)
+                    resultado['analise_ia'] = (
+                        f"Falha ao gerar análise com IA: {erro}. Exibindo apenas dados."
+                    )
                 else:
-                    resposta, erro = ia.enviar_pergunta_com_contexto(pergunta, contexto_adicional=dados_texto)
-                    if erro:
-                        registrar_log(f"AGENTE_IA - Erro ao gerar análise: {erro}")
-                        resultado['analise_ia'] = (
-                            f"Falha ao gerar análise com IA: {erro}. Exibindo apenas dados."
-                        )
-                    else:
-                        resultado['analise_ia'] = resposta
+                    resultado['analise_ia'] = resposta
             except Exception as e:
-                registrar_log(f"AGENTE_IA - Exceção inesperada: {e}")
+                registrar_log(f"AGENTE_IA - Análise interrompida: {e}", logging.ERROR)
                 resultado['analise_ia'] = (
                     f"Erro inesperado ao usar IA: {e}. Exibindo apenas dados."
                 )
@@ -280,10 +291,10 @@ TOP 10 PRODUTOS MAIS VENDIDOS:
     except sqlite3.Error as e:
         resultado['erro'] = f"Erro no banco de dados: {str(e)}"
         resultado['sucesso'] = False
-        registrar_log(f"ERRO DB - analisar_pedidos: {e}")
+        registrar_log(f"DB - analisar_pedidos: {e}", logging.ERROR)
     except Exception as e:
         resultado['erro'] = f"Erro inesperado: {str(e)}"
         resultado['sucesso'] = False
-        registrar_log(f"ERRO - analisar_pedidos: {e}")
+        registrar_log(f"analisar_pedidos: {e}", logging.ERROR)
     
     return resultado
\ No newline at end of file
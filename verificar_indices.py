@@ -0,0 +1,138 @@
+# verificar_indices.py
+"""
+Verifica, via EXPLAIN QUERY PLAN, se as consultas mais usadas pelo sistema
+estão usando os índices criados pelas migrações de db.py.
+
+Cria um banco temporário, aplica o schema e as migrações, e confere cada
+consulta. Termina com código 1 se alguma consulta não usar o índice esperado.
+
+Uso:
+    python verificar_indices.py            # banco temporário
+    python verificar_indices.py caminho.db # banco existente (somente leitura)
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import db
+
+
+# (descrição, consulta, parâmetros, índice esperado)
+CONSULTAS_QUENTES = [
+    (
+        "Dashboard.get_top_clientes",
+        """SELECT c.nome, COUNT(p.id), COALESCE(SUM(p.total), 0)
+           FROM clientes c LEFT JOIN pedidos p ON c.id = p.cliente_id
+           GROUP BY c.id, c.nome ORDER BY 2 DESC LIMIT 5""",
+        (),
+        "idx_pedidos_cliente",
+    ),
+    (
+        "Pedidos por status",
+        "SELECT status, COUNT(*) FROM pedidos GROUP BY status",
+        (),
+        "idx_pedidos_status",
+    ),
+    (
+        "Pedidos criados a partir de uma data",
+        "SELECT COUNT(*) FROM pedidos WHERE created_at >= ?",
+        ('2025-01-01',),
+        "idx_pedidos_created_at",
+    ),
+    (
+        "Clientes novos a partir de uma data",
+        "SELECT COUNT(*) FROM clientes WHERE created_at >= ?",
+        ('2025-01-01',),
+        "idx_clientes_created_at",
+    ),
+    (
+        "utils.analisar_pedidos (métricas do período)",
+        "SELECT COUNT(*), SUM(total), AVG(total) FROM pedidos WHERE data >= ?",
+        ('2025-01-01',),
+        "idx_pedidos_data",
+    ),
+    (
+        "Itens de um pedido",
+        "SELECT produto_id, quantidade, preco_unit FROM itens_pedido WHERE pedido_id = ?",
+        (1,),
+        "idx_itens_pedido_pedido",
+    ),
+    (
+        "Relatórios: KPIs de pedidos no período",
+        "SELECT COUNT(*), SUM(total), AVG(total) FROM pedidos WHERE created_date BETWEEN ? AND ?",
+        ('2025-01-01', '2025-12-31'),
+        "idx_pedidos_created_date",
+    ),
+    (
+        "Relatórios: evolução diária no período",
+        """SELECT created_date, COUNT(*), SUM(total) FROM pedidos
+           WHERE created_date BETWEEN ? AND ? GROUP BY created_date ORDER BY created_date""",
+        ('2025-01-01', '2025-12-31'),
+        "idx_pedidos_created_date",
+    ),
+    (
+        "Relatórios: clientes cadastrados no período",
+        "SELECT COUNT(*) FROM clientes WHERE created_date BETWEEN ? AND ?",
+        ('2025-01-01', '2025-12-31'),
+        "idx_clientes_created_date",
+    ),
+    (
+        "Dashboard.get_evolucao_pedidos (resumo vendas_diarias)",
+        "SELECT dia, SUM(quantidade) FROM vendas_diarias WHERE dia >= ? GROUP BY dia ORDER BY dia",
+        ('2025-01-01',),
+        "PRIMARY KEY",
+    ),
+    (
+        "Produtos mais vendidos",
+        """SELECT p.nome, SUM(ip.quantidade)
+           FROM produtos p JOIN itens_pedido ip ON ip.produto_id = p.id
+           GROUP BY p.id ORDER BY 2 DESC LIMIT 10""",
+        (),
+        "idx_itens_pedido_produto",
+    ),
+]
+
+
+def verificar(caminho=None):
+    """Executa as verificações e retorna a lista de consultas que falharam."""
+    falhas = []
+    conn = db.get_connection(caminho)
+    try:
+        print(f"Versão do schema: {db.versao_schema(conn)}")
+        for descricao, sql, parametros, indice in CONSULTAS_QUENTES:
+            plano = db.explicar_consulta(sql, parametros, conn)
+            ok = any(indice in detalhe for detalhe in plano)
+            print(f"[{'OK' if ok else 'FALHOU'}] {descricao} -> {indice}")
+            for detalhe in plano:
+                print(f"        {detalhe}")
+            if not ok:
+                falhas.append(descricao)
+    finally:
+        conn.close()
+    return falhas
+
+
+def main():
+    if len(sys.argv) > 1:
+        falhas = verificar(sys.argv[1])
+    else:
+        pasta = tempfile.mkdtemp(prefix="indices_")
+        db_original = db.CAMINHO_BANCO
+        try:
+            db.CAMINHO_BANCO = os.path.join(pasta, "verificacao.db")
+            db.inicializar_banco()
+            falhas = verificar()
+        finally:
+            db.fechar_conexoes()
+            db.CAMINHO_BANCO = db_original
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    if falhas:
+        print(f"\n{len(falhas)} consulta(s) sem o índice esperado.")
+        sys.exit(1)
+    print("\nTodas as consultas usam os índices esperados.")
+
+
+if __name__ == "__main__":
+    main()
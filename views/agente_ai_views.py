@@ -2,11 +2,16 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import messagebox
-import threading
 import time
-from agente_ia import agente_ia
+import queue
+from agente_ia import agente_ia, ErroIA
+from executor_tarefas import executar_em_segundo_plano
+from fila_ia import enviar_para_ia, PRIORIDADE_CHAT
 from logs import log_operacao, log_erro, log_ia, log_ia_erro
 
+# Intervalo (ms) entre as atualizações do chat enquanto a IA gera a resposta
+INTERVALO_STREAM_MS = 50
+
 
 class AgenteIAView:
     def __init__(self, parent, dados_cliente=None, dados_pedidos=None):
@@ -17,6 +22,10 @@ class AgenteIAView:
         self.ia_conectada = False
         self.ia_funcionando = False
         self.contador_mensagens_total = 0
+        # Resposta da IA em andamento: {'fila', 'tarefa', 'iniciado'}
+        self._stream = None
+        # Mensagem da IA sendo escrita no chat (entre as marcas inicio_resposta_ia e resposta_ia)
+        self._mensagem_stream_aberta = False
         
         log_operacao("AGENTE_IA_VIEW", "Inicializada")
 
@@ -37,6 +46,7 @@ class AgenteIAView:
         self.janela.transient(self.parent)
         self.janela.grab_set()
         self.janela.focus_force()
+        self.janela.protocol("WM_DELETE_WINDOW", self._fechar)
         
         # Centralizar
         self._centralizar_janela()
@@ -47,6 +57,8 @@ class AgenteIAView:
         
         self._criar_interface()
         self._verificar_conexao_inicial()
+        # Contexto do banco pronto antes da primeira pergunta
+        agente_ia.pre_carregar_contexto()
         
         log_operacao("AGENTE_IA_VIEW", "Janela exibida")
 
@@ -258,33 +270,33 @@ Bem-vindo! Estou aqui para ajudá-lo com análises de dados do sistema.
         """Atualiza o contador de mensagens"""
         self.contador_mensagens.configure(text=f"{self.contador_mensagens_total} mensagens")
 
-    def _verificar_conexao_inicial(self):
-        """Verifica conexão inicial com Ollama"""
-        def verificar():
-            # Primeiro teste básico de conexão
-            sucesso = agente_ia.testar_conexao()
+    def _checar_conexao_em_segundo_plano(self, avisar_falha=True, forcar=False):
+        """Testa a conexão com o Ollama no executor e, se ok, testa o modelo"""
+        def concluir(sucesso):
             if sucesso:
                 # Se conectou, testa se realmente responde
-                self.janela.after(0, self._testar_resposta_ia)
-            else:
-                self.janela.after(0, lambda: self._processar_resultado_conexao(False))
-        
-        threading.Thread(target=verificar, daemon=True).start()
+                self._testar_resposta_ia()
+            elif avisar_falha:
+                self._processar_resultado_conexao(False)
+
+        executar_em_segundo_plano(
+            agente_ia.testar_conexao, forcar,
+            widget=self.janela, chave=f"agente_conexao_{id(self)}",
+            ao_concluir=concluir,
+            ao_falhar=lambda e: concluir(False),
+        )
+
+    def _verificar_conexao_inicial(self):
+        """Verifica conexão inicial com Ollama"""
+        self._checar_conexao_em_segundo_plano()
 
     def _verificar_conexao(self):
         """Verifica conexão com Ollama"""
         self.status_processamento.configure(text="🔄 Verificando conexão...", text_color="orange")
         self.status_indicator.configure(text_color="orange")
         
-        def verificar():
-            sucesso = agente_ia.testar_conexao()
-            if sucesso:
-                # Se conectou, testa se realmente responde
-                self.janela.after(0, self._testar_resposta_ia)
-            else:
-                self.janela.after(0, lambda: self._processar_resultado_conexao(False))
-        
-        threading.Thread(target=verificar, daemon=True).start()
+        # Pedido explícito do usuário ignora o estado em cache
+        self._checar_conexao_em_segundo_plano(forcar=True)
 
     def _tentar_reconexao_manual(self):
         """Tenta reconexão manual quando solicitado pelo usuário"""
@@ -292,16 +304,7 @@ Bem-vindo! Estou aqui para ajudá-lo com análises de dados do sistema.
         self.status_indicator.configure(text_color="orange")
         self._adicionar_mensagem_chat("sistema", "Tentando reconectar com a IA...")
         
-        def reconectar():
-            # Primeiro testa conexão básica
-            sucesso = agente_ia.testar_conexao()
-            if sucesso:
-                # Se conectou, testa resposta
-                self.janela.after(0, self._testar_resposta_ia)
-            else:
-                self.janela.after(0, lambda: self._processar_resultado_conexao(False))
-        
-        threading.Thread(target=reconectar, daemon=True).start()
+        self._checar_conexao_em_segundo_plano(forcar=True)
 
     def _processar_resultado_conexao(self, sucesso):
         """Processa resultado da verificação de conexão"""
@@ -330,24 +333,26 @@ Bem-vindo! Estou aqui para ajudá-lo com análises de dados do sistema.
 
     def _testar_resposta_ia(self):
         """Testa se a IA realmente responde"""
-        def testar():
-            try:
-                # Usa o método testar_modelo otimizado do agente_ia
-                teste_ok, mensagem = agente_ia.testar_modelo()
-                
-                if teste_ok:
-                    log_operacao("AGENTE_IA_VIEW", f"IA testada com sucesso: {mensagem}")
-                    self.janela.after(0, self._mostrar_ia_funcionando)
-                else:
-                    log_erro(f"AGENTE_IA_VIEW: Falha no teste da IA: {mensagem}")
-                    self.janela.after(0, lambda: self._mostrar_conexao_com_erro(mensagem))
-                    
-            except Exception as e:
-                error_msg = str(e)
-                log_erro(f"AGENTE_IA_VIEW: Exceção no teste da IA: {error_msg}")
-                self.janela.after(0, lambda err=error_msg: self._mostrar_conexao_com_erro(err))
-        
-        threading.Thread(target=testar, daemon=True).start()
+        def concluir(resultado):
+            teste_ok, mensagem = resultado
+            if teste_ok:
+                log_operacao("AGENTE_IA_VIEW", f"IA testada com sucesso: {mensagem}")
+                self._mostrar_ia_funcionando()
+            else:
+                log_erro(f"AGENTE_IA_VIEW: Falha no teste da IA: {mensagem}")
+                self._mostrar_conexao_com_erro(mensagem)
+
+        def falhar(erro):
+            log_erro(f"AGENTE_IA_VIEW: Exceção no teste da IA: {erro}")
+            self._mostrar_conexao_com_erro(str(erro))
+
+        # Usa o método testar_modelo otimizado do agente_ia (pela fila da IA)
+        enviar_para_ia(
+            agente_ia.testar_modelo,
+            prioridade=PRIORIDADE_CHAT, identidade=("testar_modelo", agente_ia.modelo),
+            widget=self.janela, chave=f"agente_teste_modelo_{id(self)}",
+            ao_concluir=concluir, ao_falhar=falhar,
+        )
 
     def _mostrar_ia_funcionando(self):
         """Mostra que a IA está realmente funcionando"""
@@ -400,7 +405,20 @@ Bem-vindo! Estou aqui para ajudá-lo com análises de dados do sistema.
         self._adicionar_mensagem_chat("erro", mensagem_erro)
 
     def _adicionar_mensagem_chat(self, tipo, mensagem):
-        """Adiciona mensagem formatada ao chat"""
+        """
+        Adiciona mensagem formatada ao chat. Com uma resposta da IA sendo
+        escrita, a mensagem entra antes dela, para não se misturar aos fragmentos.
+        """
+        indice = "inicio_resposta_ia" if self._mensagem_stream_aberta else "end"
+        self._iniciar_mensagem_chat(tipo, indice)
+        self.texto_chat.insert(indice, f"{mensagem}\n")
+        self.texto_chat.insert(indice, "─" * 80 + "\n\n")
+        
+        # Rolagem automática para o final
+        self.texto_chat.see("end")
+
+    def _iniciar_mensagem_chat(self, tipo, indice="end"):
+        """Insere o cabeçalho (hora e remetente) de uma nova mensagem"""
         timestamp = time.strftime("%H:%M:%S")
         self.contador_mensagens_total += 1
         
@@ -430,12 +448,7 @@ Bem-vindo! Estou aqui para ajudá-lo com análises de dados do sistema.
         self.texto_chat.tag_config("erro", foreground="#e74c3c")
         self.texto_chat.tag_config("assistente", foreground="#f39c12")
         
-        self.texto_chat.insert("end", f"[{timestamp}] {prefixo}:\n", tag)
-        self.texto_chat.insert("end", f"{mensagem}\n")
-        self.texto_chat.insert("end", "─" * 80 + "\n\n")
-        
-        # Rolagem automática para o final
-        self.texto_chat.see("end")
+        self.texto_chat.insert(indice, f"[{timestamp}] {prefixo}:\n", tag)
         self._atualizar_contador_mensagens()
 
     def _fazer_pergunta(self):
@@ -448,45 +461,156 @@ Bem-vindo! Estou aqui para ajudá-lo com análises de dados do sistema.
         # Limpar caixa de pergunta
         self.caixa_pergunta.delete("1.0", "end")
         
+        # Uma nova pergunta interrompe a resposta que ainda estiver chegando
+        self._interromper_stream()
         self._adicionar_mensagem_chat("usuario", pergunta)
         
         if self.ia_funcionando:
-            self.status_processamento.configure(text="🔄 Processando com IA...", text_color="orange")
-        else:
-            self.status_processamento.configure(text="🔄 Processando...", text_color="orange")
-        
-        def processar():
-            if self.ia_funcionando:
-                # Usa o novo método com contexto do banco de dados
-                try:
-                    resposta, erro = agente_ia.enviar_pergunta_com_contexto(pergunta)
-                    if erro:
-                        # Se erro, usa assistente
-                        resposta_assistente = self._obter_resposta_assistente(pergunta)
-                        self.janela.after(0, lambda: self._exibir_resposta_assistente(resposta_assistente))
-                        # Tenta reconexão automática
-                        self._tentar_reconexao_automatica()
-                    else:
-                        self.janela.after(0, lambda: self._exibir_resposta_ia(resposta))
-                except Exception as e:
-                    resposta_assistente = self._obter_resposta_assistente(pergunta)
-                    self.janela.after(0, lambda: self._exibir_resposta_assistente(resposta_assistente))
-            else:
-                # Usa modo assistente quando IA não está funcionando
-                resposta = self._obter_resposta_assistente(pergunta)
-                self.janela.after(0, lambda: self._exibir_resposta_assistente(resposta))
+            self._responder_com_ia(pergunta)
+            return
+        
+        # Usa modo assistente quando IA não está funcionando
+        self.status_processamento.configure(text="🔄 Processando...", text_color="orange")
+        executar_em_segundo_plano(
+            self._obter_resposta_assistente, pergunta,
+            widget=self.janela, ao_concluir=self._exibir_resposta_assistente,
+        )
+
+    # ===== RESPOSTA DA IA EM STREAMING =====
+    def _responder_com_ia(self, pergunta):
+        """Gera a resposta da IA no executor e exibe os fragmentos em lotes"""
+        self.status_processamento.configure(text="🔄 Processando com IA...", text_color="orange")
+        fila = queue.Queue()
+        estado = {'fila': fila, 'tarefa': None, 'iniciado': False}
+
+        def processar(tarefa):
+            """Retorna (origem, valor, reconectar) - roda no executor."""
+            recebeu = False
+            try:
+                for fragmento in agente_ia.gerar_resposta_stream(
+                    pergunta, cancelado=lambda: tarefa.cancelada
+                ):
+                    recebeu = True
+                    fila.put(fragmento)
+                if recebeu or tarefa.cancelada:
+                    return "ia", None, False
+                # Resposta vazia: usa assistente e tenta reconexão automática
+                return "assistente", self._obter_resposta_assistente(pergunta), True
+            except ErroIA as e:
+                if recebeu:
+                    return "parcial", str(e), True
+                return "assistente", self._obter_resposta_assistente(pergunta), True
+            except Exception as e:
+                log_ia_erro(f"Erro inesperado na resposta em streaming: {e}")
+                if recebeu:
+                    return "parcial", str(e), False
+                return "assistente", self._obter_resposta_assistente(pergunta), False
+
+        # Chat é interativo: passa na frente das análises de relatório na fila da IA
+        estado['tarefa'] = enviar_para_ia(
+            processar,
+            prioridade=PRIORIDADE_CHAT,
+            widget=self.janela, chave=f"agente_pergunta_{id(self)}", passar_tarefa=True,
+            ao_concluir=lambda resultado: self._finalizar_stream(estado, resultado),
+        )
+        self._stream = estado
+        self._configurar_btn_enviar(gerando=True)
+        self.janela.after(INTERVALO_STREAM_MS, self._descarregar_stream, estado)
+
+    def _descarregar_stream(self, estado):
+        """Escreve no chat o lote de fragmentos recebidos desde a última passada"""
+        if estado is not self._stream or not self.janela or not self.janela.winfo_exists():
+            return
+        self._escrever_fragmentos(estado)
+        self.janela.after(INTERVALO_STREAM_MS, self._descarregar_stream, estado)
+
+    def _escrever_fragmentos(self, estado):
+        fragmentos = []
+        while True:
+            try:
+                fragmentos.append(estado['fila'].get_nowait())
+            except queue.Empty:
+                break
+        if not fragmentos:
+            return
         
-        threading.Thread(target=processar, daemon=True).start()
+        if not estado['iniciado']:
+            estado['iniciado'] = True
+            inicio = self.texto_chat.index("end-1c")
+            self._iniciar_mensagem_chat("ia")
+            # Marcas com gravidade à direita: resposta_ia acompanha o texto da
+            # resposta; inicio_resposta_ia fica antes do cabeçalho e é onde
+            # _adicionar_mensagem_chat insere as mensagens que chegam no meio
+            # (inserir em "end" cairia na posição de resposta_ia e intercalaria)
+            self.texto_chat.mark_set("inicio_resposta_ia", inicio)
+            self.texto_chat.mark_gravity("inicio_resposta_ia", "right")
+            self.texto_chat.mark_set("resposta_ia", "end-1c")
+            self.texto_chat.mark_gravity("resposta_ia", "right")
+            self._mensagem_stream_aberta = True
+            self.status_processamento.configure(text="✍️ IA respondendo...", text_color="orange")
+        
+        self.texto_chat.insert("resposta_ia", "".join(fragmentos))
+        self.texto_chat.see("end")
+
+    def _fechar_mensagem_stream(self, aviso=None):
+        """Encerra a mensagem da IA que estava sendo escrita"""
+        final = "\n"
+        if aviso:
+            final += f"\n{aviso}\n"
+        self.texto_chat.insert("resposta_ia", final + "─" * 80 + "\n\n")
+        self.texto_chat.mark_unset("resposta_ia")
+        self.texto_chat.mark_unset("inicio_resposta_ia")
+        self._mensagem_stream_aberta = False
+        self.texto_chat.see("end")
+
+    def _finalizar_stream(self, estado, resultado):
+        """Recebe o fim da geração (thread do Tk) e fecha a mensagem"""
+        if estado is not self._stream:
+            return
+        self._escrever_fragmentos(estado)
+        self._stream = None
+        self._configurar_btn_enviar(gerando=False)
+        
+        origem, valor, reconectar = resultado
+        if origem == "ia":
+            self._fechar_mensagem_stream()
+            self.status_processamento.configure(text="✅ Resposta da IA", text_color="green")
+        elif origem == "parcial":
+            self._fechar_mensagem_stream(f"⚠️ Resposta interrompida: {valor}")
+            self.status_processamento.configure(text="⚠️ Resposta incompleta", text_color="orange")
+        else:
+            if estado['iniciado']:
+                self._fechar_mensagem_stream()
+            self._exibir_resposta_assistente(valor)
+        if reconectar:
+            self._tentar_reconexao_automatica()
+
+    def _interromper_stream(self):
+        """Cancela a resposta em andamento, mantendo o que já foi exibido"""
+        estado = self._stream
+        if estado is None:
+            return
+        self._stream = None
+        estado['tarefa'].cancelar()
+        self._escrever_fragmentos(estado)
+        if estado['iniciado']:
+            self._fechar_mensagem_stream("⏹️ Resposta interrompida")
+        self._configurar_btn_enviar(gerando=False)
+        self.status_processamento.configure(text="⏹️ Resposta interrompida", text_color="gray")
+        log_ia("Resposta interrompida pelo usuário")
+
+    def _configurar_btn_enviar(self, gerando):
+        """Durante a geração o botão enviar vira botão de parar"""
+        if gerando:
+            self.btn_enviar.configure(text="■", command=self._interromper_stream,
+                                      fg_color="#e74c3c", hover_color="#c0392b")
+        else:
+            self.btn_enviar.configure(text="↑", command=self._fazer_pergunta,
+                                      fg_color="#27ae60", hover_color="#219955")
 
     def _tentar_reconexao_automatica(self):
         """Tenta reconexão automática se detectar problemas"""
-        def reconectar():
-            time.sleep(2)
-            sucesso = agente_ia.testar_conexao()
-            if sucesso:
-                self.janela.after(0, self._testar_resposta_ia)
-        
-        threading.Thread(target=reconectar, daemon=True).start()
+        self.janela.after(2000, lambda: self._checar_conexao_em_segundo_plano(avisar_falha=False))
 
     def _obter_resposta_assistente(self, pergunta):
         """Obtém resposta do assistente - SEMPRE funciona"""
@@ -754,6 +878,9 @@ Posso ajudá-lo com:
 
     def _fechar(self):
         """Fecha a janela"""
+        if self._stream is not None:
+            self._stream['tarefa'].cancelar()
+            self._stream = None
         if self.janela:
             log_operacao("AGENTE_IA_VIEW", "Janela fechada pelo usuário")
             self.janela.destroy()
@@ -2,6 +2,15 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import Toplevel, Label, Entry, Button, messagebox, ttk
 from models import Cliente
+from views.lista_paginada import ListaPaginada
+
+# Expressões SQL usadas para ordenar a listagem paginada por coluna
+ORDENACAO_CLIENTES = {
+    "id": "id",
+    "Nome": "nome",
+    "Email": "COALESCE(email, '')",
+    "Telefone": "COALESCE(telefone, '')",
+}
 
 
 class ClienteForm(ctk.CTkToplevel):
@@ -260,7 +269,16 @@ class ClientesView(ctk.CTkFrame):
 
         # Scrollbar vertical
         v_scrollbar = ttk.Scrollbar(frame_tree, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=v_scrollbar.set)
+
+        # Lista paginada: carrega páginas por id conforme a rolagem
+        self.lista_clientes = ListaPaginada(
+            self.tree, v_scrollbar,
+            colunas="id, nome, email, telefone",
+            origem="clientes",
+            chave_unica="id", descendente=True,
+            ao_carregar=self._atualizar_status_lista,
+            ao_erro=self._erro_carregar_clientes,
+        )
 
         # (removido) Scrollbar horizontal
 
@@ -308,9 +326,6 @@ class ClientesView(ctk.CTkFrame):
         )
         self.status_bar.pack(fill='x', side='bottom', pady=5, padx=10)  # MARGIN LEFT ADICIONADO
 
-        # Estado de ordenação por coluna
-        self._sort_state = {}
-
     def _on_resize_tree_clientes(self, event=None):
         """Handler de resize do frame da Treeview para ajustar larguras."""
         try:
@@ -375,27 +390,7 @@ class ClientesView(ctk.CTkFrame):
     def _sort_by_column(self, col_id):
         """Ordena a Treeview pela coluna clicada, alternando ASC/DESC."""
         try:
-            dados = []
-            for iid in self.tree.get_children(''):
-                val = self.tree.set(iid, col_id)
-                # Tenta converter para inteiro ao ordenar id
-                if col_id == 'id':
-                    try:
-                        chave = int(val)
-                    except Exception:
-                        chave = val
-                else:
-                    chave = str(val).lower() if val is not None else ''
-                dados.append((chave, iid))
-
-            descending = not self._sort_state.get(col_id, False)
-            dados.sort(reverse=descending)
-
-            for index, (_, iid) in enumerate(dados):
-                self.tree.move(iid, '', index)
-
-            # Atualiza estado e feedback na barra de status
-            self._sort_state[col_id] = descending
+            descending = self.lista_clientes.ordenar_por(ORDENACAO_CLIENTES[col_id])
             ordem = 'DESC' if descending else 'ASC'
             self.status_bar.configure(text=f"Lista ordenada por '{col_id}' ({ordem})")
         except Exception as e:
@@ -410,57 +405,35 @@ class ClientesView(ctk.CTkFrame):
         self.entry_busca.delete(0, tk.END)
         self.carregar_clientes()
 
-    def _get_clientes(self, filtro=None):
-        """
-        Método seguro para obter clientes, lidando com diferentes assinaturas do método listar
-        """
-        try:
-            # Verifica se o método listar existe
-            if not hasattr(Cliente, 'listar'):
-                self.status_bar.configure(text="❌ Método 'listar' não encontrado na classe Cliente")
-                return []
-            
-            # Tenta chamar o método listar com filtro
-            if filtro:
-                try:
-                    return Cliente.listar(filtro)
-                except TypeError:
-                    # Se falhar, tenta sem filtro e filtra localmente
-                    todos_clientes = Cliente.listar()
-                    return [c for c in todos_clientes if filtro.lower() in str(c).lower()]
-            else:
-                return Cliente.listar()
-                
-        except Exception as e:
-            self.status_bar.configure(text=f"❌ Erro ao buscar clientes: {str(e)}")
-            return []
+    def _atualizar_status_lista(self, exibidos, ha_mais):
+        """Atualiza a barra de status conforme as páginas carregadas."""
+        filtro = self.entry_busca.get().strip()
+        sufixo = " (role para ver mais)" if ha_mais else ""
+        if filtro:
+            self.status_bar.configure(text=f"✅ {exibidos} cliente(s) exibido(s) para '{filtro}'{sufixo}")
+        else:
+            self.status_bar.configure(text=f"✅ {exibidos} cliente(s) exibido(s){sufixo}")
+
+    def _erro_carregar_clientes(self, erro):
+        self.status_bar.configure(text=f"❌ Erro ao carregar clientes: {str(erro)}")
+        messagebox.showerror("Erro", f"Falha ao carregar clientes: {str(erro)}")
 
     def carregar_clientes(self):
-        """Carrega os clientes na Treeview"""
+        """Carrega a primeira página de clientes na Treeview"""
         try:
             filtro = self.entry_busca.get().strip()
-            
+
             # Atualizar status
             self.status_bar.configure(text="Carregando clientes...")
-            self.update_idletasks()
 
-            # Buscar clientes usando método seguro
-            clientes = self._get_clientes(filtro)
-
-            # Limpar treeview
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-
-            # Adicionar clientes
-            for cliente in clientes:
-                self.tree.insert("", "end", values=cliente)
-
-            # Atualizar status
-            total = len(clientes)
             if filtro:
-                self.status_bar.configure(text=f"✅ {total} cliente(s) encontrado(s) para '{filtro}'")
+                like = f"%{filtro}%"
+                self.lista_clientes.recarregar(
+                    "nome LIKE ? OR email LIKE ? OR telefone LIKE ? OR CAST(id AS TEXT) = ?",
+                    (like, like, like, filtro)
+                )
             else:
-                self.status_bar.configure(text=f"✅ {total} cliente(s) no total")
+                self.lista_clientes.recarregar()
 
         except Exception as e:
             self.status_bar.configure(text=f"❌ Erro ao carregar clientes: {str(e)}")
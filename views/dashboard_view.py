@@ -1,9 +1,14 @@
 # views/dashboard_view.py
 import customtkinter as ctk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 from dashboard import Dashboard
+from executor_tarefas import executar_em_segundo_plano
+from instrumentacao import cronometrado, exportar_metricas, resumo_metricas
 from logs import log_operacao, log_erro
 
+# Métricas exibidas no painel de Performance (as de maior tempo total)
+MAX_METRICAS_PAINEL = 15
+
 class DashboardView:
     def __init__(self, master):
         self.master = master
@@ -34,6 +39,9 @@ class DashboardView:
         # Seção de dados e gráficos
         self._criar_secao_dados()
         
+        # Tempos de banco, telas, relatórios e IA
+        self._criar_secao_performance()
+        
         # Seção de ações
         self._criar_secao_acoes()
         
@@ -163,6 +171,60 @@ class DashboardView:
 
         # REMOVIDO: Container de logs
 
+    def _criar_secao_performance(self):
+        """Cria a seção com os tempos medidos pela instrumentação."""
+        frame_secao = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+        frame_secao.pack(fill="x", pady=(0, 20))
+
+        lbl_titulo_secao = ctk.CTkLabel(
+            frame_secao,
+            text="⚡ Performance",
+            font=ctk.CTkFont(size=18, weight="bold")
+        )
+        lbl_titulo_secao.pack(anchor="center", pady=(0, 12))
+
+        self.frame_performance = ctk.CTkFrame(frame_secao, corner_radius=10)
+        self.frame_performance.pack(fill="x", padx=20)
+
+        colunas = ("Métrica", "N", "p50 ms", "p95 ms", "p99 ms", "Máx ms")
+        self.tree_performance = ttk.Treeview(
+            self.frame_performance,
+            columns=colunas,
+            show="headings",
+            height=8,
+            style="Custom.Treeview"
+        )
+        for coluna in colunas:
+            self.tree_performance.heading(coluna, text=coluna)
+            self.tree_performance.column(coluna, width=90, anchor='center')
+        self.tree_performance.column("Métrica", width=260, anchor='w')
+        self.tree_performance.pack(fill="x", padx=12, pady=(12, 6))
+
+        self.lbl_contadores = ctk.CTkLabel(
+            self.frame_performance,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color=("gray50", "gray40"),
+            wraplength=900,
+            justify="left"
+        )
+        self.lbl_contadores.pack(anchor="w", padx=15, pady=(0, 12))
+
+    def _atualizar_tabela_performance(self, desempenho):
+        """Preenche a tabela de Performance com o resumo da instrumentação."""
+        self.tree_performance.delete(*self.tree_performance.get_children())
+        tempos = list(desempenho['tempos'].items())[:MAX_METRICAS_PAINEL]
+        for nome, tempo in tempos:
+            self.tree_performance.insert("", "end", values=(
+                nome, tempo['contagem'], f"{tempo['p50_ms']:.1f}", f"{tempo['p95_ms']:.1f}",
+                f"{tempo['p99_ms']:.1f}", f"{tempo['max_ms']:.1f}",
+            ))
+        contadores = desempenho['contadores']
+        texto = " · ".join(f"{nome}: {valor}" for nome, valor in contadores.items())
+        self.lbl_contadores.configure(
+            text=f"Desde {desempenho['desde'].replace('T', ' ')}" + (f" | {texto}" if texto else "")
+        )
+
     def _criar_secao_acoes(self):
         """Cria a seção de botões de ação."""
         frame_secao = ctk.CTkFrame(self.main_frame, fg_color="transparent")
@@ -197,6 +259,18 @@ class DashboardView:
         )
         btn_logs.pack(side="left", padx=8)
 
+        btn_exportar = ctk.CTkButton(
+            frame_botoes,
+            text="💾 Exportar Métricas",
+            command=self._exportar_metricas,
+            fg_color=("#6B7280", "#374151"),
+            hover_color=("#4B5563", "#1F2937"),
+            font=ctk.CTkFont(size=14),
+            height=40,
+            width=180
+        )
+        btn_exportar.pack(side="left", padx=8)
+
     def _criar_card_moderno(self, config, parent):
         """Cria um card moderno individual com tamanho aumentado."""
         card = ctk.CTkFrame(
@@ -329,7 +403,7 @@ class DashboardView:
         for card_config in cards_linha2:
             self._criar_card_moderno(card_config, self.frame_cards_linha2)
 
-    def _criar_tabela_evolucao(self):
+    def _criar_tabela_evolucao(self, dados_evolucao):
         """Cria a tabela de evolução mensal com textos maiores."""
         for widget in self.frame_evolucao.winfo_children():
             widget.destroy()
@@ -343,8 +417,6 @@ class DashboardView:
         lbl_titulo.pack(anchor="w", padx=15, pady=(15, 12))
 
         try:
-            dados_evolucao = self.dashboard.get_evolucao_pedidos(30)
-            
             if not dados_evolucao:
                 ctk.CTkLabel(
                     self.frame_evolucao,
@@ -425,7 +497,7 @@ class DashboardView:
                 font=ctk.CTkFont(size=12)
             ).pack(padx=15, pady=20)
 
-    def _criar_lista_status(self):
+    def _criar_lista_status(self, dados):
         """Cria a lista de status do sistema com textos maiores."""
         for widget in self.frame_status.winfo_children():
             widget.destroy()
@@ -438,8 +510,6 @@ class DashboardView:
         lbl_titulo.pack(anchor="w", padx=15, pady=(15, 12))
 
         try:
-            dados = self.dashboard.get_pedidos_por_status()
-            
             if not dados:
                 ctk.CTkLabel(
                     self.frame_status,
@@ -478,7 +548,7 @@ class DashboardView:
                 font=ctk.CTkFont(size=11)
             ).pack(padx=15, pady=12)
 
-    def _criar_lista_top_clientes(self):
+    def _criar_lista_top_clientes(self, dados):
         """Cria a lista de top clientes com textos maiores."""
         for widget in self.frame_top_clientes.winfo_children():
             widget.destroy()
@@ -491,8 +561,6 @@ class DashboardView:
         lbl_titulo.pack(anchor="w", padx=15, pady=(15, 12))
 
         try:
-            dados = self.dashboard.get_top_clientes(5)
-            
             if not dados:
                 ctk.CTkLabel(
                     self.frame_top_clientes,
@@ -534,16 +602,38 @@ class DashboardView:
                 font=ctk.CTkFont(size=11)
             ).pack(padx=15, pady=12)
 
+    @cronometrado("view.dashboard.carregar")
+    def _coletar_dados(self):
+        """Consulta todos os dados do dashboard (roda fora da thread do Tk)."""
+        return {
+            'metricas': self.dashboard.get_metricas_principais(),
+            'metricas_logs': self.dashboard.get_metricas_logs(),
+            'evolucao': self.dashboard.get_evolucao_pedidos(30),
+            'status': self.dashboard.get_pedidos_por_status(),
+            'top_clientes': self.dashboard.get_top_clientes(5),
+            'desempenho': resumo_metricas(),
+        }
+
     def _atualizar_dashboard(self):
-        """Atualiza todos os dados do dashboard."""
+        """Atualiza todos os dados do dashboard em segundo plano."""
+        executar_em_segundo_plano(
+            self._coletar_dados,
+            widget=self.main_frame, chave=f"dashboard_{id(self)}",
+            ao_concluir=self._exibir_dados,
+            ao_falhar=lambda e: log_erro(f"Erro ao atualizar dashboard: {str(e)}"),
+        )
+
+    def _exibir_dados(self, dados):
+        """Recria cards, tabela e listas com os dados coletados."""
         try:
-            metricas = self.dashboard.get_metricas_principais()
-            metricas_logs = self.dashboard.get_metricas_logs()
+            metricas = dados['metricas']
+            metricas_logs = dados['metricas_logs']
 
             self._criar_cards_metricas(metricas, metricas_logs)
-            self._criar_tabela_evolucao()
-            self._criar_lista_status()
-            self._criar_lista_top_clientes()
+            self._criar_tabela_evolucao(dados['evolucao'])
+            self._criar_lista_status(dados['status'])
+            self._criar_lista_top_clientes(dados['top_clientes'])
+            self._atualizar_tabela_performance(dados['desempenho'])
 
             from utils import formatar_moeda
             log_operacao(
@@ -554,6 +644,19 @@ class DashboardView:
         except Exception as e:
             log_erro(f"Erro ao atualizar dashboard: {str(e)}")
 
+    def _exportar_metricas(self):
+        """Grava as métricas e os rastros de desempenho em JSON (pasta logs)."""
+        def concluir(caminho):
+            log_operacao("DASHBOARD", "Métricas de desempenho exportadas", caminho)
+            messagebox.showinfo("Performance", f"Métricas exportadas para:\n{caminho}")
+
+        executar_em_segundo_plano(
+            exportar_metricas,
+            widget=self.main_frame, chave=f"dashboard_exportar_{id(self)}",
+            ao_concluir=concluir,
+            ao_falhar=lambda e: messagebox.showerror("Erro", f"Erro ao exportar métricas: {e}"),
+        )
+
     def _ver_logs_detalhados(self):
         """Abre visualização de logs detalhados."""
         from views.logs_views import LogsView
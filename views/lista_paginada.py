@@ -0,0 +1,271 @@
+# views/lista_paginada.py
+"""
+Listagem virtual paginada para ttk.Treeview.
+
+Em vez de buscar a tabela inteira e inserir todas as linhas no Tk, carrega
+páginas sob demanda conforme o usuário rola a lista, usando paginação por
+chave (keyset): cada página continua a partir da última chave exibida,
+com WHERE (ordem, id) < (?, ?) e LIMIT, sem OFFSET nem COUNT(*).
+
+A Treeview mantém no máximo 'max_paginas' páginas; ao passar desse limite a
+página mais distante é descartada e recarregada se o usuário voltar até ela.
+
+As consultas rodam no executor de tarefas; uma recarga (nova busca, filtro
+ou ordenação) cancela a página que ainda estiver sendo buscada. O tempo da
+recarga até a primeira página na tela vai para a métrica
+"view.<nome>.carregar" (nome padrão: a primeira palavra de 'origem').
+
+Uso:
+    lista = ListaPaginada(
+        tree, scrollbar,
+        colunas="p.id, c.nome, p.data, p.total, p.status",
+        origem="pedidos p INNER JOIN clientes c ON p.cliente_id = c.id",
+        chave_unica="p.id", ordem="p.data", descendente=True,
+    )
+    lista.recarregar("p.status = ?", ("Pendente",))
+"""
+import time
+from collections import deque
+
+from db import executar_com_retentativa, get_connection
+from executor_tarefas import executar_em_segundo_plano
+from instrumentacao import registrar_tempo, span
+from logs import log_erro
+
+
+class ListaPaginada:
+    """Controla uma Treeview carregando páginas por chave conforme a rolagem."""
+
+    def __init__(self, tree, scrollbar, colunas, origem, chave_unica, ordem=None,
+                 descendente=False, formatar=None, tamanho_pagina=200, max_paginas=5,
+                 ao_carregar=None, ao_erro=None, db_path=None, nome=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.colunas = colunas
+        self.origem = origem
+        self.chave_unica = chave_unica
+        self.ordem = ordem or chave_unica
+        self.descendente = descendente
+        self.formatar = formatar or (lambda linha: linha)
+        self.tamanho_pagina = tamanho_pagina
+        self.max_paginas = max_paginas
+        self.ao_carregar = ao_carregar
+        self.ao_erro = ao_erro
+        self.db_path = db_path
+        self.nome = nome or origem.split()[0]
+        self._chave_tarefa = f"lista_paginada_{id(self)}"
+
+        self._filtro = ""
+        self._parametros = ()
+        # Cada página: {'inicio': chave, 'fim': chave, 'itens': [iid, ...]}
+        self._paginas = deque()
+        self._ha_mais_abaixo = False
+        self._ha_mais_acima = False
+        self._carregando = False
+        self._agendado = None
+        self._inicio_carga = None
+
+        self.tree.configure(yscrollcommand=self._ao_rolar)
+
+    # === CONSULTA ===
+    def _expressoes_chave(self):
+        if self.ordem == self.chave_unica:
+            return [self.chave_unica]
+        return [self.ordem, self.chave_unica]
+
+    def _montar_consulta(self, apos=None, antes=None):
+        """
+        Monta a consulta da página após (rolagem para baixo) ou antes (para cima)
+        da chave informada. Retorna (sql, parametros, tamanho_chave, para_cima).
+        """
+        chaves = self._expressoes_chave()
+        quantidade = len(chaves)
+        para_cima = antes is not None
+        # Para cima percorre o índice no sentido inverso e depois desvira
+        descendente = self.descendente != para_cima
+        direcao = "DESC" if descendente else "ASC"
+
+        condicoes = []
+        parametros = list(self._parametros)
+        if self._filtro:
+            condicoes.append(f"({self._filtro})")
+        referencia = antes if para_cima else apos
+        if referencia is not None:
+            operador = "<" if descendente else ">"
+            if quantidade == 1:
+                condicoes.append(f"{chaves[0]} {operador} ?")
+            else:
+                marcadores = ", ".join("?" * quantidade)
+                condicoes.append(f"({', '.join(chaves)}) {operador} ({marcadores})")
+            parametros.extend(referencia)
+
+        sql = f"SELECT {self.colunas}, {', '.join(chaves)} FROM {self.origem}"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        sql += " ORDER BY " + ", ".join(f"{c} {direcao}" for c in chaves)
+        sql += " LIMIT ?"
+        parametros.append(self.tamanho_pagina)
+        return sql, parametros, quantidade, para_cima
+
+    def _buscar(self, sql, parametros, quantidade, para_cima):
+        """Executa a consulta da página (roda no executor, fora da thread do Tk)."""
+        def executar():
+            conn = get_connection(self.db_path)
+            try:
+                return conn.execute(sql, parametros).fetchall()
+            finally:
+                conn.close()
+
+        with span("db.pagina", lista=self.nome):
+            linhas = executar_com_retentativa(executar)
+        if para_cima:
+            linhas.reverse()
+        return [(tuple(linha[:-quantidade]), tuple(linha[-quantidade:])) for linha in linhas]
+
+    def _buscar_em_segundo_plano(self, ao_concluir, apos=None, antes=None):
+        self._carregando = True
+        executar_em_segundo_plano(
+            self._buscar, *self._montar_consulta(apos=apos, antes=antes),
+            widget=self.tree, chave=self._chave_tarefa,
+            ao_concluir=ao_concluir, ao_falhar=self._falhou,
+        )
+
+    # === CARGA DE PÁGINAS ===
+    def recarregar(self, filtro="", parametros=()):
+        """Limpa a lista e carrega a primeira página com o filtro SQL informado."""
+        self._filtro = filtro or ""
+        self._parametros = tuple(parametros)
+        self._inicio_carga = time.perf_counter()
+        self._cancelar_agendamento()
+        self._paginas.clear()
+        self.tree.delete(*self.tree.get_children())
+        self._ha_mais_abaixo = True
+        self._ha_mais_acima = False
+        self.tree.yview_moveto(0)
+        # A nova busca usa a mesma chave e cancela a página pendente
+        self._carregando = False
+        self._carregar_abaixo()
+
+    def ordenar_por(self, ordem):
+        """
+        Ordena pela expressão SQL informada, alternando ASC/DESC a cada clique
+        na mesma coluna. Retorna True se a nova ordem for decrescente.
+        """
+        if ordem == self.ordem:
+            self.descendente = not self.descendente
+        else:
+            self.ordem = ordem
+            self.descendente = True
+        self.recarregar(self._filtro, self._parametros)
+        return self.descendente
+
+    def _carregar_abaixo(self):
+        if self._carregando or not self._ha_mais_abaixo:
+            return
+        ultima = self._paginas[-1]['fim'] if self._paginas else None
+        self._buscar_em_segundo_plano(self._inserir_abaixo, apos=ultima)
+
+    def _inserir_abaixo(self, linhas):
+        self._carregando = False
+        self._ha_mais_abaixo = len(linhas) == self.tamanho_pagina
+        if linhas:
+            itens = [self.tree.insert("", "end", values=self.formatar(valores)) for valores, _ in linhas]
+            self._paginas.append({'inicio': linhas[0][1], 'fim': linhas[-1][1], 'itens': itens})
+            if len(self._paginas) > self.max_paginas:
+                self._descartar_pagina(self._paginas.popleft(), no_topo=True)
+                self._ha_mais_acima = True
+        if self._inicio_carga is not None:
+            # Da recarga até a primeira página inserida na Treeview
+            registrar_tempo(f"view.{self.nome}.carregar", (time.perf_counter() - self._inicio_carga) * 1000)
+            self._inicio_carga = None
+        self._notificar()
+
+    def _carregar_acima(self):
+        if self._carregando or not self._ha_mais_acima or not self._paginas:
+            return
+        self._buscar_em_segundo_plano(self._inserir_acima, antes=self._paginas[0]['inicio'])
+
+    def _inserir_acima(self, linhas):
+        self._carregando = False
+        self._ha_mais_acima = len(linhas) == self.tamanho_pagina
+        if linhas:
+            topo = self._indice_topo()
+            itens = [
+                self.tree.insert("", indice, values=self.formatar(valores))
+                for indice, (valores, _) in enumerate(linhas)
+            ]
+            self._paginas.appendleft({'inicio': linhas[0][1], 'fim': linhas[-1][1], 'itens': itens})
+            self._mover_topo(topo + len(itens))
+            if len(self._paginas) > self.max_paginas:
+                self._descartar_pagina(self._paginas.pop(), no_topo=False)
+                self._ha_mais_abaixo = True
+        self._notificar()
+
+    def _falhou(self, erro):
+        """Interrompe a carga automática e repassa o erro à view."""
+        self._carregando = False
+        self._ha_mais_abaixo = False
+        self._ha_mais_acima = False
+        self._inicio_carga = None
+        if self.ao_erro:
+            self.ao_erro(erro)
+        else:
+            log_erro(f"Erro ao carregar página da lista: {erro}")
+
+    def _descartar_pagina(self, pagina, no_topo):
+        """Remove da Treeview as linhas de uma página, mantendo a posição visível."""
+        topo = self._indice_topo()
+        self.tree.delete(*pagina['itens'])
+        if no_topo:
+            self._mover_topo(topo - len(pagina['itens']))
+
+    # === ROLAGEM ===
+    def _indice_topo(self):
+        total = len(self.tree.get_children())
+        return int(round(float(self.tree.yview()[0]) * total))
+
+    def _mover_topo(self, indice):
+        total = len(self.tree.get_children())
+        if total:
+            self.tree.yview_moveto(max(indice, 0) / total)
+
+    def _ao_rolar(self, primeiro, ultimo):
+        """yscrollcommand da Treeview: atualiza a barra e agenda novas páginas."""
+        if self.scrollbar is not None:
+            self.scrollbar.set(primeiro, ultimo)
+        if self._carregando or self._agendado is not None:
+            return
+        if float(ultimo) >= 0.9 and self._ha_mais_abaixo:
+            self._agendado = self.tree.after_idle(self._executar_agendado, self._carregar_abaixo)
+        elif float(primeiro) <= 0.1 and self._ha_mais_acima:
+            self._agendado = self.tree.after_idle(self._executar_agendado, self._carregar_acima)
+
+    def _executar_agendado(self, carregar):
+        self._agendado = None
+        try:
+            carregar()
+        except Exception as e:
+            log_erro(f"Erro ao carregar página da lista: {e}")
+
+    def _cancelar_agendamento(self):
+        if self._agendado is not None:
+            try:
+                self.tree.after_cancel(self._agendado)
+            except Exception:
+                pass
+            self._agendado = None
+
+    # === ESTADO ===
+    @property
+    def linhas_exibidas(self):
+        """Quantidade de linhas atualmente na Treeview."""
+        return sum(len(pagina['itens']) for pagina in self._paginas)
+
+    @property
+    def ha_mais(self):
+        """True se ainda existem linhas a carregar em alguma direção."""
+        return self._ha_mais_abaixo or self._ha_mais_acima
+
+    def _notificar(self):
+        if self.ao_carregar:
+            self.ao_carregar(self.linhas_exibidas, self.ha_mais)
@@ -4,13 +4,36 @@ import customtkinter as ctk
 import tkinter as tk  # ainda utilizado para constantes, Text e messagebox
 from tkinter import messagebox
 import os
+import time
 from datetime import datetime
-from logs import log_operacao, log_erro
+from logs import log_operacao, log_erro, caminho_arquivo_log, LeitorIncrementalLog
+from executor_tarefas import executar_em_segundo_plano
+from indice_logs import buscar_logs, indice_logs, sincronizar_logs
+from instrumentacao import cronometrado, registrar_tempo
+
+# Linhas mantidas no Text; as mais antigas saem conforme chegam novas
+MAX_LINHAS_LOGS = 5000
+INTERVALO_ATUALIZACAO_MS = 2000
+
+# Filtros da busca indexada
+PERIODOS_BUSCA = {"Hoje": 1, "7 dias": 7, "30 dias": 30, "Tudo": None}
+NIVEIS_BUSCA = {
+    "Todos": None,
+    "Erros": ["ERROR", "CRITICAL"],
+    "Avisos e erros": ["WARNING", "ERROR", "CRITICAL"],
+    "Info": ["INFO"],
+}
+TODOS_MODULOS = "Todos"
 
 
 class LogsView:
     def __init__(self, master):
         self.master = master
+        self.leitor = LeitorIncrementalLog(caminho_arquivo_log())
+        self._lendo = False
+        self._aviso_vazio = False
+        # Com resultados de busca na tela, o acompanhamento do arquivo fica pausado
+        self._modo_busca = False
         self._criar_janela()
 
     def _criar_janela(self):
@@ -74,6 +97,24 @@ class LogsView:
         self.label_resultados = ctk.CTkLabel(frame_busca_linha, text="Nenhuma busca")
         self.label_resultados.pack(side=tk.RIGHT, padx=(10, 0))
 
+        frame_filtros = ctk.CTkFrame(frame_busca)
+        frame_filtros.pack(fill=tk.X, pady=(6, 0))
+
+        ctk.CTkLabel(frame_filtros, text="Período:").pack(side=tk.LEFT, padx=(0, 5))
+        self.combo_periodo = ctk.CTkComboBox(frame_filtros, values=list(PERIODOS_BUSCA), width=110, state="readonly")
+        self.combo_periodo.set("7 dias")
+        self.combo_periodo.pack(side=tk.LEFT, padx=5)
+
+        ctk.CTkLabel(frame_filtros, text="Nível:").pack(side=tk.LEFT, padx=(10, 5))
+        self.combo_nivel = ctk.CTkComboBox(frame_filtros, values=list(NIVEIS_BUSCA), width=140, state="readonly")
+        self.combo_nivel.set("Todos")
+        self.combo_nivel.pack(side=tk.LEFT, padx=5)
+
+        ctk.CTkLabel(frame_filtros, text="Módulo:").pack(side=tk.LEFT, padx=(10, 5))
+        self.combo_modulo = ctk.CTkComboBox(frame_filtros, values=[TODOS_MODULOS], width=180, state="readonly")
+        self.combo_modulo.set(TODOS_MODULOS)
+        self.combo_modulo.pack(side=tk.LEFT, padx=5)
+
         # ========== ÁREA DE LOGS ==========
         frame_logs = ctk.CTkFrame(main_frame)
         frame_logs.pack(fill=tk.BOTH, expand=True)
@@ -134,6 +175,7 @@ class LogsView:
 
         # Carregar logs iniciais
         self._atualizar_logs()
+        self._preparar_indice()
         self._agendar_atualizacao()
         self._centralizar_janela()
         self._trazer_para_frente()
@@ -169,89 +211,166 @@ class LogsView:
         except Exception:
             pass
 
+    def _preparar_indice(self):
+        """Indexa os logs em segundo plano e carrega a lista de módulos do filtro."""
+        executar_em_segundo_plano(
+            lambda: (sincronizar_logs(), indice_logs.modulos())[1],
+            widget=self.janela, chave=f"logs_indice_{id(self)}",
+            ao_concluir=self._preencher_modulos,
+        )
+
+    def _preencher_modulos(self, modulos):
+        self.combo_modulo.configure(values=[TODOS_MODULOS] + list(modulos))
+
     def _executar_busca(self):
+        """Busca no índice de logs (todos os dias, com filtros) fora da thread do Tk."""
         texto_busca = self.entry_busca.get().strip()
-        if not texto_busca:
-            self.status_var.set("Digite um texto para buscar")
+        dias = PERIODOS_BUSCA.get(self.combo_periodo.get())
+        niveis = NIVEIS_BUSCA.get(self.combo_nivel.get())
+        modulo = self.combo_modulo.get()
+        modulo = None if modulo == TODOS_MODULOS else modulo
+        if not texto_busca and not niveis and not modulo:
+            self.status_var.set("Digite um texto ou escolha um nível/módulo para buscar")
             return
 
-        self._limpar_highlights()
-        ocorrencias = []
         self.texto_busca_atual = texto_busca
-        content = self.texto_logs.get(1.0, tk.END)
-        start_idx = "1.0"
+        self._modo_busca = True
+        self.status_var.set("Buscando nos logs...")
+        inicio = time.perf_counter()
+        executar_em_segundo_plano(
+            buscar_logs, texto_busca, dias, niveis, modulo, MAX_LINHAS_LOGS,
+            widget=self.janela, chave=f"logs_busca_{id(self)}",
+            ao_concluir=lambda registros: self._exibir_resultados(registros, inicio),
+            ao_falhar=self._erro_atualizar_logs,
+        )
+
+    def _exibir_resultados(self, registros, inicio):
+        if not self._modo_busca:
+            # Busca limpa antes de o resultado chegar
+            return
+        texto_busca = self.texto_busca_atual
+        self.texto_logs.delete(1.0, tk.END)
+        # Do mais antigo para o mais recente, como no arquivo
+        self.texto_logs.insert(tk.END, "\n".join(
+            f"{r.momento} - {r.nivel} - {r.mensagem}" for r in reversed(registros)
+        ) + "\n")
+
+        total = len(registros)
+        tempo_ms = (time.perf_counter() - inicio) * 1000
+        registrar_tempo("view.logs.busca", tempo_ms)
+        limitado = " (mais recentes)" if total >= MAX_LINHAS_LOGS else ""
+        self.label_resultados.config(text=f"{total} ocorrência(s){limitado}" if total else "Nenhuma ocorrência")
+        if total:
+            if texto_busca:
+                for termo in texto_busca.split():
+                    self._destacar(termo)
+            self.texto_logs.see(tk.END)
+            self.status_var.set(f"{total} registro(s) encontrados em {tempo_ms:.0f} ms | Limpar Busca volta ao acompanhamento")
+            log_operacao("LOGS_VIEW", "Busca executada", detalhes=f"texto='{texto_busca}' ocorrencias={total}",
+                         duracao_ms=round(tempo_ms, 1), linhas=total)
+        else:
+            self.status_var.set(f"'{texto_busca}' não encontrado" if texto_busca else "Nenhum registro com esses filtros")
+            log_operacao("LOGS_VIEW", "Busca sem resultados", detalhes=f"texto='{texto_busca}'")
 
+    def _destacar(self, texto_busca):
+        """Marca as ocorrências do texto (sem diferenciar maiúsculas)."""
+        start_idx = "1.0"
         while True:
-            start_idx = self.texto_logs.search(texto_busca, start_idx, stopindex=tk.END)
+            start_idx = self.texto_logs.search(texto_busca, start_idx, stopindex=tk.END, nocase=True)
             if not start_idx:
                 break
             end_idx = f"{start_idx}+{len(texto_busca)}c"
-            ocorrencias.append((start_idx, end_idx))
             self.texto_logs.tag_add('highlight', start_idx, end_idx)
             start_idx = end_idx
 
-        total = len(ocorrencias)
-        if total > 0:
-            self.label_resultados.config(text=f"{total} ocorrência(s)")
-            self.status_var.set(f"{total} ocorrência(s) de '{texto_busca}'")
-            self.texto_logs.see(ocorrencias[0][0])
-            log_operacao("LOGS_VIEW", "Busca executada", detalhes=f"texto='{texto_busca}' ocorrencias={total}")
-        else:
-            self.label_resultados.config(text="Nenhuma ocorrência")
-            self.status_var.set(f"'{texto_busca}' não encontrado")
-            log_operacao("LOGS_VIEW", "Busca sem resultados", detalhes=f"texto='{texto_busca}'")
-
     def _limpar_busca(self):
         self._limpar_highlights()
         self.entry_busca.delete(0, tk.END)
         self.texto_busca_atual = ""
         self.label_resultados.config(text="Nenhuma busca")
         self.status_var.set("Busca limpa")
+        if self._modo_busca:
+            # Volta a acompanhar o arquivo a partir do final
+            self._modo_busca = False
+            self.leitor.reiniciar()
+            self._atualizar_logs()
         log_operacao("LOGS_VIEW", "Busca limpa")
 
     def _limpar_highlights(self):
         self.texto_logs.tag_remove('highlight', '1.0', tk.END)
 
     def _atualizar_logs(self):
+        """Lê só as linhas novas do log no executor e as acrescenta ao terminar."""
+        if self._modo_busca:
+            self._executar_busca()
+            return
+        # Uma leitura por vez: o leitor guarda o offset e não pode ser usado em paralelo
+        if self._lendo:
+            return
+        self._lendo = True
+        executar_em_segundo_plano(
+            self._ler_logs_atuais,
+            widget=self.janela,
+            ao_concluir=self._exibir_logs, ao_falhar=self._erro_atualizar_logs,
+        )
+
+    def _exibir_logs(self, leitura):
+        self._lendo = False
+        if self._modo_busca:
+            # Resultados de busca na tela: a próxima leitura após a busca recomeça do final
+            return
+        linhas, reiniciado, tamanho = leitura
         try:
-            logs_texto = self._ler_logs_atuais()
+            if reiniciado:
+                self.texto_logs.delete(1.0, tk.END)
+                if not linhas:
+                    self.texto_logs.insert(
+                        tk.END, "📝 Nenhum log encontrado ainda.\nOs logs aparecerão aqui automaticamente.\n"
+                    )
+                    self._aviso_vazio = True
+            if linhas:
+                self._acrescentar_linhas(linhas)
+
+            self.status_var.set(
+                f"📄 {self.leitor.caminho} | {tamanho / 1024:.1f} KB | "
+                f"+{len(linhas)} linha(s) | Atualização: {datetime.now().strftime('%H:%M:%S')}"
+            )
+            if reiniciado:
+                log_operacao("LOGS_VIEW", "Logs carregados na interface", detalhes=f"linhas={len(linhas)}", linhas=len(linhas))
+
+        except Exception as e:
+            self._erro_atualizar_logs(e)
+
+    def _acrescentar_linhas(self, linhas):
+        """Acrescenta ao final e limita o total de linhas mantidas."""
+        if self._aviso_vazio:
             self.texto_logs.delete(1.0, tk.END)
-            self.texto_logs.insert(1.0, logs_texto)
+            self._aviso_vazio = False
 
-            if self.texto_busca_atual:
-                self.entry_busca.delete(0, tk.END)
-                self.entry_busca.insert(0, self.texto_busca_atual)
-                self._executar_busca()
-            else:
-                self.texto_logs.see(tk.END)
+        # Só acompanha o final se o usuário já estava nele (não rola enquanto ele lê)
+        no_final = self.texto_logs.yview()[1] >= 0.999
+        self.texto_logs.insert(tk.END, "\n".join(linhas) + "\n")
 
-            linhas = len(logs_texto.split('\n'))
-            self.status_var.set(f"Logs atualizados - {linhas} linhas")
-            log_operacao("LOGS_VIEW", "Logs atualizados na interface")
+        total = int(self.texto_logs.index("end-1c").split('.')[0]) - 1
+        if total > MAX_LINHAS_LOGS:
+            self.texto_logs.delete("1.0", f"{total - MAX_LINHAS_LOGS + 1}.0")
 
-        except Exception as e:
-            log_erro(f"Erro ao atualizar logs: {str(e)}")
-            self.texto_logs.delete(1.0, tk.END)
-            self.texto_logs.insert(1.0, f"❌ Erro ao carregar logs: {str(e)}")
-            self.status_var.set("Erro ao carregar logs")
+        if no_final:
+            self.texto_logs.see(tk.END)
 
+    def _erro_atualizar_logs(self, e):
+        self._lendo = False
+        log_erro(f"Erro ao atualizar logs: {str(e)}")
+        self.texto_logs.insert(tk.END, f"❌ Erro ao carregar logs: {str(e)}\n")
+        self.status_var.set("Erro ao carregar logs")
+
+    @cronometrado("view.logs.carregar")
     def _ler_logs_atuais(self):
-        data_atual = datetime.now().strftime("%Y-%m-%d")
-        log_file = f'logs/sistema_clientes_pedidos_{data_atual}.log'
-
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r', encoding='utf-8') as f:
-                    conteudo = f.read()
-                    stats = os.stat(log_file)
-                    tamanho_kb = stats.st_size / 1024
-                    info = f"📄 Arquivo: {log_file} | Tamanho: {tamanho_kb:.1f} KB | Atualização: {datetime.now().strftime('%H:%M:%S')}\n"
-                    info += "=" * 80 + "\n"
-                    return info + conteudo
-            except Exception as e:
-                return f"❌ Erro ao ler arquivo de log: {str(e)}"
-        else:
-            return "📝 Nenhum log encontrado para hoje.\nOs logs aparecerão aqui automaticamente."
+        # O sistema pode ter passado a gravar em outro arquivo (novo dia/rotação)
+        caminho = caminho_arquivo_log()
+        if caminho != self.leitor.caminho:
+            self.leitor.reiniciar(caminho)
+        return self.leitor.ler()
 
     def _limpar_tela(self):
         self.texto_logs.delete(1.0, tk.END)
@@ -276,8 +395,9 @@ class LogsView:
     def _agendar_atualizacao(self):
         try:
             if self.janela.winfo_exists():
-                self._atualizar_logs()
-                self.janela.after(5000, self._agendar_atualizacao)
+                if not self._modo_busca:
+                    self._atualizar_logs()
+                self.janela.after(INTERVALO_ATUALIZACAO_MS, self._agendar_atualizacao)
         except tk.TclError:
             pass
 
@@ -2,7 +2,20 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 from decimal import Decimal
-from db import get_connection  # usa seu db.py
+from db import get_connection, consultar, executar_comando  # usa seu db.py
+from executor_tarefas import executar_em_segundo_plano
+from fila_ia import enviar_para_ia, PRIORIDADE_ANALISE
+from logs import log_erro
+from views.lista_paginada import ListaPaginada
+
+# Expressões SQL usadas para ordenar a listagem paginada por coluna
+ORDENACAO_PEDIDOS = {
+    "id": "p.id",
+    "cliente": "c.nome",
+    "data": "p.data",
+    "total": "p.total",
+    "status": "COALESCE(p.status, 'Concluído')",
+}
 
 class PedidosView(ctk.CTkFrame):
     """Tela de gerenciamento de pedidos."""
@@ -13,10 +26,7 @@ class PedidosView(ctk.CTkFrame):
         self.itens_pedido = []
         self.clientes = []
         self.produtos = []
-        self.conn = None
-        self.cursor = None
         self._sincronizar_tema()
-        self._conectar_banco()
         self._criar_widgets()
         self._carregar_clientes()
         self._carregar_produtos()
@@ -29,13 +39,9 @@ class PedidosView(ctk.CTkFrame):
         ctk.set_default_color_theme("blue")
 
     # === CONEXÃO AO BANCO ===
-    def _conectar_banco(self):
-        """Conecta usando o módulo db."""
-        try:
-            self.conn = get_connection()
-            self.cursor = self.conn.cursor()
-        except Exception as e:
-            messagebox.showerror("Erro", f"Falha ao conectar ao banco: {e}")
+    def _alterar_status(self, pedido_id, status):
+        """Grava o novo status do pedido (conexão emprestada só para o comando)."""
+        executar_comando("UPDATE pedidos SET status = ? WHERE id = ?", (status, pedido_id))
 
     # === INTERFACE ===
     def _criar_widgets(self):
@@ -195,7 +201,15 @@ class PedidosView(ctk.CTkFrame):
         self.tree_pedidos.column("status", width=100, anchor="center")
 
         scrollbar_ped_y = ttk.Scrollbar(tree_ped_container, orient="vertical", command=self.tree_pedidos.yview)
-        self.tree_pedidos.configure(yscrollcommand=scrollbar_ped_y.set)
+        # Lista paginada: carrega páginas por (data, id) conforme a rolagem
+        self.lista_pedidos = ListaPaginada(
+            self.tree_pedidos, scrollbar_ped_y,
+            colunas="p.id, c.nome, p.data, p.total, COALESCE(p.status, 'Concluído')",
+            origem="pedidos p INNER JOIN clientes c ON p.cliente_id = c.id",
+            chave_unica="p.id", ordem="p.data", descendente=True,
+            formatar=self._formatar_linha_pedido,
+            ao_erro=self._erro_carregar_pedidos,
+        )
         scrollbar_ped_x = ttk.Scrollbar(tree_ped_container, orient="horizontal", command=self.tree_pedidos.xview)
         self.tree_pedidos.configure(xscrollcommand=scrollbar_ped_x.set)
 
@@ -208,9 +222,6 @@ class PedidosView(ctk.CTkFrame):
         # Bind duplo clique: só abre detalhes se duplo clique for em célula, não cabeçalho
         self.tree_pedidos.bind("<Double-1>", self._on_tree_pedidos_double_click)
 
-        # Estado de ordenação da listagem de pedidos
-        self._sort_pedidos_state = {}
-
         # --- BOTÕES ---
         botoes_frame = ctk.CTkFrame(parent)
         botoes_frame.pack(pady=10, fill="x")
@@ -262,8 +273,7 @@ class PedidosView(ctk.CTkFrame):
                 return
 
             # Atualiza no banco
-            self.cursor.execute("UPDATE pedidos SET status = ? WHERE id = ?", ('Concluído', pedido_id))
-            self.conn.commit()
+            self._alterar_status(pedido_id, 'Concluído')
 
             messagebox.showinfo("Sucesso", f"Pedido #{pedido_id} concluído com sucesso!")
             self._carregar_pedidos()
@@ -292,8 +302,7 @@ class PedidosView(ctk.CTkFrame):
                 return
 
             # Atualiza no banco
-            self.cursor.execute("UPDATE pedidos SET status = ? WHERE id = ?", ('Pendente', pedido_id))
-            self.conn.commit()
+            self._alterar_status(pedido_id, 'Pendente')
             messagebox.showinfo("Sucesso", f"Pedido #{pedido_id} reaberto (Pendente).")
             self._carregar_pedidos()
         except Exception as e:
@@ -328,8 +337,7 @@ class PedidosView(ctk.CTkFrame):
                 return
 
             # Atualiza no banco
-            self.cursor.execute("UPDATE pedidos SET status = ? WHERE id = ?", ('Cancelado', pedido_id))
-            self.conn.commit()
+            self._alterar_status(pedido_id, 'Cancelado')
             messagebox.showinfo("Sucesso", f"Pedido #{pedido_id} cancelado com sucesso.")
             self._carregar_pedidos()
         except Exception as e:
@@ -353,48 +361,26 @@ class PedidosView(ctk.CTkFrame):
             pass
 
     def _sort_pedidos_by(self, col_id):
-        """Ordena a tree de pedidos pela coluna, alternando ASC/DESC."""
+        """Ordena a listagem de pedidos pela coluna (no banco), alternando ASC/DESC."""
         try:
-            dados = []
-            for iid in self.tree_pedidos.get_children(''):
-                val = self.tree_pedidos.set(iid, col_id)
-                chave = val
-                if col_id == 'id':
-                    try:
-                        chave = int(str(val))
-                    except Exception:
-                        chave = str(val)
-                elif col_id == 'total':
-                    # Converter "R$ 1.234,56" -> 1234.56
-                    try:
-                        s = str(val).replace('R$','').strip()
-                        s = s.replace('.', '').replace(',', '.')
-                        chave = float(s)
-                    except Exception:
-                        chave = 0.0
-                elif col_id == 'data':
-                    # Datas já em formato YYYY-MM-DD ordenam bem como string
-                    chave = str(val)
-                else:
-                    chave = str(val).lower() if val is not None else ''
-                dados.append((chave, iid))
-
-            descending = not self._sort_pedidos_state.get(col_id, False)
-            dados.sort(reverse=descending)
-
-            for index, (_, iid) in enumerate(dados):
-                self.tree_pedidos.move(iid, '', index)
-
-            self._sort_pedidos_state[col_id] = descending
-        except Exception:
-            pass
+            self.lista_pedidos.ordenar_por(ORDENACAO_PEDIDOS[col_id])
+        except Exception as e:
+            log_erro(f"Erro ao ordenar pedidos: {e}")
 
     # === CARREGAMENTO DE DADOS ===
     def _carregar_clientes(self):
-        """Carrega os clientes do banco."""
+        """Carrega os clientes do banco em segundo plano."""
+        executar_em_segundo_plano(
+            consultar, "SELECT id, nome FROM clientes",
+            widget=self, chave=f"pedidos_clientes_{id(self)}",
+            ao_concluir=self._preencher_clientes,
+            ao_falhar=lambda e: messagebox.showerror("Erro", f"Erro ao carregar clientes: {e}"),
+        )
+
+    def _preencher_clientes(self, clientes):
+        """Preenche os combos de cliente com o resultado da consulta."""
         try:
-            self.cursor.execute("SELECT id, nome FROM clientes")
-            self.clientes = self.cursor.fetchall()
+            self.clientes = clientes
             if not self.clientes:
                 messagebox.showinfo("Aviso", "Nenhum cliente encontrado no banco.")
             self.combo_cliente["values"] = [f"{cid} - {nome}" for cid, nome in self.clientes]
@@ -407,10 +393,18 @@ class PedidosView(ctk.CTkFrame):
             messagebox.showerror("Erro", f"Erro ao carregar clientes: {e}")
 
     def _carregar_produtos(self):
-        """Carrega os produtos do banco."""
+        """Carrega os produtos do banco em segundo plano."""
+        executar_em_segundo_plano(
+            consultar, "SELECT id, nome, preco FROM produtos",
+            widget=self, chave=f"pedidos_produtos_{id(self)}",
+            ao_concluir=self._preencher_produtos,
+            ao_falhar=lambda e: messagebox.showerror("Erro", f"Erro ao carregar produtos: {e}"),
+        )
+
+    def _preencher_produtos(self, produtos):
+        """Preenche o combo de produtos com o resultado da consulta."""
         try:
-            self.cursor.execute("SELECT id, nome, preco FROM produtos")
-            self.produtos = self.cursor.fetchall()
+            self.produtos = produtos
             if not self.produtos:
                 messagebox.showinfo("Aviso", "Nenhum produto cadastrado.")
             self.combo_produto["values"] = [f"{pid} - {nome}" for pid, nome, _ in self.produtos]
@@ -516,19 +510,28 @@ class PedidosView(ctk.CTkFrame):
             cliente_id = int(cliente_texto.split(" - ")[0])
             total = sum(item["subtotal"] for item in self.itens_pedido)
 
-            self.cursor.execute(
-                "INSERT INTO pedidos (cliente_id, data, total, status) VALUES (?, DATE('now'), ?, ?)", 
-                (cliente_id, total, 'Pendente')
-            )
-            pedido_id = self.cursor.lastrowid
-
-            for item in self.itens_pedido:
-                self.cursor.execute(
-                    "INSERT INTO itens_pedido (pedido_id, produto_id, quantidade, preco_unit) VALUES (?, ?, ?, ?)",
-                    (pedido_id, item["produto_id"], item["quantidade"], item["preco_unitario"])
+            # Pedido e itens na mesma transação: qualquer falha desfaz tudo
+            conn = get_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO pedidos (cliente_id, data, total, status) VALUES (?, DATE('now'), ?, ?)", 
+                    (cliente_id, total, 'Pendente')
                 )
-
-            self.conn.commit()
+                pedido_id = cursor.lastrowid
+
+                for item in self.itens_pedido:
+                    cursor.execute(
+                        "INSERT INTO itens_pedido (pedido_id, produto_id, quantidade, preco_unit) VALUES (?, ?, ?, ?)",
+                        (pedido_id, item["produto_id"], item["quantidade"], item["preco_unitario"])
+                    )
+
+                conn.confirmar({'pedidos', 'itens_pedido'})
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
             messagebox.showinfo("Sucesso", f"Pedido #{pedido_id} salvo com sucesso!")
             self._limpar_campos()
             
@@ -552,116 +555,54 @@ class PedidosView(ctk.CTkFrame):
         self.lbl_total.configure(text=f"Total: {formatar_moeda(0)}")
 
     # === LISTAGEM DE PEDIDOS ===
+    def _formatar_linha_pedido(self, linha):
+        """Converte uma linha (id, cliente, data, total, status) para exibição."""
+        from utils import formatar_moeda
+        pedido_id, cliente, data, total, status = linha
+        return (pedido_id, cliente, data, formatar_moeda(total), status)
+
+    def _erro_carregar_pedidos(self, erro):
+        log_erro(f"Erro ao carregar pedidos: {erro}")
+        messagebox.showerror("Erro", f"Erro ao carregar pedidos: {erro}")
+
     def _carregar_pedidos(self):
-        """Carrega todos os pedidos do banco."""
+        """Carrega a primeira página de pedidos (as demais vêm com a rolagem)."""
         try:
-            # Verificar se o widget existe
             if not hasattr(self, 'tree_pedidos'):
-                print("[ERRO] tree_pedidos ainda não foi criado")
                 return
-            
-            # Reconectar ao banco se necessário
-            if self.conn is None or self.cursor is None:
-                print("[DEBUG] Reconectando ao banco...")
-                self._conectar_banco()
-            
-            print("[DEBUG] Iniciando carregamento de pedidos...")
-            print(f"[DEBUG] Conexão: {self.conn}")
-            print(f"[DEBUG] Cursor: {self.cursor}")
-            
-            # Testar conexão
-            self.cursor.execute("SELECT COUNT(*) FROM pedidos")
-            total_pedidos = self.cursor.fetchone()[0]
-            print(f"[DEBUG] Total no banco: {total_pedidos}")
-            
-            # Limpar árvore
-            for item in self.tree_pedidos.get_children():
-                self.tree_pedidos.delete(item)
-
-            # Buscar pedidos com nome do cliente
-            query = """
-                SELECT p.id, c.nome, p.data, p.total, COALESCE(p.status, 'Concluído') as status
-                FROM pedidos p
-                INNER JOIN clientes c ON p.cliente_id = c.id
-                ORDER BY p.data DESC, p.id DESC
-            """
-            self.cursor.execute(query)
-            pedidos = self.cursor.fetchall()
-
-            print(f"[DEBUG] Pedidos encontrados no JOIN: {len(pedidos)}")
-
-            # Atualizar combo de filtro de clientes
-            if pedidos:
-                clientes_unicos = sorted(set(p[1] for p in pedidos))
-                self.combo_filtro_cliente["values"] = ["Todos"] + clientes_unicos
-
-            # Preencher árvore
-            for pedido in pedidos:
-                pedido_id, cliente, data, total, status = pedido
-                from utils import formatar_moeda
-                total_formatado = formatar_moeda(total)
-                self.tree_pedidos.insert("", "end", values=(pedido_id, cliente, data, total_formatado, status))
-                if pedido_id <= 5:  # Mostrar apenas os 5 primeiros no log
-                    print(f"[DEBUG] Pedido inserido: #{pedido_id} - {cliente}")
 
-            print(f"[DEBUG] OK - Total de {len(pedidos)} pedido(s) carregado(s) com sucesso!")
+            # Combo de filtro usa os clientes já carregados, sem reler pedidos
+            if self.clientes:
+                self.combo_filtro_cliente["values"] = ["Todos"] + sorted(set(nome for _, nome in self.clientes))
+
+            self.lista_pedidos.recarregar()
 
         except Exception as e:
-            print(f"[ERRO] Erro ao carregar pedidos: {e}")
-            import traceback
-            traceback.print_exc()
+            log_erro(f"Erro ao carregar pedidos: {e}")
             messagebox.showerror("Erro", f"Erro ao carregar pedidos: {e}")
 
     def _filtrar_pedidos(self):
         """Filtra pedidos por cliente e status."""
         try:
-            # Reconectar ao banco se necessário
-            if self.conn is None or self.cursor is None:
-                self._conectar_banco()
-            
-            # Limpar árvore
-            for item in self.tree_pedidos.get_children():
-                self.tree_pedidos.delete(item)
-
-            # Montar query com filtros
-            query = """
-                SELECT p.id, c.nome, p.data, p.total, COALESCE(p.status, 'Concluído') as status
-                FROM pedidos p
-                INNER JOIN clientes c ON p.cliente_id = c.id
-                WHERE 1=1
-            """
+            condicoes = []
             params = []
 
             # Filtro cliente
             cliente_filtro = self.combo_filtro_cliente.get()
             if cliente_filtro and cliente_filtro != "Todos":
-                query += " AND c.nome = ?"
+                condicoes.append("c.nome = ?")
                 params.append(cliente_filtro)
 
             # Filtro status
             status_filtro = self.combo_filtro_status.get()
             if status_filtro and status_filtro != "Todos":
-                query += " AND COALESCE(p.status, 'Concluído') = ?"
+                condicoes.append("COALESCE(p.status, 'Concluído') = ?")
                 params.append(status_filtro)
 
-            query += " ORDER BY p.data DESC, p.id DESC"
-
-            self.cursor.execute(query, params)
-            pedidos = self.cursor.fetchall()
-
-            # Preencher árvore
-            for pedido in pedidos:
-                pedido_id, cliente, data, total, status = pedido
-                from utils import formatar_moeda
-                total_formatado = formatar_moeda(total)
-                self.tree_pedidos.insert("", "end", values=(pedido_id, cliente, data, total_formatado, status))
-
-            print(f"[DEBUG] Filtro aplicado: {len(pedidos)} pedido(s) encontrado(s)")
+            self.lista_pedidos.recarregar(" AND ".join(condicoes), params)
 
         except Exception as e:
-            print(f"[ERRO] Erro ao filtrar pedidos: {e}")
-            import traceback
-            traceback.print_exc()
+            log_erro(f"Erro ao filtrar pedidos: {e}")
             messagebox.showerror("Erro", f"Erro ao filtrar pedidos: {e}")
 
     def _limpar_filtros(self):
@@ -682,28 +623,30 @@ class PedidosView(ctk.CTkFrame):
             item = self.tree_pedidos.item(selecionado[0])
             pedido_id = item["values"][0]
 
-            # Buscar detalhes do pedido
-            self.cursor.execute("""
-                SELECT p.id, c.nome, c.email, c.telefone, p.data, p.total, COALESCE(p.status, 'Concluído') as status
-                FROM pedidos p
-                INNER JOIN clientes c ON p.cliente_id = c.id
-                WHERE p.id = ?
-            """, (pedido_id,))
-            pedido = self.cursor.fetchone()
+            conn = get_connection()
+            try:
+                # Buscar detalhes do pedido
+                pedido = conn.execute("""
+                    SELECT p.id, c.nome, c.email, c.telefone, p.data, p.total, COALESCE(p.status, 'Concluído') as status
+                    FROM pedidos p
+                    INNER JOIN clientes c ON p.cliente_id = c.id
+                    WHERE p.id = ?
+                """, (pedido_id,)).fetchone()
+
+                # Buscar itens do pedido
+                itens = conn.execute("""
+                    SELECT pr.nome, i.quantidade, i.preco_unit, (i.quantidade * i.preco_unit) as subtotal
+                    FROM itens_pedido i
+                    INNER JOIN produtos pr ON i.produto_id = pr.id
+                    WHERE i.pedido_id = ?
+                """, (pedido_id,)).fetchall()
+            finally:
+                conn.close()
 
             if not pedido:
                 messagebox.showerror("Erro", "Pedido não encontrado.")
                 return
 
-            # Buscar itens do pedido
-            self.cursor.execute("""
-                SELECT pr.nome, i.quantidade, i.preco_unit, (i.quantidade * i.preco_unit) as subtotal
-                FROM itens_pedido i
-                INNER JOIN produtos pr ON i.produto_id = pr.id
-                WHERE i.pedido_id = ?
-            """, (pedido_id,))
-            itens = self.cursor.fetchall()
-
             # Montar mensagem com detalhes
             pid, cliente, email, telefone, data, total, status = pedido
             from utils import formatar_moeda
@@ -778,14 +721,20 @@ DETALHES DO PEDIDO #{pid}
         )
         loading_label.pack(expand=True)
 
-        # Força atualização da UI para mostrar a mensagem
-        self.update()
+        from utils import analisar_pedidos
 
-        try:
-            from utils import analisar_pedidos
-
-            resultado = analisar_pedidos(db_path='clientes_pedidos.db', periodo_dias=30)
+        # Análise usa o modelo: vai pela fila da IA, agrupando cliques repetidos
+        enviar_para_ia(
+            analisar_pedidos, db_path='clientes_pedidos.db', periodo_dias=30,
+            prioridade=PRIORIDADE_ANALISE, identidade=("analisar_pedidos", 'clientes_pedidos.db', 30),
+            widget=self, chave=f"pedidos_analise_{id(self)}",
+            ao_concluir=self._exibir_analise_pedidos,
+            ao_falhar=self._erro_analise_pedidos,
+        )
 
+    def _exibir_analise_pedidos(self, resultado):
+        """Mostra o resultado da análise de pedidos (thread da interface)."""
+        try:
             # Limpa mensagem de loading
             for widget in self.container_conteudo.winfo_children():
                 widget.destroy()
@@ -852,3 +801,9 @@ MÉTRICAS GERAIS
             # Volta para cadastro
             self._mostrar_cadastro()
 
+    def _erro_analise_pedidos(self, erro):
+        """Trata falha da análise em segundo plano."""
+        for widget in self.container_conteudo.winfo_children():
+            widget.destroy()
+        messagebox.showerror("Erro", f"Erro ao analisar pedidos: {erro}")
+        self._mostrar_cadastro()
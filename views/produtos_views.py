@@ -3,6 +3,15 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from db import consultar, executar_comando, inicializar_banco
 from logs import log_operacao
+from views.lista_paginada import ListaPaginada
+
+# Expressões SQL usadas para ordenar a listagem paginada por coluna
+ORDENACAO_PRODUTOS = {
+    "id": "id",
+    "nome": "nome",
+    "preco": "COALESCE(preco, 0)",
+    "estoque": "COALESCE(estoque, 0)",
+}
 
 
 class ProdutoForm(ctk.CTkToplevel):
@@ -386,7 +395,6 @@ class ProdutosView(ctk.CTkFrame):
 
         # Scrollbars dentro do contêiner
         v_scrollbar = ttk.Scrollbar(tabela_container, orient="vertical", command=self.tabela.yview)
-        self.tabela.configure(yscrollcommand=v_scrollbar.set)
         h_scrollbar = ttk.Scrollbar(tabela_container, orient="horizontal", command=self.tabela.xview)
         self.tabela.configure(xscrollcommand=h_scrollbar.set)
 
@@ -408,8 +416,16 @@ class ProdutosView(ctk.CTkFrame):
         )
         self.status_bar.pack(fill=ctk.X, side=ctk.BOTTOM, pady=5)
 
-        # Estado de ordenação por coluna
-        self._sort_state = {}
+        # Lista paginada: carrega páginas por (nome, id) conforme a rolagem
+        self.lista_produtos = ListaPaginada(
+            self.tabela, v_scrollbar,
+            colunas="id, nome, preco, estoque",
+            origem="produtos",
+            chave_unica="id", ordem="nome",
+            formatar=self._formatar_linha_produto,
+            ao_carregar=self._atualizar_status_lista,
+            ao_erro=self._erro_carregar_produtos,
+        )
 
     def _on_tabela_double_click(self, event):
         """Abre editor apenas se duplo clique ocorrer em célula de linha."""
@@ -427,41 +443,7 @@ class ProdutosView(ctk.CTkFrame):
     def _ordenar_por_coluna(self, col_id):
         """Ordena a tabela pela coluna clicada, alternando ASC/DESC."""
         try:
-            dados = []
-            for iid in self.tabela.get_children(''):
-                val = self.tabela.set(iid, col_id)
-                chave = val
-                if col_id == 'id':
-                    try:
-                        chave = int(str(val))
-                    except Exception:
-                        chave = str(val)
-                elif col_id == 'estoque':
-                    # Pode vir com alerta "⚠️ X"
-                    try:
-                        numeros = ''.join(ch for ch in str(val) if ch.isdigit())
-                        chave = int(numeros) if numeros else 0
-                    except Exception:
-                        chave = 0
-                elif col_id == 'preco':
-                    # Converter "R$ 1.234,56" -> 1234.56
-                    try:
-                        s = str(val).replace('R$','').strip()
-                        s = s.replace('.', '').replace(',', '.')
-                        chave = float(s)
-                    except Exception:
-                        chave = 0.0
-                else:
-                    chave = str(val).lower() if val is not None else ''
-                dados.append((chave, iid))
-
-            descending = not self._sort_state.get(col_id, False)
-            dados.sort(reverse=descending)
-
-            for index, (_, iid) in enumerate(dados):
-                self.tabela.move(iid, '', index)
-
-            self._sort_state[col_id] = descending
+            descending = self.lista_produtos.ordenar_por(ORDENACAO_PRODUTOS[col_id])
             ordem = 'DESC' if descending else 'ASC'
             self.status_bar.configure(text=f"Lista ordenada por '{col_id}' ({ordem})")
         except Exception as e:
@@ -603,55 +585,43 @@ class ProdutosView(ctk.CTkFrame):
         except Exception as e:
             messagebox.showerror("Erro", f"Falha ao verificar estoque: {str(e)}")
 
+    def _formatar_linha_produto(self, linha):
+        """Formata preço em BRL e destaca estoque baixo."""
+        produto_id, nome, preco, estoque = linha
+        estoque = estoque if estoque is not None else 0
+        return (
+            produto_id,
+            nome,
+            self._formatar_preco_brl(preco),
+            f"⚠️ {estoque}" if estoque <= 5 else estoque
+        )
+
+    def _atualizar_status_lista(self, exibidos, ha_mais):
+        """Atualiza a barra de status conforme as páginas carregadas."""
+        filtro = self.busca_entry.get().strip()
+        sufixo = " (role para ver mais)" if ha_mais else ""
+        if filtro:
+            self.status_bar.configure(text=f"✅ {exibidos} produto(s) encontrado(s) para '{filtro}'{sufixo}")
+        else:
+            self.status_bar.configure(text=f"✅ {exibidos} produto(s) carregado(s){sufixo}")
+
+    def _erro_carregar_produtos(self, erro):
+        self.status_bar.configure(text=f"❌ Erro ao carregar produtos: {str(erro)}")
+        messagebox.showerror("Erro", f"Falha ao carregar produtos: {str(erro)}")
+
     def _carregar_produtos(self):
-        """Carrega os produtos do banco e exibe na tabela."""
+        """Carrega a primeira página de produtos na tabela."""
         try:
             # Atualizar status
             self.status_bar.configure(text="Carregando produtos...")
-            self.update_idletasks()
 
             # Obter filtro de busca
             filtro = self.busca_entry.get().strip()
-            
-            if filtro:
-                query = """
-                    SELECT id, nome, preco, estoque 
-                    FROM produtos 
-                    WHERE nome LIKE ? OR id = ?
-                    ORDER BY nome ASC
-                """
-                like_filtro = f'%{filtro}%'
-                produtos = consultar(query, (like_filtro, filtro))
-            else:
-                produtos = consultar("SELECT id, nome, preco, estoque FROM produtos ORDER BY nome ASC")
-
-            # Limpar tabela
-            for item in self.tabela.get_children():
-                self.tabela.delete(item)
 
-            # Adicionar produtos formatados
-            for prod in produtos:
-                # Formatar preço para BRL (R$ com vírgula)
-                preco_formatado = self._formatar_preco_brl(prod[2])
-                estoque = prod[3] if prod[3] is not None else 0
-                
-                item_id = self.tabela.insert("", "end", values=(
-                    prod[0],      # ID
-                    prod[1],      # Nome
-                    preco_formatado,  # Preço formatado BRL
-                    estoque       # Estoque
-                ))
-                
-                # Destacar estoque baixo
-                if estoque <= 5:
-                    self.tabela.set(item_id, "estoque", f"⚠️ {estoque}")
-
-            # Atualizar status
-            total = len(produtos)
             if filtro:
-                self.status_bar.configure(text=f"✅ {total} produto(s) encontrado(s) para '{filtro}'")
+                self.lista_produtos.recarregar("nome LIKE ? OR id = ?", (f'%{filtro}%', filtro))
             else:
-                self.status_bar.configure(text=f"✅ {total} produto(s) carregado(s)")
+                self.lista_produtos.recarregar()
 
         except Exception as e:
             self.status_bar.configure(text=f"❌ Erro ao carregar produtos: {str(e)}")
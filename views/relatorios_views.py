@@ -12,7 +12,6 @@ matplotlib.use('Agg')
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 import customtkinter as ctk
-import threading
 import json
 import numpy as np
 from decimal import Decimal
@@ -40,6 +39,11 @@ except Exception as e:
 
 from logs import log_operacao, log_erro
 from agente_ia import agente_ia
+from db import get_connection
+from agregacao_relatorios import agregar_periodo_em_cache, cache_relatorios, periodo_anterior
+from executor_tarefas import executar_em_segundo_plano
+from fila_ia import enviar_para_ia, PRIORIDADE_RELATORIO
+from instrumentacao import cronometrado, span
 
 
 class RelatorioViews:
@@ -91,40 +95,37 @@ class RelatorioViews:
 
     # --- NOVOS MÉTODOS PARA AS TABELAS SOLICITADAS ---
     def _obter_tabela_clientes_cadastrados(self, data_inicio, data_fim):
+        return cache_relatorios.obter(
+            'clientes_cadastrados', data_inicio, data_fim, "Todos",
+            lambda: self._consultar_clientes_cadastrados(data_inicio, data_fim)
+        )
+
+    def _consultar_clientes_cadastrados(self, data_inicio, data_fim):
         conn = self._conectar_db()
         c = conn.cursor()
         c.execute("""
-            SELECT id, nome, email, telefone, date(created_at) as data_cadastro,
+            SELECT id, nome, email, telefone, created_date as data_cadastro,
                    (SELECT COUNT(*) FROM pedidos WHERE cliente_id = clientes.id) as total_pedidos,
                    (SELECT SUM(total) FROM pedidos WHERE cliente_id = clientes.id) as valor_total_gasto
             FROM clientes 
-            WHERE date(created_at) BETWEEN ? AND ? 
+            WHERE created_date BETWEEN ? AND ? 
             ORDER BY created_at DESC
         """, (data_inicio, data_fim))
-        clientes = c.fetchall()
+        clientes = tuple(c.fetchall())
         conn.close()
         return clientes
 
     def _obter_tabela_top_5_clientes(self, data_inicio, data_fim):
-        conn = self._conectar_db()
-        c = conn.cursor()
-        c.execute("""
-            SELECT c.id, c.nome, c.email, 
-                   COUNT(p.id) as total_pedidos, 
-                   SUM(p.total) as valor_total,
-                   AVG(p.total) as ticket_medio
-            FROM clientes c
-            JOIN pedidos p ON c.id = p.cliente_id
-            WHERE date(p.created_at) BETWEEN ? AND ?
-            GROUP BY c.id
-            ORDER BY valor_total DESC
-            LIMIT 5
-        """, (data_inicio, data_fim))
-        top_clientes = c.fetchall()
-        conn.close()
-        return top_clientes
+        # (id, nome, email, total_pedidos, valor_total, ticket_medio)
+        return list(self._obter_agregado(data_inicio, data_fim).top_clientes[:5])
 
     def _obter_tabela_produtos_cadastrados(self):
+        return cache_relatorios.obter(
+            'produtos_cadastrados', None, None, "Todos",
+            self._consultar_produtos_cadastrados
+        )
+
+    def _consultar_produtos_cadastrados(self):
         conn = self._conectar_db()
         c = conn.cursor()
         try:
@@ -133,13 +134,19 @@ class RelatorioViews:
                 FROM produtos 
                 ORDER BY created_at DESC
             """)
-            produtos = c.fetchall()
+            produtos = tuple(c.fetchall())
         except sqlite3.OperationalError:
-            produtos = []
+            produtos = ()
         conn.close()
         return produtos
 
     def _obter_tabela_top_5_produtos(self, data_inicio, data_fim):
+        return cache_relatorios.obter(
+            'top_5_produtos', data_inicio, data_fim, "Todos",
+            lambda: self._consultar_top_5_produtos(data_inicio, data_fim)
+        )
+
+    def _consultar_top_5_produtos(self, data_inicio, data_fim):
         conn = self._conectar_db()
         c = conn.cursor()
         try:
@@ -151,18 +158,24 @@ class RelatorioViews:
                 FROM produtos p
                 JOIN itens_pedido ip ON p.id = ip.produto_id
                 JOIN pedidos ped ON ip.pedido_id = ped.id
-                WHERE date(ped.created_at) BETWEEN ? AND ?
+                WHERE ped.created_date BETWEEN ? AND ?
                 GROUP BY p.id
                 ORDER BY total_vendido DESC
                 LIMIT 5
             """, (data_inicio, data_fim))
-            top_produtos = c.fetchall()
+            top_produtos = tuple(c.fetchall())
         except sqlite3.OperationalError:
-            top_produtos = []
+            top_produtos = ()
         conn.close()
         return top_produtos
 
     def _obter_tabela_pedidos_completa(self, data_inicio, data_fim, status="Todos"):
+        return cache_relatorios.obter(
+            'pedidos_completa', data_inicio, data_fim, status,
+            lambda: self._consultar_pedidos_completa(data_inicio, data_fim, status)
+        )
+
+    def _consultar_pedidos_completa(self, data_inicio, data_fim, status="Todos"):
         conn = self._conectar_db()
         c = conn.cursor()
         query = """
@@ -170,7 +183,7 @@ class RelatorioViews:
                 p.id as pedido_id,
                 p.total,
                 p.status,
-                date(p.created_at) as data_pedido,
+                p.created_date as data_pedido,
                 c.id as cliente_id,
                 c.nome as cliente_nome,
                 c.email as cliente_email,
@@ -178,7 +191,7 @@ class RelatorioViews:
                 (SELECT COUNT(*) FROM itens_pedido WHERE pedido_id = p.id) as total_itens
             FROM pedidos p
             LEFT JOIN clientes c ON p.cliente_id = c.id
-            WHERE date(p.created_at) BETWEEN ? AND ?
+            WHERE p.created_date BETWEEN ? AND ?
         """
         params = [data_inicio, data_fim]
         if status != "Todos":
@@ -186,7 +199,7 @@ class RelatorioViews:
             params.append(status)
         query += " ORDER BY p.created_at DESC"
         c.execute(query, params)
-        pedidos = c.fetchall()
+        pedidos = tuple(c.fetchall())
         conn.close()
         return pedidos
 
@@ -424,11 +437,11 @@ class RelatorioViews:
         conn = self._conectar_db()
         c = conn.cursor()
         c.execute("""
-            SELECT date(created_at), COUNT(*) 
+            SELECT created_date, COUNT(*) 
             FROM clientes 
-            WHERE date(created_at) BETWEEN ? AND ? 
-            GROUP BY date(created_at) 
-            ORDER BY date(created_at)
+            WHERE created_date BETWEEN ? AND ? 
+            GROUP BY created_date 
+            ORDER BY created_date
         """, (data_inicio, data_fim))
         dados = c.fetchall()
         conn.close()
@@ -494,16 +507,8 @@ class RelatorioViews:
             canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
 
     def _adicionar_grafico_status_pedidos(self, parent, data_inicio, data_fim):
-        conn = self._conectar_db()
-        c = conn.cursor()
-        c.execute("""
-            SELECT status, COUNT(*) 
-            FROM pedidos 
-            WHERE date(created_at) BETWEEN ? AND ? 
-            GROUP BY status
-        """, (data_inicio, data_fim))
-        dados = c.fetchall()
-        conn.close()
+        agregado = self._obter_agregado(data_inicio, data_fim)
+        dados = [(s, qtd) for s, qtd, _ in agregado.por_status]
         if dados:
             frame_grafico = ctk.CTkFrame(parent)
             frame_grafico.pack(fill=tk.X, pady=10, padx=10)
@@ -598,7 +603,11 @@ class RelatorioViews:
         self._aplicar_tema()
 
     def _conectar_db(self):
-        return sqlite3.connect(self.db_path)
+        return get_connection(self.db_path)
+
+    def _obter_agregado(self, data_inicio, data_fim, status="Todos"):
+        """Métricas consolidadas do período (uma única passada sobre pedidos)."""
+        return agregar_periodo_em_cache(data_inicio, data_fim, status, db_path=self.db_path)
 
     def _criar_widgets(self):
         self.main_frame = ctk.CTkFrame(self.master)
@@ -770,9 +779,19 @@ class RelatorioViews:
             self.data_fim.configure(state="disabled")
 
     def _carregar_dados_iniciais(self):
+        self._mostrar_progresso(True)
+        executar_em_segundo_plano(
+            self._consultar_dados_iniciais,
+            widget=self.master, chave=f"relatorios_iniciais_{id(self)}",
+            ao_concluir=self._dados_iniciais_carregados,
+            ao_falhar=self._erro_dados_iniciais,
+        )
+
+    @cronometrado("view.relatorios.carregar")
+    def _consultar_dados_iniciais(self):
+        """Totais da tela inicial (roda fora da thread do Tk)."""
+        conn = self._conectar_db()
         try:
-            self._mostrar_progresso(True)
-            conn = self._conectar_db()
             c = conn.cursor()
             primeiro_dia = datetime.now().replace(day=1).strftime('%Y-%m-%d')
             
@@ -784,15 +803,19 @@ class RelatorioViews:
             
             c.execute("SELECT SUM(total) FROM pedidos WHERE created_at >= ?", (primeiro_dia,))
             faturamento = c.fetchone()[0] or 0
-            
-            conn.close()
-            self._atualizar_tela_inicial(clientes, pedidos, faturamento)
-            log_operacao("RELATORIOS", "Dados iniciais carregados")
-        except Exception as e:
-            log_erro(f"Erro ao carregar dados iniciais: {e}")
-            messagebox.showerror("Erro", f"Falha ao carregar dados iniciais:\n{e}")
         finally:
-            self._mostrar_progresso(False)
+            conn.close()
+        return clientes, pedidos, faturamento
+
+    def _dados_iniciais_carregados(self, totais):
+        self._mostrar_progresso(False)
+        self._atualizar_tela_inicial(*totais)
+        log_operacao("RELATORIOS", "Dados iniciais carregados")
+
+    def _erro_dados_iniciais(self, erro):
+        self._mostrar_progresso(False)
+        log_erro(f"Erro ao carregar dados iniciais: {erro}")
+        messagebox.showerror("Erro", f"Falha ao carregar dados iniciais:\n{erro}")
 
     def _mostrar_progresso(self, mostrar):
         if mostrar:
@@ -871,14 +894,51 @@ class RelatorioViews:
         data_inicio, data_fim = self._obter_datas_periodo()
         status = self.status_filtro.get()
 
-        try:
-            log_operacao("RELATORIOS", f"Gerando relatório: {tipo} ({formato}) {data_inicio} a {data_fim}")
-            
-            self._mostrar_progresso(True)
-            
-            if formato == "pdf_ia":
+        log_operacao("RELATORIOS", f"Gerando relatório: {tipo} ({formato}) {data_inicio} a {data_fim}")
+
+        if formato == "pdf_ia":
+            try:
+                self._mostrar_progresso(True)
                 self._exportar_pdf_com_ia(tipo, data_inicio, data_fim, status)
-            elif tipo == "geral":
+            except Exception as e:
+                log_erro(f"Erro ao gerar relatório: {e}")
+                messagebox.showerror("Erro", f"Erro ao gerar relatório:\n{e}")
+            finally:
+                self._mostrar_progresso(False)
+            return
+
+        # Consultas no executor; a montagem da tela/arquivo volta para a thread do Tk.
+        # Um novo clique em "Gerar" cancela a preparação anterior.
+        self._mostrar_progresso(True)
+        executar_em_segundo_plano(
+            self._pre_carregar_relatorio, tipo, data_inicio, data_fim, status,
+            widget=self.master, chave=f"relatorio_{id(self)}",
+            ao_concluir=lambda _: self._montar_relatorio(tipo, formato, data_inicio, data_fim, status),
+            ao_falhar=self._erro_gerar_relatorio,
+        )
+
+    @cronometrado("relatorio.consultas")
+    def _pre_carregar_relatorio(self, tipo, data_inicio, data_fim, status="Todos"):
+        """Aquece o cache de relatórios com as consultas que a geração vai usar."""
+        self._obter_agregado(data_inicio, data_fim)
+        if tipo in ("geral", "clientes"):
+            self._obter_tabela_clientes_cadastrados(data_inicio, data_fim)
+        if tipo in ("geral", "pedidos"):
+            self._obter_tabela_pedidos_completa(data_inicio, data_fim, status)
+        if tipo == "geral":
+            self._obter_tabela_produtos_cadastrados()
+            self._obter_tabela_top_5_produtos(data_inicio, data_fim)
+            self._obter_agregado(*periodo_anterior(data_inicio, data_fim))
+
+    def _erro_gerar_relatorio(self, erro):
+        self._mostrar_progresso(False)
+        log_erro(f"Erro ao gerar relatório: {erro}")
+        messagebox.showerror("Erro", f"Erro ao gerar relatório:\n{erro}")
+
+    def _montar_relatorio(self, tipo, formato, data_inicio, data_fim, status="Todos"):
+        """Gera a tela ou o arquivo a partir dos dados já em cache."""
+        try:
+            if tipo == "geral":
                 if formato == "tela":
                     self._mostrar_relatorio_geral_completo(data_inicio, data_fim, status)
                 else:
@@ -912,9 +972,9 @@ class RelatorioViews:
             
             if tipo == "clientes":
                 query = """
-                    SELECT id, nome, email, telefone, date(created_at) 
+                    SELECT id, nome, email, telefone, created_date 
                     FROM clientes 
-                    WHERE date(created_at) BETWEEN ? AND ? 
+                    WHERE created_date BETWEEN ? AND ? 
                     ORDER BY created_at DESC
                 """
                 c.execute(query, (data_inicio, data_fim))
@@ -923,10 +983,10 @@ class RelatorioViews:
                 
             elif tipo == "pedidos":
                 query = """
-                    SELECT p.id, c.nome, p.total, p.status, date(p.created_at) 
+                    SELECT p.id, c.nome, p.total, p.status, p.created_date 
                     FROM pedidos p 
                     LEFT JOIN clientes c ON p.cliente_id = c.id
-                    WHERE date(p.created_at) BETWEEN ? AND ?
+                    WHERE p.created_date BETWEEN ? AND ?
                 """
                 params = [data_inicio, data_fim]
                 if status != "Todos":
@@ -939,29 +999,15 @@ class RelatorioViews:
                 colunas = ['ID_Pedido', 'Cliente', 'Total', 'Status', 'Data_Pedido']
                 
             elif tipo == "financeiro":
-                query = """
-                    SELECT date(created_at), COUNT(*), SUM(total), AVG(total) 
-                    FROM pedidos 
-                    WHERE date(created_at) BETWEEN ? AND ? 
-                    GROUP BY date(created_at) 
-                    ORDER BY date(created_at)
-                """
-                c.execute(query, (data_inicio, data_fim))
-                dados = c.fetchall()
+                dados = list(self._obter_agregado(data_inicio, data_fim).serie_diaria)
                 colunas = ['Data', 'Total_Pedidos', 'Faturamento_Total', 'Ticket_Medio']
                 
             elif tipo == "estatisticas":
-                c.execute("SELECT COUNT(*) FROM clientes")
-                total_clientes = c.fetchone()[0]
-                c.execute("SELECT COUNT(*) FROM pedidos")
-                total_pedidos = c.fetchone()[0]
-                c.execute("SELECT SUM(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-                faturamento = c.fetchone()[0] or 0
-                
+                agregado = self._obter_agregado(data_inicio, data_fim)
                 dados = [
-                    ('Total_Clientes', total_clientes),
-                    ('Total_Pedidos', total_pedidos),
-                    ('Faturamento_Periodo', faturamento)
+                    ('Total_Clientes', agregado.total_clientes),
+                    ('Total_Pedidos', agregado.total_pedidos_geral),
+                    ('Faturamento_Periodo', agregado.faturamento)
                 ]
                 colunas = ['Metrica', 'Valor']
             
@@ -1011,19 +1057,19 @@ class RelatorioViews:
 
             # Coletar dados de CLIENTES
             c.execute("""
-                SELECT id, nome, email, telefone, date(created_at) 
+                SELECT id, nome, email, telefone, created_date 
                 FROM clientes 
-                WHERE date(created_at) BETWEEN ? AND ? 
+                WHERE created_date BETWEEN ? AND ? 
                 ORDER BY created_at DESC
             """, (data_inicio, data_fim))
             clientes = c.fetchall()
             
             # Coletar dados de PEDIDOS
             query_pedidos = """
-                SELECT p.id, c.nome, p.total, p.status, date(p.created_at) 
+                SELECT p.id, c.nome, p.total, p.status, p.created_date 
                 FROM pedidos p 
                 LEFT JOIN clientes c ON p.cliente_id = c.id
-                WHERE date(p.created_at) BETWEEN ? AND ?
+                WHERE p.created_date BETWEEN ? AND ?
             """
             params = [data_inicio, data_fim]
             if status != "Todos":
@@ -1033,24 +1079,12 @@ class RelatorioViews:
             c.execute(query_pedidos, params)
             pedidos = c.fetchall()
             
-            # Coletar dados FINANCEIROS
-            c.execute("""
-                SELECT date(created_at), COUNT(*), SUM(total), AVG(total) 
-                FROM pedidos 
-                WHERE date(created_at) BETWEEN ? AND ? 
-                GROUP BY date(created_at) 
-                ORDER BY date(created_at)
-            """, (data_inicio, data_fim))
-            financeiro = c.fetchall()
-            
-            # Coletar ESTATÍSTICAS
-            c.execute("SELECT COUNT(*) FROM clientes")
-            total_clientes = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM pedidos")
-            total_pedidos = c.fetchone()[0]
-            c.execute("SELECT COUNT(*), SUM(total), AVG(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", 
-                     (data_inicio, data_fim))
-            stats_periodo = c.fetchone()
+            # Dados FINANCEIROS e ESTATÍSTICAS (agregados do período)
+            agregado = self._obter_agregado(data_inicio, data_fim)
+            financeiro = list(agregado.serie_diaria)
+            total_clientes = agregado.total_clientes
+            total_pedidos = agregado.total_pedidos_geral
+            stats_periodo = (agregado.quantidade_pedidos, agregado.faturamento, agregado.ticket_medio)
 
             # Escrever CSV com layout horizontal
             with open(filename, 'w', newline='', encoding='utf-8-sig') as csvfile:
@@ -1205,9 +1239,9 @@ class RelatorioViews:
             
             if tipo == "clientes":
                 c.execute("""
-                    SELECT id, nome, email, telefone, date(created_at) 
+                    SELECT id, nome, email, telefone, created_date 
                     FROM clientes 
-                    WHERE date(created_at) BETWEEN ? AND ? 
+                    WHERE created_date BETWEEN ? AND ? 
                     ORDER BY created_at DESC
                 """, (data_inicio, data_fim))
                 dados = c.fetchall()
@@ -1236,10 +1270,10 @@ class RelatorioViews:
                     
             elif tipo == "pedidos":
                 query = """
-                    SELECT p.id, c.nome, p.total, p.status, date(p.created_at) 
+                    SELECT p.id, c.nome, p.total, p.status, p.created_date 
                     FROM pedidos p 
                     LEFT JOIN clientes c ON p.cliente_id = c.id
-                    WHERE date(p.created_at) BETWEEN ? AND ?
+                    WHERE p.created_date BETWEEN ? AND ?
                 """
                 params = [data_inicio, data_fim]
                 if status != "Todos":
@@ -1279,14 +1313,7 @@ class RelatorioViews:
                     story.append(Paragraph("Nenhum pedido encontrado no período.", self.styles['Normal']))
             
             elif tipo == "financeiro":
-                c.execute("""
-                    SELECT date(created_at), COUNT(*), SUM(total), AVG(total) 
-                    FROM pedidos 
-                    WHERE date(created_at) BETWEEN ? AND ? 
-                    GROUP BY date(created_at) 
-                    ORDER BY date(created_at)
-                """, (data_inicio, data_fim))
-                dados = c.fetchall()
+                dados = list(self._obter_agregado(data_inicio, data_fim).serie_diaria)
                 
                 if dados:
                     story.append(Paragraph("EVOLUÇÃO FINANCEIRA DIÁRIA", self.styles['Heading2']))
@@ -1316,13 +1343,10 @@ class RelatorioViews:
                     story.append(Paragraph("Nenhum dado financeiro no período.", self.styles['Normal']))
             
             elif tipo == "estatisticas":
-                c.execute("SELECT COUNT(*) FROM clientes")
-                total_clientes = c.fetchone()[0]
-                c.execute("SELECT COUNT(*) FROM pedidos")
-                total_pedidos = c.fetchone()[0]
-                c.execute("SELECT COUNT(*), SUM(total), AVG(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", 
-                         (data_inicio, data_fim))
-                stats = c.fetchone()
+                agregado = self._obter_agregado(data_inicio, data_fim)
+                total_clientes = agregado.total_clientes
+                total_pedidos = agregado.total_pedidos_geral
+                stats = (agregado.quantidade_pedidos, agregado.faturamento, agregado.ticket_medio)
                 
                 story.append(Paragraph("ESTATÍSTICAS GERAIS", self.styles['Heading2']))
                 
@@ -1343,7 +1367,8 @@ class RelatorioViews:
             story.append(Paragraph("Relatório gerado automaticamente pelo Sistema de Gestão", 
                                  self.styles['Italic']))
             
-            doc.build(story)
+            with span("relatorio.pdf.render"):
+                doc.build(story)
             messagebox.showinfo("PDF Exportado", f"Relatório {tipo} exportado com sucesso:\n{filename}")
             log_operacao("RELATORIOS", f"PDF exportado: {filename}")
             
@@ -1392,6 +1417,7 @@ class RelatorioViews:
             story.append(Paragraph(f"Gerado em: {datetime.now().strftime('%d/%m/%Y às %H:%M')}", self.styles['Normal']))
             story.append(Spacer(1, 30))
             
+            agregado = self._obter_agregado(data_inicio, data_fim)
             conn = self._conectar_db()
             c = conn.cursor()
             
@@ -1399,17 +1425,10 @@ class RelatorioViews:
             story.append(Paragraph("RESUMO EXECUTIVO", self.styles['Heading2']))
             story.append(Spacer(1, 10))
             
-            c.execute("SELECT COUNT(*) FROM clientes WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-            novos_clientes = c.fetchone()[0]
-            
-            c.execute("SELECT COUNT(*) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-            total_pedidos = c.fetchone()[0]
-            
-            c.execute("SELECT SUM(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-            faturamento_total = c.fetchone()[0] or 0
-            
-            c.execute("SELECT AVG(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-            ticket_medio = c.fetchone()[0] or 0
+            novos_clientes = agregado.novos_clientes
+            total_pedidos = agregado.quantidade_pedidos
+            faturamento_total = agregado.faturamento
+            ticket_medio = agregado.ticket_medio
             
             resumo_data = [
                 ['Métrica', 'Valor'],
@@ -1437,9 +1456,9 @@ class RelatorioViews:
             # CLIENTES
             story.append(Paragraph("CLIENTES - ÚLTIMOS CADASTROS", self.styles['Heading2']))
             c.execute("""
-                SELECT id, nome, email, date(created_at) 
+                SELECT id, nome, email, created_date 
                 FROM clientes 
-                WHERE date(created_at) BETWEEN ? AND ? 
+                WHERE created_date BETWEEN ? AND ? 
                 ORDER BY created_at DESC 
                 LIMIT 10
             """, (data_inicio, data_fim))
@@ -1471,10 +1490,10 @@ class RelatorioViews:
             # PEDIDOS
             story.append(Paragraph("PEDIDOS - ÚLTIMOS REGISTROS", self.styles['Heading2']))
             query_pedidos = """
-                SELECT p.id, c.nome, p.total, p.status, date(p.created_at) 
+                SELECT p.id, c.nome, p.total, p.status, p.created_date 
                 FROM pedidos p 
                 LEFT JOIN clientes c ON p.cliente_id = c.id
-                WHERE date(p.created_at) BETWEEN ? AND ?
+                WHERE p.created_date BETWEEN ? AND ?
             """
             params = [data_inicio, data_fim]
             if status != "Todos":
@@ -1517,13 +1536,15 @@ class RelatorioViews:
             # ESTATÍSTICAS COMPLETAS
             story.append(Paragraph("ESTATÍSTICAS DETALHADAS", self.styles['Heading2']))
             
-            c.execute("SELECT COUNT(*) FROM clientes")
-            total_clientes_geral = c.fetchone()[0]
-            c.execute("SELECT COUNT(*) FROM pedidos")
-            total_pedidos_geral = c.fetchone()[0]
-            c.execute("SELECT COUNT(*), SUM(total), AVG(total), MIN(total), MAX(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", 
-                     (data_inicio, data_fim))
-            stats_detalhadas = c.fetchone()
+            total_clientes_geral = agregado.total_clientes
+            total_pedidos_geral = agregado.total_pedidos_geral
+            stats_detalhadas = (
+                agregado.quantidade_pedidos,
+                agregado.faturamento,
+                agregado.ticket_medio,
+                agregado.menor_pedido,
+                agregado.maior_pedido
+            )
             
             estatisticas_data = [
                 ['Métrica', 'Valor'],
@@ -1559,14 +1580,7 @@ class RelatorioViews:
             # Gerar gráficos como imagens temporárias
             try:
                 # Gráfico 1: Evolução do Faturamento
-                c.execute("""
-                    SELECT date(created_at), SUM(total) 
-                    FROM pedidos 
-                    WHERE date(created_at) BETWEEN ? AND ? 
-                    GROUP BY date(created_at) 
-                    ORDER BY date(created_at)
-                """, (data_inicio, data_fim))
-                dados_evolucao = c.fetchall()
+                dados_evolucao = [(dia[0], dia[2]) for dia in agregado.serie_diaria]
                 
                 if dados_evolucao:
                     fig1, ax1 = plt.subplots(figsize=(7, 3.5))
@@ -1590,13 +1604,7 @@ class RelatorioViews:
                     story.append(Spacer(1, 15))
                 
                 # Gráfico 2: Distribuição por Status
-                c.execute("""
-                    SELECT status, COUNT(*) 
-                    FROM pedidos 
-                    WHERE date(created_at) BETWEEN ? AND ? 
-                    GROUP BY status
-                """, (data_inicio, data_fim))
-                dados_status = c.fetchall()
+                dados_status = [(s, qtd) for s, qtd, _ in agregado.por_status]
                 
                 if dados_status:
                     fig2, ax2 = plt.subplots(figsize=(6, 3.5))
@@ -1664,7 +1672,8 @@ class RelatorioViews:
                                  self.styles['Italic']))
             
             conn.close()
-            doc.build(story)
+            with span("relatorio.pdf.render"):
+                doc.build(story)
             messagebox.showinfo("PDF Exportado", f"Relatório geral exportado com sucesso:\n{filename}")
             log_operacao("RELATORIOS", f"PDF geral exportado: {filename}")
             
@@ -1687,39 +1696,46 @@ class RelatorioViews:
         )
         if not filename:
             return
-            
-        def gerar_pdf_com_ia():
-            try:
-                self._mostrar_progresso(True)
-                
-                dados_ia = self._coletar_dados_para_ia(data_inicio, data_fim)
-                pergunta = f"""
-                Com base nestes dados de negócio, forneça uma análise executiva completa incluindo:
-                - Resumo executivo
-                - Análise de crescimento
-                - Identificação de riscos
-                - Oportunidades
-                - Plano de ação
-                - Estimativas de crescimento
-
-                Dados: {dados_ia}
-                """
-                
-                analise_ia, erro_ia = agente_ia.enviar_pergunta_com_contexto(pergunta)
-                
-                if erro_ia:
-                    self.master.after(0, lambda: messagebox.showerror("Erro IA", f"Erro na análise: {erro_ia}"))
-                    return
-                
-                self.master.after(0, lambda: self._criar_pdf_com_ia(filename, tipo, data_inicio, data_fim, status, analise_ia))
-                
-            except Exception as e:
-                self.master.after(0, lambda: messagebox.showerror("Erro", f"Erro ao gerar PDF com IA: {e}"))
-            finally:
-                self.master.after(0, lambda: self._mostrar_progresso(False))
 
-        threading.Thread(target=gerar_pdf_com_ia, daemon=True).start()
+        def concluir(resultado):
+            self._mostrar_progresso(False)
+            analise_ia, erro_ia = resultado
+            if erro_ia:
+                messagebox.showerror("Erro IA", f"Erro na análise: {erro_ia}")
+                return
+            self._criar_pdf_com_ia(filename, tipo, data_inicio, data_fim, status, analise_ia)
+
+        def falhar(erro):
+            self._mostrar_progresso(False)
+            messagebox.showerror("Erro", f"Erro ao gerar PDF com IA: {erro}")
+
+        self._mostrar_progresso(True)
+        # Mesma análise do mesmo período em andamento é reaproveitada
+        enviar_para_ia(
+            self._executar_analise_pdf_ia, data_inicio, data_fim,
+            prioridade=PRIORIDADE_RELATORIO, identidade=("relatorio_pdf_ia", data_inicio, data_fim),
+            widget=self.master, chave=f"relatorio_pdf_ia_{id(self)}",
+            ao_concluir=concluir, ao_falhar=falhar,
+        )
 
+    @cronometrado("relatorio.analise_ia")
+    def _executar_analise_pdf_ia(self, data_inicio, data_fim):
+        """Coleta os dados e pede à IA a análise do PDF (roda fora da thread do Tk)."""
+        dados_ia = self._coletar_dados_para_ia(data_inicio, data_fim)
+        pergunta = f"""
+            Com base nestes dados de negócio, forneça uma análise executiva completa incluindo:
+            - Resumo executivo
+            - Análise de crescimento
+            - Identificação de riscos
+            - Oportunidades
+            - Plano de ação
+            - Estimativas de crescimento
+
+            Dados: {dados_ia}
+            """
+        return agente_ia.enviar_pergunta_com_contexto(pergunta)
+
+    @cronometrado("relatorio.pdf_ia")
     def _criar_pdf_com_ia(self, filename, tipo, data_inicio, data_fim, status, analise_ia):
         """Cria o PDF com a análise da IA incorporada + gráficos e tabelas completas"""
         try:
@@ -1768,8 +1784,7 @@ class RelatorioViews:
             story.append(info_table)
             story.append(Spacer(1, 20))
             
-            conn = self._conectar_db()
-            c = conn.cursor()
+            agregado = self._obter_agregado(data_inicio, data_fim)
             
             # 1. RESUMO EXECUTIVO - CARDS EM LINHA
             section_style = ParagraphStyle('section', 
@@ -1782,17 +1797,10 @@ class RelatorioViews:
             story.append(Paragraph("RESUMO EXECUTIVO", section_style))
             story.append(Spacer(1, 10))
             
-            c.execute("SELECT COUNT(*) FROM clientes WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-            novos_clientes = c.fetchone()[0]
-            
-            c.execute("SELECT COUNT(*) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-            total_pedidos = c.fetchone()[0]
-            
-            c.execute("SELECT SUM(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-            faturamento_total = c.fetchone()[0] or 0
-            
-            c.execute("SELECT AVG(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-            ticket_medio = c.fetchone()[0] or 0
+            novos_clientes = agregado.novos_clientes
+            total_pedidos = agregado.quantidade_pedidos
+            faturamento_total = agregado.faturamento
+            ticket_medio = agregado.ticket_medio
             
             # Cards em formato de 4 colunas
             card_label_style = ParagraphStyle('card_label', parent=self.styles['Normal'], 
@@ -1956,14 +1964,7 @@ class RelatorioViews:
             
             try:
                 # Gráfico 1: Evolução do Faturamento
-                c.execute("""
-                    SELECT date(created_at), SUM(total) 
-                    FROM pedidos 
-                    WHERE date(created_at) BETWEEN ? AND ? 
-                    GROUP BY date(created_at) 
-                    ORDER BY date(created_at)
-                """, (data_inicio, data_fim))
-                dados_evolucao = c.fetchall()
+                dados_evolucao = [(dia[0], dia[2]) for dia in agregado.serie_diaria]
                 
                 if dados_evolucao:
                     fig1, ax1 = plt.subplots(figsize=(8, 4))
@@ -1993,13 +1994,7 @@ class RelatorioViews:
                     story.append(Spacer(1, 20))
                 
                 # Gráfico 2: Distribuição por Status
-                c.execute("""
-                    SELECT status, COUNT(*) 
-                    FROM pedidos 
-                    WHERE date(created_at) BETWEEN ? AND ? 
-                    GROUP BY status
-                """, (data_inicio, data_fim))
-                dados_status = c.fetchall()
+                dados_status = [(s, qtd) for s, qtd, _ in agregado.por_status]
                 
                 if dados_status:
                     fig2, ax2 = plt.subplots(figsize=(8, 4))
@@ -2099,7 +2094,6 @@ class RelatorioViews:
                     story.append(Spacer(1, 8))
             
             # RODAPÉ
-            conn.close()
             story.append(Spacer(1, 30))
             
             footer_style = ParagraphStyle('footer', 
@@ -2112,7 +2106,8 @@ class RelatorioViews:
             story.append(Paragraph("Relatório gerado automaticamente com análise de IA - Sistema de Gestão Comercial", 
                                  self.styles['Italic']))
             
-            doc.build(story)
+            with span("relatorio.pdf.render"):
+                doc.build(story)
             messagebox.showinfo("PDF Completo + IA Exportado", 
                               f"Relatório completo com análise IA, tabelas e gráficos exportado:\n{filename}")
             log_operacao("RELATORIOS", f"PDF IA completo exportado: {filename}")
@@ -2123,44 +2118,26 @@ class RelatorioViews:
 
     def _coletar_dados_para_ia(self, data_inicio, data_fim):
         """Coleta dados estruturados para análise da IA"""
-        conn = self._conectar_db()
-        c = conn.cursor()
+        agregado = self._obter_agregado(data_inicio, data_fim)
         
         dados = {
             'periodo': f"{data_inicio} a {data_fim}",
-            'clientes': {},
-            'pedidos': {},
-            'financeiro': {},
+            'clientes': {
+                'novos': agregado.novos_clientes,
+                'total': agregado.total_clientes
+            },
+            'pedidos': {
+                'quantidade': agregado.quantidade_pedidos,
+                'faturamento': agregado.faturamento,
+                'ticket_medio': agregado.ticket_medio,
+                'status': agregado.status_contagem
+            },
+            'financeiro': {
+                'evolucao_diaria': [list(dia[:3]) for dia in agregado.serie_diaria]
+            },
             'estatisticas': {}
         }
         
-        c.execute("SELECT COUNT(*) FROM clientes WHERE date(created_at) BETWEEN ? AND ?", 
-                 (data_inicio, data_fim))
-        dados['clientes']['novos'] = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM clientes")
-        dados['clientes']['total'] = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*), SUM(total), AVG(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", 
-                 (data_inicio, data_fim))
-        pedidos_info = c.fetchone()
-        dados['pedidos'] = {
-            'quantidade': pedidos_info[0],
-            'faturamento': float(pedidos_info[1] or 0),
-            'ticket_medio': float(pedidos_info[2] or 0)
-        }
-        
-        c.execute("SELECT status, COUNT(*) FROM pedidos WHERE date(created_at) BETWEEN ? AND ? GROUP BY status", 
-                 (data_inicio, data_fim))
-        dados['pedidos']['status'] = dict(c.fetchall())
-        
-        c.execute("""SELECT date(created_at), COUNT(*), SUM(total) FROM pedidos 
-                     WHERE date(created_at) BETWEEN ? AND ? GROUP BY date(created_at) 
-                     ORDER BY date(created_at)""", (data_inicio, data_fim))
-        dados['financeiro']['evolucao_diaria'] = c.fetchall()
-        
-        conn.close()
-        
         return json.dumps(dados, indent=2, ensure_ascii=False)
 
     def _analise_completa_ia(self):
@@ -2168,9 +2145,25 @@ class RelatorioViews:
         try:
             data_inicio, data_fim = self._obter_datas_periodo()
             
-            dados_completos = self._coletar_dados_analise_completa(data_inicio, data_fim)
+            self._mostrar_progresso(True)
+            enviar_para_ia(
+                self._executar_analise_completa_ia, data_inicio, data_fim,
+                prioridade=PRIORIDADE_RELATORIO, identidade=("analise_completa_ia", data_inicio, data_fim),
+                widget=self.master, chave=f"relatorio_analise_ia_{id(self)}",
+                ao_concluir=lambda resultado: self._concluir_analise_completa_ia(resultado, data_inicio, data_fim),
+                ao_falhar=self._erro_analise_completa_ia,
+            )
             
-            pergunta = f"""
+        except Exception as e:
+            self._mostrar_progresso(False)
+            messagebox.showerror("Erro", f"Erro ao gerar análise completa: {e}")
+
+    @cronometrado("relatorio.analise_ia")
+    def _executar_analise_completa_ia(self, data_inicio, data_fim):
+        """Coleta os dados e consulta a IA (roda fora da thread do Tk)."""
+        dados_completos = self._coletar_dados_analise_completa(data_inicio, data_fim)
+        
+        pergunta = f"""
             Com base nestes dados de negócio, forneça uma análise executiva completa:
 
             DADOS DO PERÍODO {data_inicio} a {data_fim}:
@@ -2210,94 +2203,50 @@ class RelatorioViews:
 
             Forneça a análise em formato executivo, com dados concretos e recomendações acionáveis.
             """
-            
-            self._mostrar_progresso(True)
-            
-            def analise_ia_thread():
-                try:
-                    resposta, erro = agente_ia.enviar_pergunta_com_contexto(pergunta)
-                    self.master.after(0, self._exibir_analise_completa_ia, resposta, erro, data_inicio, data_fim)
-                except Exception as e:
-                    self.master.after(0, lambda: messagebox.showerror("Erro IA", f"Erro na análise: {e}"))
-                finally:
-                    self.master.after(0, lambda: self._mostrar_progresso(False))
-            
-            threading.Thread(target=analise_ia_thread, daemon=True).start()
-            
-        except Exception as e:
-            self._mostrar_progresso(False)
-            messagebox.showerror("Erro", f"Erro ao gerar análise completa: {e}")
+        
+        return agente_ia.enviar_pergunta_com_contexto(pergunta)
+
+    def _concluir_analise_completa_ia(self, resultado, data_inicio, data_fim):
+        self._mostrar_progresso(False)
+        resposta, erro = resultado
+        self._exibir_analise_completa_ia(resposta, erro, data_inicio, data_fim)
+
+    def _erro_analise_completa_ia(self, erro):
+        self._mostrar_progresso(False)
+        messagebox.showerror("Erro IA", f"Erro na análise: {erro}")
 
     def _coletar_dados_analise_completa(self, data_inicio, data_fim):
         """Coleta dados completos para análise da IA"""
-        conn = self._conectar_db()
-        c = conn.cursor()
+        agregado = self._obter_agregado(data_inicio, data_fim)
+        
+        # Dados comparativos (30 dias anteriores ao início do período)
+        anterior_inicio, anterior_fim = periodo_anterior(data_inicio, data_fim, dias=30)
+        agregado_anterior = self._obter_agregado(anterior_inicio, anterior_fim)
         
         dados = {
             'periodo': f"{data_inicio} a {data_fim}",
-            'clientes': {},
-            'pedidos': {},
-            'financeiro': {},
-            'produtos': {},
-            'comparativo': {}
-        }
-        
-        # Dados de clientes
-        c.execute("SELECT COUNT(*) FROM clientes WHERE date(created_at) BETWEEN ? AND ?", 
-                 (data_inicio, data_fim))
-        dados['clientes']['novos'] = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM clientes")
-        dados['clientes']['total'] = c.fetchone()[0]
-        
-        # Dados de pedidos
-        c.execute("SELECT COUNT(*), SUM(total), AVG(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", 
-                 (data_inicio, data_fim))
-        pedidos_info = c.fetchone()
-        dados['pedidos'] = {
-            'quantidade': pedidos_info[0] or 0,
-            'faturamento': float(pedidos_info[1] or 0),
-            'ticket_medio': float(pedidos_info[2] or 0)
+            'clientes': {
+                'novos': agregado.novos_clientes,
+                'total': agregado.total_clientes
+            },
+            'pedidos': {
+                'quantidade': agregado.quantidade_pedidos,
+                'faturamento': agregado.faturamento,
+                'ticket_medio': agregado.ticket_medio,
+                'status': agregado.status_contagem
+            },
+            'financeiro': {
+                'evolucao_diaria': [list(dia[:3]) for dia in agregado.serie_diaria]
+            },
+            'produtos': {
+                'top_vendidos': [list(prod[1:4]) for prod in agregado.top_produtos]
+            },
+            'comparativo': {
+                'pedidos_anterior': agregado_anterior.quantidade_pedidos,
+                'faturamento_anterior': agregado_anterior.faturamento
+            }
         }
         
-        # Pedidos por status
-        c.execute("SELECT status, COUNT(*) FROM pedidos WHERE date(created_at) BETWEEN ? AND ? GROUP BY status", 
-                 (data_inicio, data_fim))
-        dados['pedidos']['status'] = dict(c.fetchall())
-        
-        # Evolução diária
-        c.execute("""SELECT date(created_at), COUNT(*), SUM(total) FROM pedidos 
-                     WHERE date(created_at) BETWEEN ? AND ? GROUP BY date(created_at) 
-                     ORDER BY date(created_at)""", (data_inicio, data_fim))
-        dados['financeiro']['evolucao_diaria'] = c.fetchall()
-        
-        # Produtos mais vendidos
-        try:
-            c.execute("""SELECT p.nome, SUM(ip.quantidade), SUM(ip.quantidade * ip.preco_unit) 
-                         FROM itens_pedido ip 
-                         JOIN produtos p ON ip.produto_id = p.id 
-                         JOIN pedidos ped ON ip.pedido_id = ped.id 
-                         WHERE date(ped.created_at) BETWEEN ? AND ? 
-                         GROUP BY p.id ORDER BY SUM(ip.quantidade) DESC LIMIT 10""", 
-                     (data_inicio, data_fim))
-            dados['produtos']['top_vendidos'] = c.fetchall()
-        except:
-            dados['produtos']['top_vendidos'] = []
-        
-        # Dados comparativos (período anterior)
-        periodo_anterior_inicio = (datetime.strptime(data_inicio, "%Y-%m-%d") - timedelta(days=30)).strftime("%Y-%m-%d")
-        periodo_anterior_fim = (datetime.strptime(data_inicio, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
-        
-        c.execute("SELECT COUNT(*), SUM(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", 
-                 (periodo_anterior_inicio, periodo_anterior_fim))
-        periodo_anterior = c.fetchone()
-        dados['comparativo'] = {
-            'pedidos_anterior': periodo_anterior[0] or 0,
-            'faturamento_anterior': float(periodo_anterior[1] or 0)
-        }
-        
-        conn.close()
-        
         return json.dumps(dados, indent=2, ensure_ascii=False)
 
     def _exibir_analise_completa_ia(self, resposta, erro, data_inicio, data_fim):
@@ -2331,9 +2280,21 @@ class RelatorioViews:
 
     def _gerar_graficos_detalhados(self):
         """Gera visualização detalhada apenas com gráficos"""
+        data_inicio, data_fim = self._obter_datas_periodo()
+        self._mostrar_progresso(True)
+        executar_em_segundo_plano(
+            self._obter_agregado, data_inicio, data_fim,
+            widget=self.master, chave=f"relatorio_{id(self)}",
+            ao_concluir=lambda _: self._montar_graficos_detalhados(data_inicio, data_fim),
+            ao_falhar=lambda e: (self._mostrar_progresso(False),
+                                 messagebox.showerror("Erro", f"Erro ao gerar gráficos: {e}")),
+        )
+
+    @cronometrado("relatorio.graficos")
+    def _montar_graficos_detalhados(self, data_inicio, data_fim):
+        """Monta a tela de gráficos com o agregado já em cache."""
+        self._mostrar_progresso(False)
         try:
-            data_inicio, data_fim = self._obter_datas_periodo()
-            
             self._limpar_resultados()
             
             frame_scroll = ctk.CTkScrollableFrame(self.frame_resultados)
@@ -2355,47 +2316,22 @@ class RelatorioViews:
     def _adicionar_secao_graficos_detalhados(self, parent, data_inicio, data_fim):
         """Adiciona seção com gráficos detalhados expandidos"""
         try:
-            conn = self._conectar_db()
-            c = conn.cursor()
+            agregado = self._obter_agregado(data_inicio, data_fim)
             
-            # Evolução diária de faturamento
-            c.execute("""
-                SELECT date(created_at), SUM(total) 
-                FROM pedidos 
-                WHERE date(created_at) BETWEEN ? AND ? 
-                GROUP BY date(created_at) 
-                ORDER BY date(created_at)
-            """, (data_inicio, data_fim))
-            dados_evolucao = c.fetchall()
-            
-            # Distribuição por status
-            c.execute("""
-                SELECT status, COUNT(*) 
-                FROM pedidos 
-                WHERE date(created_at) BETWEEN ? AND ? 
-                GROUP BY status
-            """, (data_inicio, data_fim))
-            dados_status = c.fetchall()
-            
-            # Top clientes
-            c.execute("""
-                SELECT c.nome, COUNT(p.id), SUM(p.total)
-                FROM clientes c
-                JOIN pedidos p ON c.id = p.cliente_id
-                WHERE date(p.created_at) BETWEEN ? AND ?
-                GROUP BY c.id
-                ORDER BY SUM(p.total) DESC
-                LIMIT 8
-            """, (data_inicio, data_fim))
-            top_clientes = c.fetchall()
+            # Evolução diária de faturamento, distribuição por status e top clientes
+            dados_evolucao = [(dia[0], dia[2]) for dia in agregado.serie_diaria]
+            dados_status = [(s, qtd) for s, qtd, _ in agregado.por_status]
+            top_clientes = [(cli[1], cli[3], cli[4]) for cli in agregado.top_clientes[:8]]
             
             # Evolução de novos clientes
+            conn = self._conectar_db()
+            c = conn.cursor()
             c.execute("""
-                SELECT date(created_at), COUNT(*)
+                SELECT created_date, COUNT(*)
                 FROM clientes
-                WHERE date(created_at) BETWEEN ? AND ?
-                GROUP BY date(created_at)
-                ORDER BY date(created_at)
+                WHERE created_date BETWEEN ? AND ?
+                GROUP BY created_date
+                ORDER BY created_date
             """, (data_inicio, data_fim))
             evolucao_clientes = c.fetchall()
             
@@ -2564,6 +2500,7 @@ class RelatorioViews:
                 font=ctk.CTkFont(size=10)
             ).pack(pady=10)
 
+    @cronometrado("relatorio.tela")
     def _mostrar_relatorio_geral_completo(self, data_inicio, data_fim, status="Todos"):
         """Exibe relatório geral completo com tabelas, gráficos e análises"""
         self._limpar_resultados()
@@ -2630,22 +2567,11 @@ class RelatorioViews:
         )
         titulo_secao.pack(anchor="w", pady=(10, 5))
         
-        conn = self._conectar_db()
-        c = conn.cursor()
-        
-        c.execute("SELECT COUNT(*) FROM clientes WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-        novos_clientes = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-        total_pedidos = c.fetchone()[0]
-        
-        c.execute("SELECT SUM(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-        faturamento_total = c.fetchone()[0] or 0
-        
-        c.execute("SELECT AVG(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-        ticket_medio = c.fetchone()[0] or 0
-        
-        conn.close()
+        agregado = self._obter_agregado(data_inicio, data_fim)
+        novos_clientes = agregado.novos_clientes
+        total_pedidos = agregado.quantidade_pedidos
+        faturamento_total = agregado.faturamento
+        ticket_medio = agregado.ticket_medio
         
         frame_metricas = ctk.CTkFrame(frame_secao)
         frame_metricas.pack(fill=tk.X, pady=10)
@@ -2707,22 +2633,19 @@ class RelatorioViews:
         c = conn.cursor()
         
         c.execute("""
-            SELECT id, nome, email, telefone, date(created_at) 
+            SELECT id, nome, email, telefone, created_date 
             FROM clientes 
-            WHERE date(created_at) BETWEEN ? AND ? 
+            WHERE created_date BETWEEN ? AND ? 
             ORDER BY created_at DESC 
             LIMIT 15
         """, (data_inicio, data_fim))
         clientes = c.fetchall()
-        
-        c.execute("SELECT COUNT(*) FROM clientes")
-        total_clientes = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM clientes WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-        novos_clientes = c.fetchone()[0]
-        
         conn.close()
         
+        agregado = self._obter_agregado(data_inicio, data_fim)
+        total_clientes = agregado.total_clientes
+        novos_clientes = agregado.novos_clientes
+        
         if clientes:
             frame_tabela = ctk.CTkFrame(frame_secao)
             frame_tabela.pack(fill=tk.X, pady=10)
@@ -2795,10 +2718,10 @@ class RelatorioViews:
         c = conn.cursor()
         
         query = """
-            SELECT p.id, c.nome, p.total, p.status, date(p.created_at) 
+            SELECT p.id, c.nome, p.total, p.status, p.created_date 
             FROM pedidos p 
             LEFT JOIN clientes c ON p.cliente_id = c.id
-            WHERE date(p.created_at) BETWEEN ? AND ?
+            WHERE p.created_date BETWEEN ? AND ?
         """
         params = [data_inicio, data_fim]
         
@@ -2810,17 +2733,12 @@ class RelatorioViews:
         
         c.execute(query, params)
         pedidos = c.fetchall()
-        
-        c.execute("SELECT COUNT(*), SUM(total), AVG(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", 
-                 (data_inicio, data_fim))
-        stats_pedidos = c.fetchone()
-        
-        c.execute("SELECT status, COUNT(*) FROM pedidos WHERE date(created_at) BETWEEN ? AND ? GROUP BY status", 
-                 (data_inicio, data_fim))
-        status_distribuicao = c.fetchall()
-        
         conn.close()
         
+        agregado = self._obter_agregado(data_inicio, data_fim)
+        stats_pedidos = (agregado.quantidade_pedidos, agregado.faturamento, agregado.ticket_medio)
+        status_distribuicao = [(s, qtd) for s, qtd, _ in agregado.por_status]
+        
         if pedidos:
             frame_tabela = ctk.CTkFrame(frame_secao)
             frame_tabela.pack(fill=tk.X, pady=10)
@@ -2919,31 +2837,15 @@ class RelatorioViews:
         )
         titulo_secao.pack(anchor="w", pady=(10, 5))
         
-        conn = self._conectar_db()
-        c = conn.cursor()
-        
-        c.execute("""
-            SELECT date(created_at), COUNT(*), SUM(total), AVG(total) 
-            FROM pedidos 
-            WHERE date(created_at) BETWEEN ? AND ? 
-            GROUP BY date(created_at) 
-            ORDER BY date(created_at)
-        """, (data_inicio, data_fim))
-        evolucao = c.fetchall()
-        
-        c.execute("""
-            SELECT 
-                COUNT(*) as total_pedidos,
-                SUM(total) as faturamento_total,
-                AVG(total) as ticket_medio,
-                MIN(total) as menor_pedido,
-                MAX(total) as maior_pedido
-            FROM pedidos 
-            WHERE date(created_at) BETWEEN ? AND ?
-        """, (data_inicio, data_fim))
-        stats = c.fetchone()
-        
-        conn.close()
+        agregado = self._obter_agregado(data_inicio, data_fim)
+        evolucao = list(agregado.serie_diaria)
+        stats = (
+            agregado.quantidade_pedidos,
+            agregado.faturamento,
+            agregado.ticket_medio,
+            agregado.menor_pedido,
+            agregado.maior_pedido
+        )
         
         if stats:
             total_pedidos, faturamento_total, ticket_medio, menor_pedido, maior_pedido = stats
@@ -3028,33 +2930,12 @@ class RelatorioViews:
         )
         titulo_secao.pack(anchor="w", pady=(10, 5))
         
-        conn = self._conectar_db()
-        c = conn.cursor()
-        
-        c.execute("""
-            SELECT c.nome, COUNT(p.id) as total_pedidos, SUM(p.total) as valor_total
-            FROM clientes c
-            LEFT JOIN pedidos p ON c.id = p.cliente_id
-            WHERE date(p.created_at) BETWEEN ? AND ?
-            GROUP BY c.id
-            ORDER BY valor_total DESC
-            LIMIT 5
-        """, (data_inicio, data_fim))
-        top_clientes = c.fetchall()
-        
-        c.execute("SELECT COUNT(*) FROM clientes")
-        total_clientes = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM pedidos")
-        total_pedidos_geral = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-        pedidos_periodo = c.fetchone()[0]
-        
-        c.execute("SELECT SUM(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-        faturamento_periodo = c.fetchone()[0] or 0
-        
-        conn.close()
+        agregado = self._obter_agregado(data_inicio, data_fim)
+        top_clientes = [(cli[1], cli[3], cli[4]) for cli in agregado.top_clientes[:5]]
+        total_clientes = agregado.total_clientes
+        total_pedidos_geral = agregado.total_pedidos_geral
+        pedidos_periodo = agregado.quantidade_pedidos
+        faturamento_periodo = agregado.faturamento
         
         if top_clientes:
             frame_top = ctk.CTkFrame(frame_secao)
@@ -3123,27 +3004,9 @@ class RelatorioViews:
         titulo_secao.pack(anchor="w", pady=(10, 5))
         
         try:
-            conn = self._conectar_db()
-            c = conn.cursor()
-            
-            c.execute("""
-                SELECT date(created_at), SUM(total) 
-                FROM pedidos 
-                WHERE date(created_at) BETWEEN ? AND ? 
-                GROUP BY date(created_at) 
-                ORDER BY date(created_at)
-            """, (data_inicio, data_fim))
-            dados_evolucao = c.fetchall()
-            
-            c.execute("""
-                SELECT status, COUNT(*) 
-                FROM pedidos 
-                WHERE date(created_at) BETWEEN ? AND ? 
-                GROUP BY status
-            """, (data_inicio, data_fim))
-            dados_status = c.fetchall()
-            
-            conn.close()
+            agregado = self._obter_agregado(data_inicio, data_fim)
+            dados_evolucao = [(dia[0], dia[2]) for dia in agregado.serie_diaria]
+            dados_status = [(s, qtd) for s, qtd, _ in agregado.por_status]
             
             if dados_evolucao or dados_status:
                 frame_graficos = ctk.CTkFrame(frame_secao)
@@ -3214,25 +3077,12 @@ class RelatorioViews:
         )
         titulo_secao.pack(anchor="w", pady=(10, 5))
         
-        conn = self._conectar_db()
-        c = conn.cursor()
+        periodo_anterior_inicio, periodo_anterior_fim = periodo_anterior(data_inicio, data_fim)
         
-        data_inicio_dt = datetime.strptime(data_inicio, "%Y-%m-%d")
-        data_fim_dt = datetime.strptime(data_fim, "%Y-%m-%d")
-        dias_periodo = (data_fim_dt - data_inicio_dt).days
-        
-        periodo_anterior_inicio = (data_inicio_dt - timedelta(days=dias_periodo)).strftime("%Y-%m-%d")
-        periodo_anterior_fim = (data_inicio_dt - timedelta(days=1)).strftime("%Y-%m-%d")
-        
-        c.execute("SELECT COUNT(*), SUM(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", 
-                 (data_inicio, data_fim))
-        atual = c.fetchone()
-        
-        c.execute("SELECT COUNT(*), SUM(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", 
-                 (periodo_anterior_inicio, periodo_anterior_fim))
-        anterior = c.fetchone()
-        
-        conn.close()
+        agregado_atual = self._obter_agregado(data_inicio, data_fim)
+        agregado_anterior = self._obter_agregado(periodo_anterior_inicio, periodo_anterior_fim)
+        atual = (agregado_atual.quantidade_pedidos, agregado_atual.faturamento)
+        anterior = (agregado_anterior.quantidade_pedidos, agregado_anterior.faturamento)
         
         pedidos_atual = atual[0] or 0
         faturamento_atual = atual[1] or 0
@@ -3302,14 +3152,8 @@ class RelatorioViews:
         )
         titulo_secao.pack(anchor="w", pady=(10, 5))
         
-        conn = self._conectar_db()
-        c = conn.cursor()
-        
-        c.execute("SELECT COUNT(*), SUM(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", 
-                 (data_inicio, data_fim))
-        dados = c.fetchone()
-        
-        conn.close()
+        agregado = self._obter_agregado(data_inicio, data_fim)
+        dados = (agregado.quantidade_pedidos, agregado.faturamento)
         
         pedidos_periodo = dados[0] or 0
         faturamento_periodo = dados[1] or 0
@@ -3385,6 +3229,7 @@ class RelatorioViews:
                     font=ctk.CTkFont(size=10)
                 ).pack(anchor="w", padx=5, pady=2)
 
+    @cronometrado("relatorio.tela")
     def _mostrar_relatorio_tela(self, tipo, data_inicio, data_fim, status="Todos"):
         """Exibe relatório individual na tela"""
         self._limpar_resultados()
@@ -3430,17 +3275,16 @@ class RelatorioViews:
         c = conn.cursor()
         
         c.execute("""
-            SELECT id, nome, email, telefone, date(created_at) 
+            SELECT id, nome, email, telefone, created_date 
             FROM clientes 
-            WHERE date(created_at) BETWEEN ? AND ? 
+            WHERE created_date BETWEEN ? AND ? 
             ORDER BY created_at DESC
         """, (data_inicio, data_fim))
         clientes = c.fetchall()
         
-        c.execute("SELECT COUNT(*) FROM clientes WHERE date(created_at) BETWEEN ? AND ?", (data_inicio, data_fim))
-        total = c.fetchone()[0]
-        
         conn.close()
+        
+        total = self._obter_agregado(data_inicio, data_fim).novos_clientes
 
         frame_stats = ctk.CTkFrame(parent)
         frame_stats.pack(fill=tk.X, pady=(10, 15))
@@ -3490,10 +3334,10 @@ class RelatorioViews:
         c = conn.cursor()
         
         query = """
-            SELECT p.id, c.nome, p.total, p.status, date(p.created_at) 
+            SELECT p.id, c.nome, p.total, p.status, p.created_date 
             FROM pedidos p 
             LEFT JOIN clientes c ON p.cliente_id = c.id
-            WHERE date(p.created_at) BETWEEN ? AND ?
+            WHERE p.created_date BETWEEN ? AND ?
         """
         params = [data_inicio, data_fim]
         
@@ -3505,12 +3349,10 @@ class RelatorioViews:
         
         c.execute(query, params)
         pedidos = c.fetchall()
-        
-        c.execute("SELECT COUNT(*), SUM(total), AVG(total) FROM pedidos WHERE date(created_at) BETWEEN ? AND ?", 
-                 (data_inicio, data_fim))
-        stats = c.fetchone()
-        
         conn.close()
+        
+        agregado = self._obter_agregado(data_inicio, data_fim)
+        stats = (agregado.quantidade_pedidos, agregado.faturamento, agregado.ticket_medio)
 
         frame_stats = ctk.CTkFrame(parent)
         frame_stats.pack(fill=tk.X, pady=(10, 15))
@@ -3563,26 +3405,10 @@ class RelatorioViews:
 
     def _gerar_relatorio_financeiro_tela(self, parent, data_inicio, data_fim):
         """Gera relatório financeiro na tela"""
-        conn = self._conectar_db()
-        c = conn.cursor()
-        
-        c.execute("""
-            SELECT COUNT(*), SUM(total), AVG(total), MIN(total), MAX(total) 
-            FROM pedidos 
-            WHERE date(created_at) BETWEEN ? AND ?
-        """, (data_inicio, data_fim))
-        stats = c.fetchone()
-        
-        c.execute("""
-            SELECT date(created_at), COUNT(*), SUM(total) 
-            FROM pedidos 
-            WHERE date(created_at) BETWEEN ? AND ? 
-            GROUP BY date(created_at) 
-            ORDER BY date(created_at)
-        """, (data_inicio, data_fim))
-        evolucao = c.fetchall()
-        
-        conn.close()
+        agregado = self._obter_agregado(data_inicio, data_fim)
+        stats = (agregado.quantidade_pedidos, agregado.faturamento, agregado.ticket_medio,
+                 agregado.menor_pedido, agregado.maior_pedido)
+        evolucao = [dia[:3] for dia in agregado.serie_diaria]
 
         frame_stats = ctk.CTkFrame(parent)
         frame_stats.pack(fill=tk.X, pady=(10, 15))
@@ -3632,34 +3458,11 @@ class RelatorioViews:
 
     def _gerar_relatorio_estatisticas_tela(self, parent, data_inicio, data_fim):
         """Gera relatório de estatísticas na tela"""
-        conn = self._conectar_db()
-        c = conn.cursor()
-        
-        c.execute("SELECT COUNT(*) FROM clientes")
-        total_clientes = c.fetchone()[0]
-        
-        c.execute("SELECT COUNT(*) FROM pedidos")
-        total_pedidos = c.fetchone()[0]
-        
-        c.execute("""
-            SELECT COUNT(*), SUM(total), AVG(total) 
-            FROM pedidos 
-            WHERE date(created_at) BETWEEN ? AND ?
-        """, (data_inicio, data_fim))
-        stats_periodo = c.fetchone()
-        
-        c.execute("""
-            SELECT c.nome, COUNT(p.id), SUM(p.total) 
-            FROM clientes c 
-            LEFT JOIN pedidos p ON c.id = p.cliente_id 
-            WHERE date(p.created_at) BETWEEN ? AND ? 
-            GROUP BY c.id 
-            ORDER BY SUM(p.total) DESC 
-            LIMIT 5
-        """, (data_inicio, data_fim))
-        top_clientes = c.fetchall()
-        
-        conn.close()
+        agregado = self._obter_agregado(data_inicio, data_fim)
+        total_clientes = agregado.total_clientes
+        total_pedidos = agregado.total_pedidos_geral
+        stats_periodo = (agregado.quantidade_pedidos, agregado.faturamento, agregado.ticket_medio)
+        top_clientes = [(cli[1], cli[3], cli[4]) for cli in agregado.top_clientes[:5]]
 
         frame_principal = ctk.CTkFrame(parent)
         frame_principal.pack(fill=tk.X, pady=(10, 15))